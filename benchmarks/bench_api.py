@@ -0,0 +1,413 @@
+"""Throughput and latency of every /api route, recorded as a JSON baseline
+
+Generates a database with synthetic_data.py (or copies --db), points the
+app at it and sends --requests requests to each endpoint. Ids and payloads
+are drawn at random from the data. Two drivers are available:
+
+    client  the Flask test client, one request at a time (no HTTP, no threads)
+    http    --concurrency threads with keep-alive HTTP connections, against the
+            app served in-process by werkzeug, or against --url
+
+Per endpoint it records throughput, mean/p50/p95/p99/max latency and the
+status codes into --output. --compare prints the change against an earlier
+baseline and exits non-zero when an endpoint's p95 grew by more than
+--max-regression. App settings come from the usual environment variables,
+e.g. REPORT_CACHE_TTL=0 to time the report queries instead of the cache.
+
+Usage:
+    python benchmarks/bench_api.py [--driver client|http] [--requests 200] [--concurrency 8] \\
+        [--colleges 20 --students 500 --events 20 --density 0.2 | --db campus_events.db] \\
+        [--output baseline.json] [--compare old-baseline.json]
+"""
+import argparse
+import datetime
+import http.client
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+from synthetic_data import build_database  # noqa: E402
+
+# App settings recorded with every baseline, since they change what is measured
+RECORDED_SETTINGS = ('DB_TUNING_PROFILE', 'DB_POOL_SIZE', 'REPORT_CACHE_TTL', 'ROLLUP_INTERVAL',
+                     'REPORT_SNAPSHOT_PATH', 'DB_SHARD_DIR')
+
+# Status codes that mean the feature is unavailable here (e.g. analytics without NumPy)
+UNAVAILABLE_STATUSES = {501}
+
+# Ignore p95 changes smaller than this many milliseconds when comparing
+MIN_REGRESSION_MS = 1.0
+
+
+class Dataset:
+    """Ids to build requests from, read once from the benchmark database"""
+
+    def __init__(self, path):
+        with sqlite3.connect(path) as connection:
+            self.colleges = [row[0] for row in connection.execute(
+                "SELECT college_id FROM colleges c WHERE EXISTS (SELECT 1 FROM events e WHERE e.college_id = c.college_id) "
+                "AND EXISTS (SELECT 1 FROM students s WHERE s.college_id = c.college_id) ORDER BY college_id")]
+            self.events, self.students = {}, {}
+            for table, ids in (('events', self.events), ('students', self.students)):
+                key = 'event_id' if table == 'events' else 'student_id'
+                for college_id, row_id in connection.execute(f"SELECT college_id, {key} FROM {table} ORDER BY {key}"):
+                    ids.setdefault(college_id, []).append(row_id)
+            self.type_ids = [row[0] for row in connection.execute("SELECT type_id FROM event_types")]
+            self.counts = {table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                           for table in ('colleges', 'students', 'events', 'event_registrations', 'attendance',
+                                         'feedback')}
+        self._sequence = itertools.count()
+
+    def next_number(self):
+        """A process-wide unique number for rows that must not collide (emails, names)"""
+        return next(self._sequence)
+
+    def pair(self, rng):
+        college_id = rng.choice(self.colleges)
+        return college_id, rng.choice(self.events[college_id]), rng.choice(self.students[college_id])
+
+
+def get(path, **params):
+    return 'GET', f"{path}?{urllib.parse.urlencode(params)}" if params else path, None, {}
+
+
+def post_json(path, payload):
+    return 'POST', path, json.dumps(payload).encode(), {'Content-Type': 'application/json'}
+
+
+def new_event(data, rng):
+    college_id = rng.choice(data.colleges)
+    return post_json('/api/events', {
+        'college_id': college_id, 'event_name': f"Bench event {data.next_number()}",
+        'event_description': 'Created by bench_api.py', 'event_type_id': rng.choice(data.type_ids),
+        'event_date': '2024-05-01', 'event_time': '10:00:00', 'location': 'Hall 1', 'created_by': 'Admin',
+    })
+
+
+def pairs_of_college(data, rng, count):
+    college_id = rng.choice(data.colleges)
+    return [(rng.choice(data.events[college_id]), rng.choice(data.students[college_id])) for _ in range(count)]
+
+
+def roster_upload(data, rng):
+    college_id = rng.choice(data.colleges)
+    lines = []
+    for _ in range(100):
+        number = data.next_number()
+        lines.append(json.dumps({'student_name': f"Bench Student {number}", 'email': f"bench{number}@bench.edu",
+                                 'student_id_number': f"B{number:08d}"}))
+    return ('POST', f"/api/import/students?format=ndjson&college_id={college_id}", '\n'.join(lines).encode(),
+            {'Content-Type': 'application/x-ndjson'})
+
+
+# name -> request factory(data, rng) returning (method, path, body, headers).
+# Reads come first so the writes do not keep invalidating the cached reports
+# while they are timed.
+ENDPOINTS = {
+    'GET /api/event-types': lambda data, rng: get('/api/event-types'),
+    'GET /api/events': lambda data, rng: get('/api/events', college_id=rng.choice(data.colleges)),
+    'GET /api/events (page)': lambda data, rng: get('/api/events', college_id=rng.choice(data.colleges), limit=20),
+    'GET /api/students': lambda data, rng: get('/api/students', college_id=rng.choice(data.colleges)),
+    'GET /api/students (page)': lambda data, rng: get('/api/students', college_id=rng.choice(data.colleges), limit=50),
+    'GET /api/reports/event-popularity': lambda data, rng: get(
+        '/api/reports/event-popularity', college_id=rng.choice(data.colleges)),
+    'GET /api/reports/student-participation': lambda data, rng: get(
+        '/api/reports/student-participation', college_id=rng.choice(data.colleges)),
+    'GET /api/reports/student-participation (student)': lambda data, rng: get(
+        '/api/reports/student-participation', **dict(zip(('college_id', 'event_id', 'student_id'), data.pair(rng)))),
+    'GET /api/reports/top-active-students': lambda data, rng: get(
+        '/api/reports/top-active-students', college_id=rng.choice(data.colleges)),
+    'GET /api/reports/summary': lambda data, rng: get('/api/reports/summary', college_id=rng.choice(data.colleges)),
+    'GET /api/export/event_registrations': lambda data, rng: get(
+        '/api/export/event_registrations', college_id=rng.choice(data.colleges)),
+    'GET /api/analytics/event-popularity': lambda data, rng: get(
+        '/api/analytics/event-popularity', college_id=rng.choice(data.colleges)),
+    'GET /api/db/pool-stats': lambda data, rng: get('/api/db/pool-stats'),
+    'GET /api/db/shards': lambda data, rng: get('/api/db/shards'),
+    'GET /api/db/query-stats': lambda data, rng: get('/api/db/query-stats'),
+    'GET /api/cache/stats': lambda data, rng: get('/api/cache/stats'),
+    'GET /api/rollups/stats': lambda data, rng: get('/api/rollups/stats'),
+    'GET /api/analytics/stats': lambda data, rng: get('/api/analytics/stats'),
+    'GET /api/attendance/batch/stats': lambda data, rng: get('/api/attendance/batch/stats'),
+    'POST /api/events': new_event,
+    'POST /api/register': lambda data, rng: post_json(
+        '/api/register', dict(zip(('event_id', 'student_id'), data.pair(rng)[1:]))),
+    'POST /api/register/cancel': lambda data, rng: post_json(
+        '/api/register/cancel', dict(zip(('event_id', 'student_id'), data.pair(rng)[1:]))),
+    'POST /api/register/bulk': lambda data, rng: post_json(
+        '/api/register/bulk', {'registrations': [list(pair) for pair in pairs_of_college(data, rng, 50)]}),
+    'POST /api/attendance': lambda data, rng: post_json(
+        '/api/attendance', dict(zip(('event_id', 'student_id'), data.pair(rng)[1:]), status='present')),
+    'POST /api/attendance/batch': lambda data, rng: post_json(
+        '/api/attendance/batch', {'scans': [{'event_id': event_id, 'student_id': student_id}
+                                            for event_id, student_id in pairs_of_college(data, rng, 50)]}),
+    'POST /api/feedback': lambda data, rng: post_json(
+        '/api/feedback', dict(zip(('event_id', 'student_id'), data.pair(rng)[1:]), rating=rng.randint(1, 5),
+                              comments='Benchmark feedback')),
+    'POST /api/import/students': roster_upload,
+}
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies, statuses, seconds):
+    ordered = sorted(latencies)
+    status_counts = {}
+    for status in statuses:
+        status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+    result = {
+        'requests': len(latencies),
+        'status_counts': dict(sorted(status_counts.items())),
+        'errors': sum(1 for status in statuses if status is None or status >= 500),
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else None,
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+    }
+    for p in (50, 95, 99):
+        result[f'p{p}_ms'] = round(percentile(ordered, p) * 1000, 3)
+    result['max_ms'] = round(ordered[-1] * 1000, 3)
+    if all(status in UNAVAILABLE_STATUSES for status in statuses):
+        result['skipped'] = f"every request answered {statuses[0]}"
+    return result
+
+
+def run_client(app, data, factory, requests, warmup, seed):
+    """Sequential requests through the Flask test client"""
+    client = app.test_client()
+    rng = random.Random(seed)
+
+    def send():
+        method, path, body, headers = factory(data, rng)
+        response = client.open(path, method=method, data=body, headers=headers)
+        response.get_data()  # drain streamed responses
+        response.close()
+        return response.status_code
+
+    for _ in range(warmup):
+        send()
+    latencies, statuses = [], []
+    started = time.perf_counter()
+    for _ in range(requests):
+        start = time.perf_counter()
+        statuses.append(send())
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def run_http(host, port, data, factory, requests, warmup, concurrency, seed):
+    """requests spread over concurrency threads, each on its own keep-alive connection"""
+    latencies, statuses = [], []
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def worker(index, count):
+        rng = random.Random(seed * 1000 + index)
+        connection = http.client.HTTPConnection(host, port, timeout=60)
+
+        def send():
+            nonlocal connection
+            method, path, body, headers = factory(data, rng)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=60)
+                return None
+
+        for _ in range(warmup // concurrency):
+            send()
+        barrier.wait()
+        mine = []
+        for _ in range(count):
+            start = time.perf_counter()
+            status = send()
+            mine.append((time.perf_counter() - start, status))
+        connection.close()
+        with lock:
+            for elapsed, status in mine:
+                latencies.append(elapsed)
+                statuses.append(status)
+
+    counts = [requests // concurrency + (1 if index < requests % concurrency else 0) for index in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(index, count)) for index, count in enumerate(counts)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+def serve_in_background(app):
+    """Serve the app with werkzeug's threaded server on a free port; returns (server, port)"""
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_port
+
+
+def compare(baseline, current, max_regression):
+    """Print per-endpoint changes; returns the endpoints whose p95 regressed"""
+    regressions = []
+    print(f"\n{'endpoint':<52} {'p95 before':>11} {'p95 now':>9} {'change':>8} {'rps before':>11} {'rps now':>9}")
+    for name, now in current['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None or 'skipped' in before or 'skipped' in now:
+            continue
+        change = now['p95_ms'] / before['p95_ms'] if before['p95_ms'] else float('inf')
+        flag = ''
+        if change > max_regression and now['p95_ms'] - before['p95_ms'] > MIN_REGRESSION_MS:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:<52} {before['p95_ms']:>9.2f}ms {now['p95_ms']:>7.2f}ms {(change - 1) * 100:>+7.0f}% "
+              f"{before['throughput_rps']:>11.1f} {now['throughput_rps']:>9.1f}{flag}")
+    if baseline.get('dataset') != current['dataset'] or baseline.get('driver') != current['driver']:
+        print("Note: the baseline used a different dataset or driver; the numbers are not directly comparable")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--driver', choices=('client', 'http'), default='client')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=10, help='untimed requests per endpoint first')
+    parser.add_argument('--concurrency', type=int, default=8, help='threads of the http driver')
+    parser.add_argument('--url', help="http driver: benchmark a running server (e.g. http://127.0.0.1:8000) "
+                                      "started with DB_PATH=--db; its database is written to")
+    parser.add_argument('--db', help='benchmark a copy of this database instead of generating one')
+    parser.add_argument('--colleges', type=int, default=20)
+    parser.add_argument('--students', type=int, default=500, help='students per college')
+    parser.add_argument('--events', type=int, default=20, help='events per college')
+    parser.add_argument('--density', type=float, default=0.2, help="share of a college's events each student registers for")
+    parser.add_argument('--endpoints', help='comma-separated substrings selecting endpoints (default: all)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='benchmarks/baseline.json', help='JSON baseline to write')
+    parser.add_argument('--compare', help='earlier baseline to compare against')
+    parser.add_argument('--max-regression', type=float, default=1.5,
+                        help='fail when an endpoint p95 grows by more than this factor')
+    args = parser.parse_args()
+    if args.url and not args.db:
+        parser.error('--url needs --db, the database the server uses, to pick ids from')
+
+    selected = {name: factory for name, factory in ENDPOINTS.items()
+                if not args.endpoints or any(part in name for part in args.endpoints.split(','))}
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.url:
+            db_path = args.db
+            dataset_description = {'db': os.path.abspath(args.db)}
+        elif args.db:
+            db_path = os.path.join(directory, 'bench.db')
+            shutil.copy(args.db, db_path)
+            dataset_description = {'db': os.path.abspath(args.db)}
+        else:
+            db_path = os.path.join(directory, 'bench.db')
+            print(f"Generating {args.colleges} colleges x {args.students} students x {args.events} events "
+                  f"(density {args.density})...")
+            build_database(db_path, args.colleges, args.students, args.events, args.density, seed=args.seed)
+            dataset_description = {'colleges': args.colleges, 'students': args.students, 'events': args.events,
+                                   'density': args.density, 'seed': args.seed}
+        data = Dataset(db_path)
+        dataset_description['rows'] = data.counts
+
+        backend = server = None
+        if not args.url:
+            os.environ['DB_PATH'] = db_path
+            import app as backend
+            backend.prepare_database()
+            if backend.rollup_engine is not None:
+                for college_id in backend.rollup_colleges():
+                    backend.rollup_engine.refresh(college_id)
+            backend.start_background_workers()
+
+            # Every /api route should have an entry above
+            routes = {rule.rule for rule in backend.app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+            covered = {urllib.parse.urlsplit(factory(data, random.Random(0))[1]).path for factory in ENDPOINTS.values()}
+            missing = sorted(route for route in routes
+                             if not any(route == path or ('<' in route and path.startswith(route.split('<')[0]))
+                                        for path in covered))
+            if missing:
+                print(f"Not benchmarked: {', '.join(missing)}")
+
+        if args.driver == 'http':
+            if args.url:
+                target = urllib.parse.urlsplit(args.url)
+                host, port = target.hostname, target.port or 80
+            else:
+                server, port = serve_in_background(backend.app)
+                host = '127.0.0.1'
+
+        results = {}
+        try:
+            for index, (name, factory) in enumerate(selected.items()):
+                if args.driver == 'client':
+                    result = run_client(backend.app, data, factory, args.requests, args.warmup, args.seed + index)
+                else:
+                    result = run_http(host, port, data, factory, args.requests, args.warmup, args.concurrency,
+                                      args.seed + index)
+                results[name] = result
+                if 'skipped' in result:
+                    print(f"{name:<52} skipped: {result['skipped']}")
+                else:
+                    print(f"{name:<52} {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.2f}ms  "
+                          f"p95 {result['p95_ms']:>7.2f}ms  p99 {result['p99_ms']:>7.2f}ms  "
+                          f"{','.join(f'{status}x{count}' for status, count in result['status_counts'].items())}")
+        finally:
+            if server is not None:
+                server.shutdown()
+            if backend is not None and backend.rollup_engine is not None:
+                backend.rollup_engine.stop()
+
+    baseline = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'driver': args.driver,
+        'concurrency': args.concurrency if args.driver == 'http' else 1,
+        'requests_per_endpoint': args.requests,
+        'dataset': dataset_description,
+        'environment': {
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'settings': {name: os.environ[name] for name in RECORDED_SETTINGS if name in os.environ},
+        },
+        'endpoints': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    failed = [name for name, result in results.items() if result['errors'] and 'skipped' not in result]
+    for name in failed:
+        print(f"FAIL {name}: {results[name]['errors']} server errors")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), baseline, args.max_regression)
+        for name in regressions:
+            print(f"FAIL {name}: p95 grew by more than {args.max_regression}x")
+        failed += regressions
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Benchmark of the columnar analytics path against the SQL reports
+
+Builds a multi-college database, then produces the event popularity,
+student participation and top-students reports for every college twice:
+with the API's SQL queries (sqlite3.Row -> dict per row) and with
+analytics.ColumnarCache (NumPy group-bys). Also times a full load of the
+arrays and an incremental refresh after new rows arrive. Fails if the two
+paths disagree on any report.
+
+Needs NumPy.
+
+Usage:
+    python benchmarks/bench_columnar_analytics.py [--colleges 20] [--students 500] [--events 50] [--registrations 8]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+from analytics import ColumnarCache, require_numpy  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from queries import statement  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+
+# The schema's sample data uses college ids 1-2
+FIRST_COLLEGE_ID = 100
+
+
+def build_database(path, colleges, students, events, registrations):
+    """Create the schema and random registrations, attendance and feedback for every college"""
+    rng = random.Random(42)
+    connection = sqlite3.connect(path, isolation_level=None)
+    with open(SCHEMA_PATH, 'r') as f:
+        connection.executescript(f.read())
+    apply_migrations(connection, verbose=False)
+
+    connection.execute("BEGIN")
+    for college_id in range(FIRST_COLLEGE_ID, FIRST_COLLEGE_ID + colleges):
+        connection.execute("INSERT INTO colleges (college_id, college_name, college_code) VALUES (?, ?, ?)",
+                           (college_id, f"College {college_id}", f"C{college_id}"))
+        connection.executemany(
+            "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+            [(college_id, f"Student {college_id}-{i}", f"s{i}@c{college_id}.edu", f"C{college_id}S{i:06d}")
+             for i in range(students)]
+        )
+        connection.executemany(
+            "INSERT INTO events (college_id, event_name, event_type_id, event_date, event_time, created_by) "
+            "VALUES (?, ?, ?, '2024-03-01', '10:00:00', 'Admin')",
+            [(college_id, f"Event {college_id}-{i}", rng.randint(1, 5)) for i in range(events)]
+        )
+        student_ids = [row[0] for row in connection.execute(
+            "SELECT student_id FROM students WHERE college_id = ?", (college_id,))]
+        event_ids = [row[0] for row in connection.execute(
+            "SELECT event_id FROM events WHERE college_id = ?", (college_id,))]
+        pairs = {(event_id, student_id) for student_id in student_ids
+                 for event_id in rng.sample(event_ids, min(registrations, len(event_ids)))}
+        connection.executemany(
+            "INSERT INTO event_registrations (event_id, student_id, status) VALUES (?, ?, ?)",
+            [(e, s, 'cancelled' if rng.random() < 0.05 else 'registered') for e, s in sorted(pairs)]
+        )
+        attended = [pair for pair in sorted(pairs) if rng.random() < 0.7]
+        connection.executemany(
+            "INSERT INTO attendance (event_id, student_id, status) VALUES (?, ?, ?)",
+            [(e, s, 'absent' if rng.random() < 0.1 else 'present') for e, s in attended]
+        )
+        connection.executemany(
+            "INSERT INTO feedback (event_id, student_id, rating) VALUES (?, ?, ?)",
+            [(e, s, rng.randint(1, 5)) for e, s in attended if rng.random() < 0.5]
+        )
+    connection.execute("COMMIT")
+    connection.close()
+
+
+def sql_reports(connection, college_ids):
+    """All three reports for every college through the API's SQL queries"""
+    connection.row_factory = sqlite3.Row
+    reports = {}
+    for college_id in college_ids:
+        reports[college_id] = tuple(
+            [dict(row) for row in connection.execute(statement(name), (college_id,))]
+            for name in ('event_popularity_report', 'student_participation_report', 'top_active_students_report')
+        )
+    return reports
+
+
+def columnar_reports(cache, college_ids):
+    """The same reports computed once across all colleges from the column arrays"""
+    reports = {college_id: ([], [], []) for college_id in college_ids}
+    for index, rows in enumerate((cache.event_popularity(), cache.student_participation(), cache.top_students())):
+        for row in rows:
+            college_id = row.pop('college_id')
+            if college_id in reports:
+                reports[college_id][index].append(row)
+    return reports
+
+
+def same_report(sql_rows, columnar_rows, sort_column):
+    """Equal rows, and equal order of the ORDER BY column (ties may come in any order)"""
+    def key(row):
+        return tuple((name, str(value)) for name, value in sorted(row.items()))
+    return ([row[sort_column] for row in sql_rows] == [row[sort_column] for row in columnar_rows]
+            and sorted(map(key, sql_rows)) == sorted(map(key, columnar_rows)))
+
+
+def add_registrations(path, count):
+    """Append new registrations for existing students, as a live system would between refreshes"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("BEGIN")
+    connection.execute(
+        """
+        INSERT OR IGNORE INTO event_registrations (event_id, student_id)
+        SELECT e.event_id, s.student_id
+        FROM students s JOIN events e ON e.college_id = s.college_id
+        WHERE s.college_id >= ?
+        ORDER BY random() LIMIT ?
+        """,
+        (FIRST_COLLEGE_ID, count)
+    )
+    connection.execute("COMMIT")
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--colleges', type=int, default=20)
+    parser.add_argument('--students', type=int, default=500, help='students per college')
+    parser.add_argument('--events', type=int, default=50, help='events per college')
+    parser.add_argument('--registrations', type=int, default=8, help='registrations per student')
+    parser.add_argument('--append', type=int, default=1000, help='registrations added before the incremental refresh')
+    args = parser.parse_args()
+
+    try:
+        require_numpy()
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'analytics.db')
+        build_database(path, args.colleges, args.students, args.events, args.registrations)
+        college_ids = list(range(FIRST_COLLEGE_ID, FIRST_COLLEGE_ID + args.colleges))
+
+        with contextlib.closing(sqlite3.connect(path)) as connection:
+            start = time.perf_counter()
+            expected = sql_reports(connection, college_ids)
+            sql_seconds = time.perf_counter() - start
+
+        cache = ColumnarCache(lambda: contextlib.closing(sqlite3.connect(path)))
+        start = time.perf_counter()
+        cache.refresh()
+        load_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = columnar_reports(cache, college_ids)
+        columnar_seconds = time.perf_counter() - start
+
+        rows = cache.stats()['rows']
+        print(f"{args.colleges} colleges, {rows['event_registrations']} registrations, "
+              f"{rows['attendance']} attendance, {rows['feedback']} feedback rows")
+        print(f"SQL reports:       {sql_seconds * 1000:8.1f} ms")
+        print(f"Columnar reports:  {columnar_seconds * 1000:8.1f} ms  ({sql_seconds / columnar_seconds:.1f}x), "
+              f"after a {load_seconds * 1000:.1f} ms initial load")
+
+        add_registrations(path, args.append)
+        start = time.perf_counter()
+        cache.refresh()
+        refresh_seconds = time.perf_counter() - start
+        print(f"Incremental refresh after {args.append} new registrations: {refresh_seconds * 1000:.1f} ms "
+              f"({cache.stats()['full_reloads']} full reloads)")
+        if cache.stats()['full_reloads']:
+            failures.append("appending rows forced a full reload")
+
+        with contextlib.closing(sqlite3.connect(path)) as connection:
+            expected = sql_reports(connection, college_ids)
+        actual = columnar_reports(cache, college_ids)
+        for college_id in college_ids:
+            for name, sort_column, sql_rows, columnar_rows in zip(
+                    ('event popularity', 'student participation', 'top students'),
+                    ('total_registrations', 'events_attended', 'events_attended'),
+                    expected[college_id], actual[college_id]):
+                if not same_report(sql_rows, columnar_rows, sort_column):
+                    failures.append(f"college {college_id}: {name} differs from the SQL report")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
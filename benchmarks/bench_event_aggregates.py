@@ -0,0 +1,131 @@
+"""Regression benchmark for the per-event aggregate queries
+
+Builds databases where every event has N registrations, N attendance rows
+and N feedback rows, then times the event popularity report with the old
+three-way LEFT JOIN and with the event_stats-backed query now used by the API.
+The per-event cost of the current query must grow linearly with N; the
+legacy join grows with N^3.
+
+Usage:
+    python benchmarks/bench_event_aggregates.py [--events 20] [--sizes 10,20,40,80]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+from queries import statement  # noqa: E402
+from query_plans import create_reference_database  # noqa: E402
+
+LEGACY_POPULARITY_QUERY = """
+SELECT e.event_name, et.type_name, e.event_date,
+       COUNT(er.registration_id) as total_registrations,
+       COUNT(a.attendance_id) as attendance_count,
+       ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_percentage,
+       ROUND(AVG(f.rating), 2) as average_rating
+FROM events e
+JOIN event_types et ON e.event_type_id = et.type_id
+LEFT JOIN event_registrations er ON e.event_id = er.event_id AND er.status = 'registered'
+LEFT JOIN attendance a ON e.event_id = a.event_id AND a.status = 'present'
+LEFT JOIN feedback f ON e.event_id = f.event_id
+WHERE e.college_id = ?
+GROUP BY e.event_id
+ORDER BY total_registrations DESC
+"""
+
+BENCH_COLLEGE_ID = 999
+
+# Allowed growth in per-event time when N doubles (2.0 is perfectly linear)
+MAX_DOUBLING_RATIO = 3.0
+
+
+def build_database(events, rows_per_event):
+    """Return an in-memory database with rows_per_event rows per child table per event"""
+    connection = create_reference_database()
+    connection.execute("BEGIN")
+    # A dedicated college keeps the schema's sample events out of the measurements
+    connection.execute("INSERT INTO colleges (college_id, college_name, college_code) "
+                       "VALUES (?, 'Benchmark University', 'BENCH')", (BENCH_COLLEGE_ID,))
+    connection.executemany(
+        "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+        [(BENCH_COLLEGE_ID, f"Student {i}", f"student{i}@bench.edu", f"BENCH{i:06d}")
+         for i in range(rows_per_event)]
+    )
+    connection.executemany(
+        "INSERT INTO events (college_id, event_name, event_type_id, event_date, event_time, created_by) "
+        "VALUES (?, ?, 1, '2024-03-01', '10:00:00', 'Admin')",
+        [(BENCH_COLLEGE_ID, f"Event {i}") for i in range(events)]
+    )
+    event_ids = [row[0] for row in connection.execute(
+        "SELECT event_id FROM events WHERE college_id = ?", (BENCH_COLLEGE_ID,))]
+    student_ids = [row[0] for row in connection.execute(
+        "SELECT student_id FROM students WHERE college_id = ?", (BENCH_COLLEGE_ID,))]
+    pairs = [(event_id, student_id) for event_id in event_ids for student_id in student_ids]
+    connection.executemany("INSERT INTO event_registrations (event_id, student_id) VALUES (?, ?)", pairs)
+    connection.executemany("INSERT INTO attendance (event_id, student_id) VALUES (?, ?)", pairs)
+    connection.executemany(
+        "INSERT INTO feedback (event_id, student_id, rating) VALUES (?, ?, ?)",
+        [(event_id, student_id, student_id % 5 + 1) for event_id, student_id in pairs]
+    )
+    connection.execute("COMMIT")
+    return connection
+
+
+def time_query(connection, sql, repeats):
+    """Return the best wall-clock time of running sql to completion"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        rows = connection.execute(sql, (BENCH_COLLEGE_ID,)).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--sizes', default='10,20,40,80',
+                        help='comma-separated rows per event per child table')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--skip-legacy', action='store_true',
+                        help='do not time the old join (it is cubic in N)')
+    args = parser.parse_args()
+
+    current_sql = statement('event_popularity_report')
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print(f"{'N':>6} {'current ms/event':>18} {'legacy ms/event':>17} {'legacy registrations':>21}")
+    previous = None
+    failures = []
+    for size in sizes:
+        connection = build_database(args.events, size)
+        current, rows = time_query(connection, current_sql, args.repeats)
+        assert all(row[3] == size for row in rows), "current query returned wrong counts"
+
+        legacy_ms = legacy_count = '-'
+        if not args.skip_legacy:
+            legacy, legacy_rows = time_query(connection, LEGACY_POPULARITY_QUERY, 1)
+            legacy_ms = f"{legacy * 1000 / args.events:.3f}"
+            legacy_count = legacy_rows[0][3]
+
+        per_event = current / args.events
+        print(f"{size:>6} {per_event * 1000:>18.3f} {legacy_ms:>17} {legacy_count:>21}")
+
+        if previous is not None:
+            previous_size, previous_per_event = previous
+            ratio = per_event / previous_per_event
+            allowed = MAX_DOUBLING_RATIO * (size / previous_size) / 2
+            if ratio > allowed:
+                failures.append(f"N {previous_size} -> {size}: per-event time grew {ratio:.2f}x (allowed {allowed:.2f}x)")
+        previous = (size, per_event)
+        connection.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
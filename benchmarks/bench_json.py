@@ -0,0 +1,132 @@
+"""Serialization benchmark of the report endpoints
+
+Builds a synthetic database and times the live report queries two ways:
+the old path (sqlite3.Row rows converted to dicts, encoded by Flask's
+default provider) and the new one (a tuple cursor's rows wrapped in a
+RowSet, encoded by FastJSONProvider with the stdlib encoder and with
+orjson). Then times the /api/reports/* routes end to end through the Flask
+test client with each JSON backend. Fails if any path produces a different
+document than the old one.
+
+Usage:
+    python benchmarks/bench_json.py [--colleges 2] [--students 20000] [--events 200] [--repeat 20]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from json_provider import FastJSONProvider, RowSet, orjson, tuple_cursor  # noqa: E402
+from queries import statement  # noqa: E402
+from synthetic_data import FIRST_COLLEGE_ID, build_database  # noqa: E402
+
+# Live report queries, keyed by their /api/reports/* route
+REPORTS = {
+    'event-popularity': 'event_popularity_report',
+    'student-participation': 'student_participation_report',
+    'top-active-students': 'top_active_students_report',
+}
+
+
+def best_of(repeat, function):
+    """Fastest of `repeat` calls in milliseconds, and the last result"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def bench_row_paths(db_path, repeat):
+    """Query + row conversion + encoding per report; returns a list of failures"""
+    app = Flask(__name__)
+    legacy = DefaultJSONProvider(app)
+    providers = {'json': FastJSONProvider(app, 'json')}
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app, 'orjson')
+
+    failures = []
+    with contextlib.closing(sqlite3.connect(db_path)) as connection:
+        connection.row_factory = sqlite3.Row
+        for route, name in REPORTS.items():
+            sql = statement(name)
+
+            def old_path():
+                return legacy.dumps([dict(row) for row in connection.execute(sql, (FIRST_COLLEGE_ID,)).fetchall()])
+
+            old_ms, expected = best_of(repeat, old_path)
+            expected = json.loads(expected)
+            print(f"{route:<24} {len(expected):6d} rows  Row + dict + Flask default: {old_ms:8.2f}ms")
+            for backend, provider in providers.items():
+                def new_path():
+                    return provider.encode(RowSet.from_cursor(tuple_cursor(connection).execute(sql, (FIRST_COLLEGE_ID,))))
+
+                new_ms, body = best_of(repeat, new_path)
+                print(f"{'':<37}tuples + RowSet + {backend + ':':<9} {new_ms:8.2f}ms  ({old_ms / new_ms:.1f}x)")
+                if json.loads(body) != expected:
+                    failures.append(f"{route}: {backend} output differs from the Row + dict path")
+    return failures
+
+
+def bench_endpoints(db_path, repeat):
+    """Time the report routes per JSON backend with the response cache and rollups off"""
+    os.environ.update(DB_PATH=db_path, REPORT_CACHE_TTL='0', ROLLUP_INTERVAL='0', METRICS_ENABLED='0')
+    import app as campus_app
+
+    failures = []
+    client = campus_app.app.test_client()
+    backends = ['json'] + (['orjson'] if orjson is not None else [])
+    for route in REPORTS:
+        url = f'/api/reports/{route}?college_id={FIRST_COLLEGE_ID}'
+        timings, documents = {}, {}
+        for backend in backends:
+            campus_app.app.json = FastJSONProvider(campus_app.app, backend)
+            timings[backend], response = best_of(repeat, lambda: client.get(url))
+            if response.status_code != 200:
+                failures.append(f"{url}: status {response.status_code}")
+            documents[backend] = response.get_json()
+        summary = '  '.join(f"{backend} {ms:8.2f}ms" for backend, ms in timings.items())
+        if 'orjson' in timings:
+            summary += f"  ({timings['json'] / timings['orjson']:.1f}x)"
+        print(f"GET {url:<52} {summary}")
+        if len({json.dumps(document, sort_keys=True) for document in documents.values()}) > 1:
+            failures.append(f"{url}: JSON backends disagree")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--colleges', type=int, default=2)
+    parser.add_argument('--students', type=int, default=20000, help='students per college')
+    parser.add_argument('--events', type=int, default=200, help='events per college')
+    parser.add_argument('--density', type=float, default=0.02)
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per path; the fastest counts')
+    args = parser.parse_args()
+    if orjson is None:
+        print("orjson is not installed; only the stdlib encoder is measured")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'bench.db')
+        counts = build_database(db_path, args.colleges, args.students, args.events, args.density)
+        print(f"{counts['students']} students, {counts['events']} events, "
+              f"{counts['event_registrations']} registrations")
+        failures = bench_row_paths(db_path, args.repeat)
+        failures += bench_endpoints(db_path, args.repeat)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
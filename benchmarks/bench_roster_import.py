@@ -0,0 +1,158 @@
+"""Throughput benchmark of the roster import against per-row INSERTs
+
+Writes a students CSV (with a share of invalid and duplicate rows) and
+loads it into fresh copies of the same database three ways: one INSERT and
+commit per row, as database/check_db/add_sample_data.py does, then
+roster_import with batched executemany transactions, with and without
+deferred index maintenance. Connections use the app's 'durable' PRAGMA
+profile. Prints rows per second for each; fails unless both import runs
+insert exactly the valid, non-duplicate rows.
+
+Usage:
+    python benchmarks/bench_roster_import.py [--rows 50000] [--per-row-rows 2000] [--existing 20000] [--batch-size 1000]
+"""
+import argparse
+import contextlib
+import csv
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+from db_tuning import apply_pragmas, get_profile  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+from roster_import import import_records, read_records  # noqa: E402
+
+# The schema's sample data uses college ids 1-2
+FIRST_COLLEGE_ID = 100
+COLLEGES = 10
+
+# Share of generated rows with an invalid email, and of rows repeating an earlier valid email
+BAD_ROW_RATE = 0.01
+DUPLICATE_ROW_RATE = 0.01
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    apply_pragmas(connection, get_profile('durable'))
+    return connection
+
+
+def build_database(path, existing):
+    """Schema, migrations, the benchmark colleges and `existing` students already enrolled"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    with open(SCHEMA_PATH, 'r') as f:
+        connection.executescript(f.read())
+    apply_migrations(connection, verbose=False)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("BEGIN")
+    connection.executemany("INSERT INTO colleges (college_id, college_name, college_code) VALUES (?, ?, ?)",
+                           [(college_id, f"College {college_id}", f"C{college_id}")
+                            for college_id in range(FIRST_COLLEGE_ID, FIRST_COLLEGE_ID + COLLEGES)])
+    connection.executemany(
+        "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+        [(FIRST_COLLEGE_ID + i % COLLEGES, f"Enrolled {i}", f"enrolled{i}@bench.edu", f"E{i:07d}")
+         for i in range(existing)]
+    )
+    connection.execute("COMMIT")
+    connection.close()
+
+
+def write_roster(path, rows):
+    """A students CSV of `rows` rows; returns the number of rows that should be imported"""
+    rng = random.Random(42)
+    valid = []
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(('college_id', 'student_name', 'email', 'student_id_number'))
+        for i in range(rows):
+            college_id = FIRST_COLLEGE_ID + rng.randrange(COLLEGES)
+            email = f"new{i}@bench.edu"
+            roll = rng.random()
+            if roll < BAD_ROW_RATE:
+                email = f"new{i}-at-bench.edu"
+            elif roll < BAD_ROW_RATE + DUPLICATE_ROW_RATE and valid:
+                email = rng.choice(valid)
+            else:
+                valid.append(email)
+            writer.writerow((college_id, f"Student {i}", email, f"N{i:07d}"))
+    return len(valid)
+
+
+def per_row_insert(db_path, csv_path, rows):
+    """The add_sample_data.py pattern: one INSERT and one commit per row"""
+    with contextlib.closing(connect(db_path)) as connection, open(csv_path, newline='') as f:
+        reader = csv.DictReader(f)
+        for record, _ in zip(reader, range(rows)):
+            try:
+                connection.execute(
+                    "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+                    (record['college_id'], record['student_name'], record['email'], record['student_id_number'])
+                )
+                connection.commit()
+            except sqlite3.IntegrityError:
+                connection.rollback()
+
+
+def roster_import(db_path, csv_path, batch_size, defer_indexes):
+    with contextlib.closing(connect(db_path)) as connection, open(csv_path, newline='') as f:
+        return import_records(connection, 'students', read_records(f, 'csv'),
+                              batch_size=batch_size, defer_indexes=defer_indexes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50000, help='rows in the imported CSV')
+    parser.add_argument('--per-row-rows', type=int, default=2000,
+                        help='rows loaded with per-row commits (slow; the rate is what matters)')
+    parser.add_argument('--existing', type=int, default=20000, help='students in the database before the import')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        base_path = os.path.join(directory, 'base.db')
+        csv_path = os.path.join(directory, 'students.csv')
+        build_database(base_path, args.existing)
+        expected = write_roster(csv_path, args.rows)
+        print(f"{args.rows} roster rows ({args.rows - expected} invalid or duplicate), "
+              f"{args.existing} students already enrolled")
+
+        def fresh_copy(name):
+            path = os.path.join(directory, f'{name}.db')
+            shutil.copy(base_path, path)
+            return path
+
+        path = fresh_copy('per_row')
+        start = time.perf_counter()
+        per_row_insert(path, csv_path, args.per_row_rows)
+        per_row_rate = min(args.rows, args.per_row_rows) / (time.perf_counter() - start)
+        print(f"Per-row INSERT + commit:       {per_row_rate:10.0f} rows/s  (first {args.per_row_rows} rows)")
+
+        summaries = {}
+        for defer_indexes in (False, True):
+            summary = roster_import(fresh_copy(f'import_{defer_indexes}'), csv_path, args.batch_size, defer_indexes)
+            summaries[defer_indexes] = summary
+            label = 'Import, deferred indexes:' if defer_indexes else 'Import, batched:'
+            print(f"{label:<30} {summary['rows_per_second']:10.0f} rows/s  ({summary['rows_per_second'] / per_row_rate:.0f}x), "
+                  f"{summary['imported']} imported, {summary['rejected']} rejected in {summary['batches']} batches")
+            if summary['imported'] != expected:
+                failures.append(f"{label} imported {summary['imported']} rows, expected {expected}")
+
+        counts = [(summary['imported'], summary['rejected']) for summary in summaries.values()]
+        if counts[0] != counts[1]:
+            failures.append(f"deferring indexes changed the outcome: {counts[0]} vs {counts[1]}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""Concurrent load test for capacity-limited registration
+
+Thousands of students register for one popular event from many threads at
+once, then a batch of them cancels concurrently. Exactly max_capacity
+registrations may succeed, everyone else must be waitlisted in a unique
+position, every cancellation must promote the oldest waitlisted student,
+and event_seats must still match the registrations table.
+
+Usage:
+    python benchmarks/stress_seat_allocation.py [--students 2000] [--capacity 150] [--threads 16] [--cancel 50]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+import app as backend  # noqa: E402
+from db_pool import ConnectionPool  # noqa: E402
+from event_stats import verify_event_stats  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+from seats import verify_event_seats  # noqa: E402
+from student_stats import verify_student_stats  # noqa: E402
+
+STRESS_COLLEGE_ID = 999
+
+
+def build_database(path, students, capacity):
+    """Create the schema plus one college, one capped event and the students; return (event_id, student_ids)"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    with open(SCHEMA_PATH, 'r') as f:
+        connection.executescript(f.read())
+    apply_migrations(connection, verbose=False)
+
+    connection.execute("BEGIN")
+    connection.execute("INSERT INTO colleges (college_id, college_name, college_code) "
+                       "VALUES (?, 'Stress University', 'STRESS')", (STRESS_COLLEGE_ID,))
+    connection.executemany(
+        "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+        [(STRESS_COLLEGE_ID, f"Student {i}", f"student{i}@stress.edu", f"STRESS{i:06d}") for i in range(students)]
+    )
+    event_id = connection.execute(
+        "INSERT INTO events (college_id, event_name, event_type_id, event_date, event_time, max_capacity, created_by) "
+        "VALUES (?, 'Popular Event', 1, '2024-03-01', '10:00:00', ?, 'Admin')",
+        (STRESS_COLLEGE_ID, capacity)
+    ).lastrowid
+    connection.execute("COMMIT")
+
+    student_ids = [row[0] for row in connection.execute(
+        "SELECT student_id FROM students WHERE college_id = ?", (STRESS_COLLEGE_ID,))]
+    connection.close()
+    return event_id, student_ids
+
+
+def post_all(endpoint, event_id, student_ids, threads):
+    """Post one request per student spread over threads; return ({student_id: response json, status}, seconds)"""
+    responses = {}
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(chunk):
+        client = backend.app.test_client()
+        local = {}
+        barrier.wait()
+        for student_id in chunk:
+            response = client.post(endpoint, json={'event_id': event_id, 'student_id': student_id})
+            local[student_id] = (response.status_code, response.get_json())
+        with lock:
+            responses.update(local)
+
+    workers = [threading.Thread(target=worker, args=(student_ids[i::threads],)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return responses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--capacity', type=int, default=150)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--cancel', type=int, default=50)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stress.db')
+        event_id, student_ids = build_database(path, args.students, args.capacity)
+        backend.db_pool = ConnectionPool(path, pool_size=args.threads,
+                                         on_connect=lambda c: backend.apply_pragmas(c, backend.db_settings))
+
+        responses, elapsed = post_all('/api/register', event_id, student_ids, args.threads)
+        codes = Counter(code for code, _ in responses.values())
+        positions = sorted(body['waitlist_position'] for code, body in responses.values() if code == 202)
+        print(f"{len(student_ids)} registrations for {args.capacity} seats from {args.threads} threads: "
+              f"{codes[200]} registered, {codes[202]} waitlisted, "
+              f"{len(student_ids) / elapsed:.0f} requests/s")
+
+        expected_waitlist = len(student_ids) - args.capacity
+        if codes[200] != args.capacity:
+            failures.append(f"{codes[200]} registrations accepted, expected {args.capacity}")
+        if codes[202] != expected_waitlist:
+            failures.append(f"{codes[202]} students waitlisted, expected {expected_waitlist}")
+        if positions != list(range(1, expected_waitlist + 1)):
+            failures.append("waitlist positions are not unique and contiguous")
+
+        registered = [student_id for student_id, (code, _) in responses.items() if code == 200]
+        with backend.db_pool.connection() as connection:
+            waitlist_order = [row[0] for row in connection.execute(
+                "SELECT student_id FROM event_waitlist WHERE event_id = ? ORDER BY waitlist_id", (event_id,))]
+
+        cancelled, elapsed = post_all('/api/register/cancel', event_id, registered[:args.cancel], args.threads)
+        promoted = [student_id for _, body in cancelled.values() for student_id in body['promoted_student_ids']]
+        print(f"{len(cancelled)} concurrent cancellations promoted {len(promoted)} waitlisted students "
+              f"in {elapsed * 1000:.0f} ms")
+
+        if any(code != 200 for code, _ in cancelled.values()):
+            failures.append(f"cancellations failed: {Counter(code for code, _ in cancelled.values())}")
+        if sorted(promoted) != sorted(waitlist_order[:len(cancelled)]):
+            failures.append("cancellations did not promote the oldest waitlist entries")
+
+        with backend.db_pool.connection() as connection:
+            seats_taken, = connection.execute(
+                "SELECT seats_taken FROM event_seats WHERE event_id = ?", (event_id,)).fetchone()
+            held, = connection.execute(
+                "SELECT COUNT(*) FROM event_registrations WHERE event_id = ? AND status = 'registered'",
+                (event_id,)).fetchone()
+            if seats_taken != args.capacity or held != args.capacity:
+                failures.append(f"seats_taken {seats_taken} / registrations {held}, expected {args.capacity}")
+            for name, mismatches in (('event_seats', verify_event_seats(connection)),
+                                     ('event_stats', verify_event_stats(connection)),
+                                     ('student_stats', verify_student_stats(connection))):
+                if mismatches:
+                    failures.append(f"{name}: {len(mismatches)} counters out of sync")
+        backend.db_pool.close_all()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Concurrency stress test for the single-row write endpoints
+
+Several threads post the same (event, student) pairs to /api/register,
+/api/attendance and /api/feedback at the same time against a scratch
+database. Each pair must be accepted exactly once and rejected as a
+duplicate by every other thread, the tables must hold one row per pair and
+the trigger-maintained counters must still match the source tables.
+
+Usage:
+    python benchmarks/stress_write_upserts.py [--threads 8] [--events 5] [--students 40]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+import app as backend  # noqa: E402
+from db_pool import ConnectionPool  # noqa: E402
+from event_stats import verify_event_stats  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+from student_stats import verify_student_stats  # noqa: E402
+
+STRESS_COLLEGE_ID = 999
+
+# endpoint -> (table, extra payload fields)
+ENDPOINTS = {
+    '/api/register': ('event_registrations', {}),
+    '/api/attendance': ('attendance', {'status': 'present'}),
+    '/api/feedback': ('feedback', {'rating': 4, 'comments': 'stress'}),
+}
+
+
+def build_database(path, events, students):
+    """Create the schema plus one college with the given events and students; return all pairs"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    with open(SCHEMA_PATH, 'r') as f:
+        connection.executescript(f.read())
+    apply_migrations(connection, verbose=False)
+
+    connection.execute("BEGIN")
+    connection.execute("INSERT INTO colleges (college_id, college_name, college_code) "
+                       "VALUES (?, 'Stress University', 'STRESS')", (STRESS_COLLEGE_ID,))
+    connection.executemany(
+        "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+        [(STRESS_COLLEGE_ID, f"Student {i}", f"student{i}@stress.edu", f"STRESS{i:06d}") for i in range(students)]
+    )
+    connection.executemany(
+        "INSERT INTO events (college_id, event_name, event_type_id, event_date, event_time, created_by) "
+        "VALUES (?, ?, 1, '2024-03-01', '10:00:00', 'Admin')",
+        [(STRESS_COLLEGE_ID, f"Event {i}") for i in range(events)]
+    )
+    connection.execute("COMMIT")
+
+    event_ids = [row[0] for row in connection.execute(
+        "SELECT event_id FROM events WHERE college_id = ?", (STRESS_COLLEGE_ID,))]
+    student_ids = [row[0] for row in connection.execute(
+        "SELECT student_id FROM students WHERE college_id = ?", (STRESS_COLLEGE_ID,))]
+    connection.close()
+    return [(event_id, student_id) for event_id in event_ids for student_id in student_ids]
+
+
+def hammer(endpoint, extra, pairs, threads):
+    """Post every pair from every thread at once; return (status code counts, seconds)"""
+    statuses = Counter()
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def worker(seed):
+        client = backend.app.test_client()
+        order = pairs[:]
+        random.Random(seed).shuffle(order)
+        local = Counter()
+        barrier.wait()
+        for event_id, student_id in order:
+            response = client.post(endpoint, json=dict(extra, event_id=event_id, student_id=student_id))
+            local[response.status_code] += 1
+        with lock:
+            statuses.update(local)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return statuses, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--events', type=int, default=5)
+    parser.add_argument('--students', type=int, default=40)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'stress.db')
+        pairs = build_database(path, args.events, args.students)
+        backend.db_pool = ConnectionPool(path, pool_size=args.threads,
+                                         on_connect=lambda c: backend.apply_pragmas(c, backend.db_settings))
+
+        print(f"{len(pairs)} pairs x {args.threads} threads per endpoint")
+        print(f"{'endpoint':<18} {'200':>6} {'400':>6} {'other':>6} {'rows':>6} {'writes/s':>9}")
+        for endpoint, (table, extra) in ENDPOINTS.items():
+            statuses, elapsed = hammer(endpoint, extra, pairs, args.threads)
+            other = sum(count for code, count in statuses.items() if code not in (200, 400))
+            with backend.db_pool.connection() as connection:
+                rows = connection.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE event_id IN (SELECT event_id FROM events WHERE college_id = ?)",
+                    (STRESS_COLLEGE_ID,)
+                ).fetchone()[0]
+            requests = len(pairs) * args.threads
+            print(f"{endpoint:<18} {statuses[200]:>6} {statuses[400]:>6} {other:>6} {rows:>6} "
+                  f"{requests / elapsed:>9.0f}")
+
+            if statuses[200] != len(pairs):
+                failures.append(f"{endpoint}: {statuses[200]} accepted, expected {len(pairs)}")
+            if statuses[400] != len(pairs) * (args.threads - 1):
+                failures.append(f"{endpoint}: {statuses[400]} duplicates, expected {len(pairs) * (args.threads - 1)}")
+            if other:
+                failures.append(f"{endpoint}: {other} unexpected responses {dict(statuses)}")
+            if rows != len(pairs):
+                failures.append(f"{endpoint}: {table} holds {rows} rows, expected {len(pairs)}")
+
+        with backend.db_pool.connection() as connection:
+            for name, mismatches in (('event_stats', verify_event_stats(connection)),
+                                     ('student_stats', verify_student_stats(connection))):
+                if mismatches:
+                    failures.append(f"{name}: {len(mismatches)} counters out of sync")
+        backend.db_pool.close_all()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
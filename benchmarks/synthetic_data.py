@@ -0,0 +1,136 @@
+"""Synthetic campus databases at a configurable scale
+
+Creates the schema and migrations, then colleges x students x events, with
+each student registered for a `density` share of their college's events.
+About 5% of registrations are cancelled, `attendance` of the active ones
+checked in (10% of those marked absent) and `feedback` of the check-ins
+rated. A share of events gets a capacity. Everything is drawn from a seeded
+random generator, so the same arguments always produce the same database.
+
+Usage:
+    python benchmarks/synthetic_data.py output.db [--colleges 50] [--students 500] [--events 20] [--density 0.2]
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+from migrations import apply_migrations  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+from seats import rebuild_event_seats  # noqa: E402
+
+# The schema's sample data uses college ids 1-2; generated colleges follow them
+FIRST_COLLEGE_ID = 3
+
+CANCELLED_RATE = 0.05
+ABSENT_RATE = 0.1
+CAPPED_EVENT_RATE = 0.2
+
+SEMESTER_START = datetime.date(2024, 1, 8)
+SEMESTER_DAYS = 120
+
+
+def build_database(path, colleges=50, students=500, events=20, density=0.2, attendance=0.7, feedback=0.5,
+                   seed=42, verbose=False):
+    """Create a database at the given scale; returns row counts per table
+
+    The triggers keep event_stats and student_stats in step while the rows
+    go in, one transaction per college; event_seats is rebuilt at the end.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    rng = random.Random(seed)
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        with open(SCHEMA_PATH, 'r') as f:
+            connection.executescript(f.read())
+        apply_migrations(connection, verbose=False)
+        type_ids = [row[0] for row in connection.execute("SELECT type_id FROM event_types")]
+
+        for college_id in range(FIRST_COLLEGE_ID, FIRST_COLLEGE_ID + colleges):
+            start = time.perf_counter()
+            connection.execute("BEGIN")
+            connection.execute("INSERT INTO colleges (college_id, college_name, college_code) VALUES (?, ?, ?)",
+                               (college_id, f"College {college_id}", f"COL{college_id}"))
+            connection.executemany(
+                "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+                [(college_id, f"Student {college_id}-{i}", f"student{i}@college{college_id}.edu", f"S{i:06d}")
+                 for i in range(students)]
+            )
+            event_rows = []
+            for i in range(events):
+                event_date = SEMESTER_START + datetime.timedelta(days=rng.randrange(SEMESTER_DAYS))
+                capacity = rng.randint(students // 20 + 1, students // 4 + 2) if rng.random() < CAPPED_EVENT_RATE else None
+                event_rows.append((college_id, f"Event {college_id}-{i}", f"Generated event {i}", rng.choice(type_ids),
+                                   event_date.isoformat(), f"{rng.randint(9, 18):02d}:00:00", f"Hall {rng.randint(1, 9)}",
+                                   capacity, 'Admin'))
+            connection.executemany(
+                "INSERT INTO events (college_id, event_name, event_description, event_type_id, event_date, event_time, "
+                "location, max_capacity, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                event_rows
+            )
+            student_ids = [row[0] for row in connection.execute(
+                "SELECT student_id FROM students WHERE college_id = ? ORDER BY student_id", (college_id,))]
+            capacities = dict(connection.execute(
+                "SELECT event_id, max_capacity FROM events WHERE college_id = ? ORDER BY event_id", (college_id,)))
+
+            registrations, checked_in = [], []
+            per_student = max(0, min(len(capacities), round(density * len(capacities))))
+            seats = dict.fromkeys(capacities, 0)
+            for student_id in student_ids:
+                for event_id in rng.sample(sorted(capacities), per_student):
+                    cancelled = rng.random() < CANCELLED_RATE
+                    if not cancelled:
+                        if capacities[event_id] is not None and seats[event_id] >= capacities[event_id]:
+                            continue
+                        seats[event_id] += 1
+                        if rng.random() < attendance:
+                            checked_in.append((event_id, student_id))
+                    registrations.append((event_id, student_id, 'cancelled' if cancelled else 'registered'))
+            connection.executemany(
+                "INSERT INTO event_registrations (event_id, student_id, status) VALUES (?, ?, ?)", registrations)
+            connection.executemany(
+                "INSERT INTO attendance (event_id, student_id, status) VALUES (?, ?, ?)",
+                [(e, s, 'absent' if rng.random() < ABSENT_RATE else 'present') for e, s in checked_in]
+            )
+            connection.executemany(
+                "INSERT INTO feedback (event_id, student_id, rating, comments) VALUES (?, ?, ?, ?)",
+                [(e, s, rng.randint(1, 5), 'Generated feedback') for e, s in checked_in if rng.random() < feedback]
+            )
+            connection.execute("COMMIT")
+            if verbose:
+                print(f"College {college_id}: {len(registrations)} registrations, {len(checked_in)} check-ins "
+                      f"in {time.perf_counter() - start:.2f}s")
+
+        connection.execute("BEGIN")
+        rebuild_event_seats(connection)
+        connection.execute("COMMIT")
+        return {table: connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('colleges', 'students', 'events', 'event_registrations', 'attendance', 'feedback')}
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output', help='database file to create')
+    parser.add_argument('--colleges', type=int, default=50)
+    parser.add_argument('--students', type=int, default=500, help='students per college')
+    parser.add_argument('--events', type=int, default=20, help='events per college')
+    parser.add_argument('--density', type=float, default=0.2, help="share of a college's events each student registers for")
+    parser.add_argument('--attendance', type=float, default=0.7, help='share of active registrations checked in')
+    parser.add_argument('--feedback', type=float, default=0.5, help='share of check-ins with feedback')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = build_database(args.output, args.colleges, args.students, args.events, args.density,
+                            args.attendance, args.feedback, args.seed, verbose=True)
+    print(f"Created {args.output} in {time.perf_counter() - start:.1f}s: "
+          + ', '.join(f"{count} {table}" for table, count in counts.items()))
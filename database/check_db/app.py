@@ -2,9 +2,18 @@ from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 import sqlite3
 import os
+import sys
 from datetime import datetime, date, timedelta
 import json
 
+# Shares the backend's query registry, migrations and seat allocation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'backend'))
+
+from migrations import apply_migrations  # noqa: E402
+from queries import events_query, statement, students_query  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+from seats import ALREADY_REGISTERED, ALREADY_WAITLISTED, EVENT_NOT_FOUND, WAITLISTED, request_seat  # noqa: E402
+
 # Custom JSON encoder to handle datetime and timedelta objects
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -43,7 +52,7 @@ def init_database():
         cursor = connection.cursor()
         
         # Read and execute the SQL schema
-        with open('database_schema_sqlite.sql', 'r') as f:
+        with open(SCHEMA_PATH, 'r') as f:
             sql_script = f.read()
         
         # Split the script into individual statements and execute them
@@ -54,6 +63,8 @@ def init_database():
                 cursor.execute(statement)
         
         connection.commit()
+        # The registry's queries read the trigger-maintained counter tables
+        apply_migrations(connection)
         print("Database initialized successfully!")
         return True
         
@@ -96,26 +107,12 @@ def get_events():
     try:
         cursor = connection.cursor()
         
-        query = """
-        SELECT e.*, et.type_name, c.college_name,
-               COUNT(er.registration_id) as registration_count,
-               COUNT(a.attendance_id) as attendance_count
-        FROM events e
-        JOIN event_types et ON e.event_type_id = et.type_id
-        JOIN colleges c ON e.college_id = c.college_id
-        LEFT JOIN event_registrations er ON e.event_id = er.event_id AND er.status = 'registered'
-        LEFT JOIN attendance a ON e.event_id = a.event_id AND a.status = 'present'
-        WHERE e.college_id = ?
-        """
         params = [college_id]
-        
         if event_type:
-            query += " AND et.type_name = ?"
             params.append(event_type)
+        params.append(-1)  # no LIMIT
         
-        query += " GROUP BY e.event_id ORDER BY e.event_date DESC"
-        
-        cursor.execute(query, params)
+        cursor.execute(statement(events_query(bool(event_type))), params)
         events = cursor.fetchall()
         
         # Convert Row objects to dictionaries
@@ -143,12 +140,6 @@ def create_event():
     try:
         cursor = connection.cursor()
         
-        query = """
-        INSERT INTO events (college_id, event_name, event_description, event_type_id, 
-                           event_date, event_time, location, max_capacity, created_by)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
         values = (
             data['college_id'],
             data['event_name'],
@@ -161,7 +152,7 @@ def create_event():
             data['created_by']
         )
         
-        cursor.execute(query, values)
+        cursor.execute(statement('create_event'), values)
         connection.commit()
         
         return jsonify({'message': 'Event created successfully', 'event_id': cursor.lastrowid})
@@ -183,8 +174,7 @@ def get_students():
     
     try:
         cursor = connection.cursor()
-        query = "SELECT * FROM students WHERE college_id = ? ORDER BY student_name"
-        cursor.execute(query, [college_id])
+        cursor.execute(statement(students_query()), [college_id, -1])
         students = cursor.fetchall()
         
         # Convert Row objects to dictionaries
@@ -210,24 +200,22 @@ def register_student():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
-        # Check if already registered
-        check_query = "SELECT registration_id FROM event_registrations WHERE event_id = ? AND student_id = ?"
-        cursor.execute(check_query, (data['event_id'], data['student_id']))
+        # BEGIN IMMEDIATE serializes seat allocation like the backend does
+        connection.execute("BEGIN IMMEDIATE")
+        outcome, detail = request_seat(connection, data['event_id'], data['student_id'])
+        connection.commit()
         
-        if cursor.fetchone():
+        if outcome == EVENT_NOT_FOUND:
+            return jsonify({'error': 'Event not found'}), 404
+        if outcome == ALREADY_REGISTERED:
             return jsonify({'error': 'Student already registered for this event'}), 400
+        if outcome == ALREADY_WAITLISTED:
+            return jsonify({'error': 'Student is already on the waitlist for this event',
+                            'waitlist_position': detail}), 400
+        if outcome == WAITLISTED:
+            return jsonify({'message': 'Event is full; added to the waitlist', 'waitlist_position': detail}), 202
         
-        # Register student
-        insert_query = """
-        INSERT INTO event_registrations (event_id, student_id)
-        VALUES (?, ?)
-        """
-        cursor.execute(insert_query, (data['event_id'], data['student_id']))
-        connection.commit()
-        
-        return jsonify({'message': 'Registration successful'})
+        return jsonify({'message': 'Registration successful', 'registration_id': detail})
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
@@ -247,21 +235,14 @@ def mark_attendance():
     try:
         cursor = connection.cursor()
         
-        # Check if already marked
-        check_query = "SELECT attendance_id FROM attendance WHERE event_id = ? AND student_id = ?"
-        cursor.execute(check_query, (data['event_id'], data['student_id']))
+        # No row comes back if attendance was already marked
+        inserted = cursor.execute(statement('insert_attendance'),
+                                  (data['event_id'], data['student_id'], data['status'])).fetchall()
+        connection.commit()
         
-        if cursor.fetchone():
+        if not inserted:
             return jsonify({'error': 'Attendance already marked for this event'}), 400
         
-        # Mark attendance
-        insert_query = """
-        INSERT INTO attendance (event_id, student_id, status)
-        VALUES (?, ?, ?)
-        """
-        cursor.execute(insert_query, (data['event_id'], data['student_id'], data['status']))
-        connection.commit()
-        
         return jsonify({'message': 'Attendance marked succescsfully'})
     
     except sqlite3.Error as e:
@@ -282,21 +263,14 @@ def submit_feedback():
     try:
         cursor = connection.cursor()
         
-        # Check if feedback already submitted
-        check_query = "SELECT feedback_id FROM feedback WHERE event_id = ? AND student_id = ?"
-        cursor.execute(check_query, (data['event_id'], data['student_id']))
+        # No row comes back if feedback was already submitted
+        inserted = cursor.execute(statement('insert_feedback'),
+                                  (data['event_id'], data['student_id'], data['rating'], data.get('comments', ''))).fetchall()
+        connection.commit()
         
-        if cursor.fetchone():
+        if not inserted:
             return jsonify({'error': 'Feedback already submitted for this event'}), 400
         
-        # Submit feedback
-        insert_query = """
-        INSERT INTO feedback (event_id, student_id, rating, comments)
-        VALUES (?, ?, ?, ?)
-        """
-        cursor.execute(insert_query, (data['event_id'], data['student_id'], data['rating'], data.get('comments', '')))
-        connection.commit()
-        
         return jsonify({'message': 'Feedback submitted successfully'})
     
     except sqlite3.Error as e:
@@ -318,22 +292,7 @@ def event_popularity_report():
     
     try:
         cursor = connection.cursor()
-        query = """
-        SELECT e.event_name, et.type_name, e.event_date,
-               COUNT(er.registration_id) as total_registrations,
-               COUNT(a.attendance_id) as attendance_count,
-               ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_percentage,
-               ROUND(AVG(f.rating), 2) as average_rating
-        FROM events e
-        JOIN event_types et ON e.event_type_id = et.type_id
-        LEFT JOIN event_registrations er ON e.event_id = er.event_id AND er.status = 'registered'
-        LEFT JOIN attendance a ON e.event_id = a.event_id AND a.status = 'present'
-        LEFT JOIN feedback f ON e.event_id = f.event_id
-        WHERE e.college_id = ?
-        GROUP BY e.event_id
-        ORDER BY total_registrations DESC
-        """
-        cursor.execute(query, [college_id])
+        cursor.execute(statement('event_popularity_report'), [college_id])
         report = cursor.fetchall()
         
         # Convert Row objects to dictionaries
@@ -364,33 +323,10 @@ def student_participation_report():
         
         if student_id:
             # Specific student report
-            query = """
-            SELECT s.student_name, s.email,
-                   COUNT(er.registration_id) as events_registered,
-                   COUNT(a.attendance_id) as events_attended,
-                   ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_rate
-            FROM students s
-            LEFT JOIN event_registrations er ON s.student_id = er.student_id AND er.status = 'registered'
-            LEFT JOIN attendance a ON s.student_id = a.student_id AND a.status = 'present'
-            WHERE s.student_id = ? AND s.college_id = ?
-            GROUP BY s.student_id
-            """
-            cursor.execute(query, (student_id, college_id))
+            cursor.execute(statement('student_participation_student'), (student_id, college_id))
         else:
             # All students report
-            query = """
-            SELECT s.student_name, s.email,
-                   COUNT(er.registration_id) as events_registered,
-                   COUNT(a.attendance_id) as events_attended,
-                   ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_rate
-            FROM students s
-            LEFT JOIN event_registrations er ON s.student_id = er.student_id AND er.status = 'registered'
-            LEFT JOIN attendance a ON s.student_id = a.student_id AND a.status = 'present'
-            WHERE s.college_id = ?
-            GROUP BY s.student_id
-            ORDER BY events_attended DESC
-            """
-            cursor.execute(query, [college_id])
+            cursor.execute(statement('student_participation_report'), [college_id])
         
         report = cursor.fetchall()
         
@@ -418,21 +354,7 @@ def top_active_students_report():
     
     try:
         cursor = connection.cursor()
-        query = """
-        SELECT s.student_name, s.email,
-               COUNT(er.registration_id) as events_registered,
-               COUNT(a.attendance_id) as events_attended,
-               ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_rate
-        FROM students s
-        LEFT JOIN event_registrations er ON s.student_id = er.student_id AND er.status = 'registered'
-        LEFT JOIN attendance a ON s.student_id = a.student_id AND a.status = 'present'
-        WHERE s.college_id = ?
-        GROUP BY s.student_id
-        HAVING events_registered > 0
-        ORDER BY events_attended DESC, events_registered DESC
-        LIMIT 3
-        """
-        cursor.execute(query, [college_id])
+        cursor.execute(statement('top_active_students_report'), [college_id])
         report = cursor.fetchall()
         
         # Convert Row objects to dictionaries
@@ -457,8 +379,7 @@ def get_event_types():
     
     try:
         cursor = connection.cursor()
-        query = "SELECT * FROM event_types ORDER BY type_name"
-        cursor.execute(query)
+        cursor.execute(statement('event_types'))
         event_types = cursor.fetchall()
         
         # Convert Row objects to dictionaries
@@ -479,5 +400,11 @@ if __name__ == '__main__':
     if not os.path.exists(DB_PATH):
         print("Initializing database...")
         init_database()
+    else:
+        connection = get_db_connection()
+        try:
+            apply_migrations(connection)
+        finally:
+            connection.close()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -106,6 +106,16 @@ CREATE TABLE feedback (
     UNIQUE KEY unique_feedback (event_id, student_id)
 );
 
+-- Secondary indexes for the hot filter and join columns
+-- (MySQL has no partial indexes, so status is the trailing key column instead)
+CREATE INDEX idx_events_college_date ON events (college_id, event_date);
+CREATE INDEX idx_students_college_name ON students (college_id, student_name);
+CREATE INDEX idx_registrations_event_status ON event_registrations (event_id, status, student_id);
+CREATE INDEX idx_registrations_student_status ON event_registrations (student_id, status, event_id);
+CREATE INDEX idx_attendance_event_status ON attendance (event_id, status, student_id);
+CREATE INDEX idx_attendance_student_status ON attendance (student_id, status, event_id);
+CREATE INDEX idx_feedback_event_rating ON feedback (event_id, rating);
+
 -- Insert sample event types
 INSERT INTO event_types (type_name) VALUES 
 ('Workshop'),
@@ -81,6 +81,29 @@ CREATE TABLE IF NOT EXISTS feedback (
     UNIQUE (event_id, student_id)
 );
 
+-- Secondary indexes for the hot filter and join columns.
+-- Keep in sync with the migrations in src/backend/migrations.py.
+
+-- Events listed per college, newest first
+CREATE INDEX IF NOT EXISTS idx_events_college_date ON events (college_id, event_date);
+
+-- Students listed per college by name (also covers the report filter on college_id)
+CREATE INDEX IF NOT EXISTS idx_students_college_name ON students (college_id, student_name);
+
+-- Active registrations per event and per student (partial: cancelled rows are never counted)
+CREATE INDEX IF NOT EXISTS idx_registrations_event_registered ON event_registrations (event_id, student_id) WHERE status = 'registered';
+CREATE INDEX IF NOT EXISTS idx_registrations_student_registered ON event_registrations (student_id, event_id) WHERE status = 'registered';
+
+-- Present attendance per event and per student (partial: absences are never counted)
+CREATE INDEX IF NOT EXISTS idx_attendance_event_present ON attendance (event_id, student_id) WHERE status = 'present';
+CREATE INDEX IF NOT EXISTS idx_attendance_student_present ON attendance (student_id, event_id) WHERE status = 'present';
+
+-- Covering index for per-event rating averages
+CREATE INDEX IF NOT EXISTS idx_feedback_event_rating ON feedback (event_id, rating);
+
+-- Derived counter tables (event_stats, student_stats, event_seats), the event_waitlist, the triggers that maintain them
+-- and the report rollup tables (rollup_*) are created by the migrations in src/backend/migrations.py.
+
 -- Insert sample event types
 INSERT OR IGNORE INTO event_types (type_name) VALUES 
 ('Workshop'),
@@ -0,0 +1,281 @@
+import sqlite3
+import sys
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # the columnar path is optional; the SQL reports do not need it
+    np = None
+
+# Fact tables held as (rowid, event_id, student_id, value) columns, with the
+# expression that computes value. It covers the only columns an UPDATE
+# changes, so a checksum over it tells whether rows below the watermark were
+# modified since the last load.
+FACT_TABLES = {
+    'event_registrations': "status = 'registered'",
+    'attendance': "status = 'present'",
+    'feedback': 'rating',
+}
+
+FETCH_SIZE = 50000
+
+# Report columns, in the SQL reports' order
+EVENT_POPULARITY_COLUMNS = ('event_name', 'type_name', 'event_date', 'total_registrations', 'attendance_count',
+                            'attendance_percentage', 'average_rating')
+STUDENT_COLUMNS = ('student_name', 'email', 'events_registered', 'events_attended', 'attendance_rate')
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("The columnar analytics path needs NumPy: pip install numpy")
+
+
+def _sql_ratio(numerators, denominators, scale):
+    """ROUND(numerator * scale / denominator, 2) for whole arrays, with SQLite's results
+
+    SQLite prints the value to 15 significant digits before rounding half up,
+    so 3 / 40 = 0.07499999999999999 becomes 0.08, where Python's round()
+    gives 0.07. The same is done here in integer arithmetic. x / 0 is NULL in
+    SQL and None here.
+    """
+    empty = denominators == 0
+    values = numerators * float(scale) / np.where(empty, 1, denominators)
+    digits = np.floor(np.log10(np.maximum(values, 1))).astype(np.int64) + 1
+    units = 10 ** (15 - digits)
+    significant = np.rint(values.astype(np.longdouble) * units).astype(np.int64)
+    hundredths = (significant + units // 200) // (units // 100)
+    rounded = (hundredths / 100.0).astype(object)
+    rounded[empty] = None
+    return rounded
+
+
+def _fetch_columns(cursor, columns, dtype):
+    """Read a cursor in FETCH_SIZE chunks into a 2-D array with one column per selected value"""
+    chunks = []
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        chunks.append(np.array(rows, dtype=dtype))
+    if not chunks:
+        return np.empty((0, columns), dtype=dtype)
+    return np.concatenate(chunks)
+
+
+def _columns(rows, names, integer_columns):
+    """Turn fetched rows into one array per column"""
+    values = list(zip(*rows)) if rows else [()] * len(names)
+    return {name: np.array(column, dtype=np.int64 if name in integer_columns else object)
+            for name, column in zip(names, values)}
+
+
+def _count_by_key(keys, values, weights=None):
+    """Sum weights (or count rows) per entry of the sorted keys array; values not in keys are ignored"""
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    known = keys[positions] == values
+    counts = np.bincount(positions[known], weights=None if weights is None else weights[known],
+                         minlength=len(keys))
+    return counts.astype(np.int64)
+
+
+class ColumnarCache:
+    """In-memory column arrays of the report tables, refreshed from rowid watermarks
+
+    event_registrations, attendance and feedback are held as NumPy arrays
+    (rowid, event_id, student_id, value). A refresh appends only the rows
+    above each table's rowid watermark; when a checksum shows that older rows
+    were updated or deleted, that table is reloaded in full. events and
+    students are small and reloaded every time. Per-event and per-student
+    totals are computed with vectorized group-bys once per refresh, so a
+    report is a sort plus row formatting. They follow the SQL report
+    semantics: registrations count status 'registered', attendance counts
+    status 'present', and ratios are rounded like SQLite's ROUND.
+
+    connect() must return a context manager yielding a connection.
+    """
+
+    def __init__(self, connect):
+        require_numpy()
+        self.connect = connect
+        self._lock = threading.Lock()
+        self._facts = {table: np.empty((0, 4), dtype=np.int64) for table in FACT_TABLES}
+        self._events = None
+        self._students = None
+        self.refreshed_at = None
+
+        # Metrics
+        self._refreshes = 0
+        self._full_reloads = 0
+        self._appended_rows = 0
+        self._last_refresh_seconds = 0.0
+
+    def _checksum(self, facts):
+        return (len(facts), int(facts[:, 3].sum()), int((facts[:, 3] * facts[:, 0]).sum()))
+
+    def _load_table(self, cursor, table, facts):
+        expression = FACT_TABLES[table]
+        watermark = int(facts[-1, 0]) if len(facts) else 0
+        if watermark:
+            cursor.execute(
+                f"SELECT COUNT(*), COALESCE(SUM({expression}), 0), COALESCE(SUM(({expression}) * rowid), 0) "
+                f"FROM {table} WHERE rowid <= ?", (watermark,))
+            if tuple(cursor.fetchone()) != self._checksum(facts):
+                self._full_reloads += 1
+                facts, watermark = facts[:0], 0
+
+        cursor.execute(
+            f"SELECT rowid, event_id, student_id, {expression} FROM {table} WHERE rowid > ? ORDER BY rowid",
+            (watermark,))
+        appended = _fetch_columns(cursor, 4, np.int64)
+        self._appended_rows += len(appended)
+        return np.concatenate([facts, appended]) if len(appended) else facts
+
+    def refresh(self):
+        """Bring the arrays up to date with the database in one read transaction"""
+        start = time.perf_counter()
+        with self._lock, self.connect() as connection:
+            cursor = connection.cursor()
+            cursor.row_factory = None
+            cursor.execute("BEGIN")
+            try:
+                facts = {table: self._load_table(cursor, table, self._facts[table]) for table in FACT_TABLES}
+                cursor.execute(
+                    """
+                    SELECT e.event_id, e.college_id, e.event_name, et.type_name, e.event_date
+                    FROM events e
+                    JOIN event_types et ON e.event_type_id = et.type_id
+                    ORDER BY e.event_id
+                    """
+                )
+                events = cursor.fetchall()
+                cursor.execute("SELECT student_id, college_id, student_name, email FROM students ORDER BY student_id")
+                students = cursor.fetchall()
+            finally:
+                connection.rollback()
+
+            self._facts = facts
+            self._events = self._event_columns(facts, events)
+            self._students = self._student_columns(facts, students)
+            self.refreshed_at = time.time()
+            self._refreshes += 1
+            self._last_refresh_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _event_columns(facts, rows):
+        """Per-event report columns: one vectorized group-by per fact table"""
+        columns = _columns(rows, ('event_id', 'college_id', 'event_name', 'type_name', 'event_date'),
+                           ('event_id', 'college_id'))
+        ids = columns['event_id']
+        registrations, attendance, feedback = facts['event_registrations'], facts['attendance'], facts['feedback']
+        registered = _count_by_key(ids, registrations[registrations[:, 3] == 1, 1])
+        present = _count_by_key(ids, attendance[attendance[:, 3] == 1, 1])
+        rating_sum = _count_by_key(ids, feedback[:, 1], weights=feedback[:, 3])
+        rating_count = _count_by_key(ids, feedback[:, 1])
+        columns.update(
+            total_registrations=registered,
+            attendance_count=present,
+            attendance_percentage=_sql_ratio(present, registered, 100),
+            average_rating=_sql_ratio(rating_sum, rating_count, 1),
+        )
+        return columns
+
+    @staticmethod
+    def _student_columns(facts, rows):
+        """Per-student report columns"""
+        columns = _columns(rows, ('student_id', 'college_id', 'student_name', 'email'), ('student_id', 'college_id'))
+        ids = columns['student_id']
+        registrations, attendance = facts['event_registrations'], facts['attendance']
+        registered = _count_by_key(ids, registrations[registrations[:, 3] == 1, 2])
+        attended = _count_by_key(ids, attendance[attendance[:, 3] == 1, 2])
+        columns.update(
+            events_registered=registered,
+            events_attended=attended,
+            attendance_rate=_sql_ratio(attended, registered, 100),
+        )
+        return columns
+
+    def _snapshot(self):
+        with self._lock:
+            if self._events is None:
+                raise RuntimeError("ColumnarCache.refresh() has not run yet")
+            return self._events, self._students
+
+    @staticmethod
+    def _rows(columns, order, names, include_college):
+        """Report rows for the positions in order, built column-wise"""
+        if include_college:
+            names = names + ('college_id',)
+        values = [columns[name][order].tolist() for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def event_popularity(self, college_id=None):
+        """Event popularity report rows, by registrations; all colleges (by college_id) when college_id is None"""
+        events, _ = self._snapshot()
+        ids, colleges, registered = events['event_id'], events['college_id'], events['total_registrations']
+        selected = np.flatnonzero(colleges == int(college_id)) if college_id is not None else np.arange(len(ids))
+        order = selected[np.lexsort((ids[selected], -registered[selected], colleges[selected]))]
+        return self._rows(events, order, EVENT_POPULARITY_COLUMNS, college_id is None)
+
+    def student_participation(self, college_id=None, student_id=None):
+        """Student participation report rows, by events attended; all colleges when college_id is None"""
+        _, students = self._snapshot()
+        ids, colleges = students['student_id'], students['college_id']
+        registered, attended = students['events_registered'], students['events_attended']
+        mask = np.ones(len(ids), dtype=bool)
+        if college_id is not None:
+            mask &= colleges == int(college_id)
+        if student_id is not None:
+            mask &= ids == int(student_id)
+        selected = np.flatnonzero(mask)
+        # Ties in the same order as the SQL report's walk of idx_student_stats_leaderboard
+        order = selected[np.lexsort((ids[selected], -registered[selected], -attended[selected], colleges[selected]))]
+        return self._rows(students, order, STUDENT_COLUMNS, college_id is None)
+
+    def top_students(self, college_id=None, limit=3):
+        """The limit most active students of a college, or of every college when college_id is None"""
+        _, students = self._snapshot()
+        ids, colleges = students['student_id'], students['college_id']
+        registered, attended = students['events_registered'], students['events_attended']
+        mask = registered > 0
+        if college_id is not None:
+            mask &= colleges == int(college_id)
+        selected = np.flatnonzero(mask)
+        order = selected[np.lexsort((ids[selected], -registered[selected], -attended[selected], colleges[selected]))]
+        # Rank within each college and keep the first `limit`
+        ordered_colleges = colleges[order]
+        starts = np.flatnonzero(np.r_[True, ordered_colleges[1:] != ordered_colleges[:-1]]) if len(order) else order
+        ranks = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        return self._rows(students, order[ranks < limit], STUDENT_COLUMNS, college_id is None)
+
+    def stats(self):
+        """Return row counts, refresh counters and the age of the arrays"""
+        with self._lock:
+            return {
+                'rows': {table: len(facts) for table, facts in self._facts.items()},
+                'events': len(self._events['event_id']) if self._events else 0,
+                'students': len(self._students['student_id']) if self._students else 0,
+                'memory_bytes': sum(facts.nbytes for facts in self._facts.values()),
+                'refreshes': self._refreshes,
+                'full_reloads': self._full_reloads,
+                'appended_rows': self._appended_rows,
+                'last_refresh_ms': round(self._last_refresh_seconds * 1000, 3),
+                'age_seconds': round(time.time() - self.refreshed_at, 3) if self.refreshed_at else None,
+            }
+
+
+if __name__ == '__main__':
+    import contextlib
+    import json
+
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'src/backend/campus_events.db'
+    try:
+        cache = ColumnarCache(lambda: contextlib.closing(sqlite3.connect(db_path)))
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    cache.refresh()
+    print(json.dumps(cache.event_popularity(), indent=2, default=str))
+    print(json.dumps(cache.stats(), indent=2))
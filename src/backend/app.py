@@ -1,72 +1,530 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template, g
 from flask_cors import CORS
 import sqlite3
 import os
-from datetime import datetime, date, timedelta
-import json
-
-# Custom JSON encoder to handle datetime and timedelta objects
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, date):
-            return obj.isoformat()
-        elif isinstance(obj, timedelta):
-            return str(obj)
-        return super().default(obj)
+from datetime import datetime, timezone
+import functools
+import io
+import threading
+import time
+
+from analytics import ColumnarCache
+from checkin import CHECKED_IN, create_batcher, parse_scans, wait_for_commits
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from data_versions import DataVersions
+from db_pool import ConnectionPool
+from db_tuning import DatabaseBusyError, apply_pragmas, busy_stats, get_profile, is_busy_error, retry_on_busy
+from json_provider import FastJSONProvider, RowSet, tuple_cursor
+from instrumentation import Metrics, prometheus_lines
+from exports import EXPORT_EXTENSIONS, EXPORT_MIMETYPES, ExportError, open_export, require_pyarrow, stream_export
+from migrations import apply_migrations
+from queries import (EVENT_COLUMNS, STATEMENT_CACHE_SIZE, STUDENT_COLUMNS, events_query, statement,
+                     students_query)
+from pagination import build_page, decode_cursor, parse_fields, parse_limit
+from registrations import CREATED, DUPLICATE, REJECTED, bulk_register, parse_registration_items
+from response_cache import ResponseCache
+from rollups import RollupEngine
+from roster_import import IMPORT_BATCH_SIZE, RosterImportError, detect_format, import_records, read_records
+from seats import ALREADY_REGISTERED, ALREADY_WAITLISTED, EVENT_NOT_FOUND, WAITLISTED, cancel_seat, request_seat
+from shards import ShardRouter, UnknownShardError, shard_path
+from snapshots import SnapshotManager
+from streaming import NDJSON_MIMETYPE, get_stream_format, stream_json_array, stream_ndjson
 
 # Configure Flask app with correct template and static folder paths
 app = Flask(__name__, 
             template_folder='src/frontend/templates',
             static_folder='src/frontend/static')
-app.json_encoder = CustomJSONEncoder
 CORS(app)
 
+class TimedJSONProvider(FastJSONProvider):
+    """The app's JSON provider, adding its encoding time to the request's Server-Timing"""
+    
+    def encode(self, obj, indent=None):
+        start = time.perf_counter()
+        try:
+            return super().encode(obj, indent)
+        finally:
+            metrics.serialized(time.perf_counter() - start)
+
 # Database configuration - point to backend folder
-DB_PATH = 'src/backend/campus_events.db'
+DB_PATH = os.environ.get('DB_PATH', 'src/backend/campus_events.db')
+
+# Connection pool configuration
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
+# PRAGMA tuning profile ('durable' or 'throughput') applied to every new connection
+DB_TUNING_PROFILE = os.environ.get('DB_TUNING_PROFILE', 'durable')
+DB_BUSY_TIMEOUT_MS = os.environ.get('DB_BUSY_TIMEOUT_MS')
+DB_BUSY_RETRIES = int(os.environ.get('DB_BUSY_RETRIES', 5))
+
+# Prepared statements kept per pooled connection: the query registry plus the
+# statements of the other modules
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', STATEMENT_CACHE_SIZE))
+
+# Per-statement SQL timing, Server-Timing headers and /metrics (0 = plain connections);
+# statements slower than SLOW_QUERY_MS are logged with their EXPLAIN QUERY PLAN
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '0') == '1'
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+
+metrics = Metrics(slow_query_seconds=SLOW_QUERY_MS / 1000)
+db_connection_factory = metrics.connection_class if METRICS_ENABLED else sqlite3.Connection
+# JSON encoding: orjson when installed (JSON_BACKEND=json forces the stdlib encoder)
+app.json = TimedJSONProvider(app) if METRICS_ENABLED else FastJSONProvider(app)
+
+db_settings = get_profile(DB_TUNING_PROFILE,
+                          busy_timeout=int(DB_BUSY_TIMEOUT_MS) if DB_BUSY_TIMEOUT_MS else None)
+
+db_pool = ConnectionPool(DB_PATH, pool_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                         on_connect=lambda connection: apply_pragmas(connection, db_settings),
+                         factory=db_connection_factory, cached_statements=DB_STATEMENT_CACHE_SIZE)
+
+# One database file per college, written by `python src/backend/shards.py split` (unset = DB_PATH only)
+DB_SHARD_DIR = os.environ.get('DB_SHARD_DIR', '')
+
+shard_router = ShardRouter(DB_SHARD_DIR, pool_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+                           on_connect=lambda connection: apply_pragmas(connection, db_settings),
+                           factory=db_connection_factory, cached_statements=DB_STATEMENT_CACHE_SIZE
+                           ) if DB_SHARD_DIR else None
+
+# Page size used when a client sends ?cursor= without ?limit=
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+
+# Largest number of pairs accepted by POST /api/register/bulk
+BULK_REGISTRATION_MAX_BATCH = int(os.environ.get('BULK_REGISTRATION_MAX_BATCH', 1000))
+
+# Door-scanner check-ins: scans are group-committed every CHECKIN_MAX_DELAY_MS
+# or CHECKIN_MAX_BATCH scans, whichever comes first
+CHECKIN_MAX_BATCH = int(os.environ.get('CHECKIN_MAX_BATCH', 500))
+CHECKIN_MAX_DELAY_MS = float(os.environ.get('CHECKIN_MAX_DELAY_MS', 5))
+CHECKIN_ACK_TIMEOUT = float(os.environ.get('CHECKIN_ACK_TIMEOUT', 10))
+CHECKIN_MAX_SCANS = int(os.environ.get('CHECKIN_MAX_SCANS', 1000))
+
+def open_checkin_connection(path=None):
+    """Dedicated connection for a check-in writer thread"""
+    connection = sqlite3.connect(path or DB_PATH, check_same_thread=False, factory=db_connection_factory)
+    apply_pragmas(connection, db_settings)
+    return connection
+
+# One check-in queue per database file: key None is DB_PATH, otherwise a college's shard
+checkin_batchers = {}
+checkin_batchers_lock = threading.Lock()
+
+def get_checkin_batcher(college_id=None):
+    """Check-in queue for the database (or shard) that holds college_id"""
+    key = int(college_id) if shard_router is not None else None
+    with checkin_batchers_lock:
+        batcher = checkin_batchers.get(key)
+        if batcher is None:
+            path = None if key is None else shard_path(DB_SHARD_DIR, key)
+            batcher = checkin_batchers[key] = create_batcher(
+                functools.partial(open_checkin_connection, path), max_batch_size=CHECKIN_MAX_BATCH,
+                max_delay=CHECKIN_MAX_DELAY_MS / 1000, busy_retries=DB_BUSY_RETRIES)
+    return batcher
+
+# Read-through cache for report responses (REPORT_CACHE_TTL=0 disables it)
+REPORT_CACHE_TTL = float(os.environ.get('REPORT_CACHE_TTL', 60))
+REPORT_CACHE_MAX_ENTRIES = int(os.environ.get('REPORT_CACHE_MAX_ENTRIES', 1024))
+REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+response_cache = ResponseCache(ttl=REPORT_CACHE_TTL, max_entries=REPORT_CACHE_MAX_ENTRIES,
+                               max_bytes=REPORT_CACHE_MAX_BYTES)
+
+# Per-college data versions behind the ETag / Last-Modified headers and the
+# response cache keys; stored in the database, so shared by all worker processes
+data_versions = DataVersions()
+
+# Read-only snapshot of the database for the report routes (unset = reports read the primary)
+REPORT_SNAPSHOT_PATH = os.environ.get('REPORT_SNAPSHOT_PATH', '')
+REPORT_SNAPSHOT_MAX_AGE = float(os.environ.get('REPORT_SNAPSHOT_MAX_AGE', 30))
+
+# Journal, sync and busy settings do not apply to an immutable read-only file
+READ_ONLY_PRAGMAS = ('cache_size', 'mmap_size', 'temp_store')
+
+report_snapshots = SnapshotManager(
+    DB_PATH, REPORT_SNAPSHOT_PATH, max_age=REPORT_SNAPSHOT_MAX_AGE,
+    pool_size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT,
+    on_connect=lambda connection: apply_pragmas(connection, {name: db_settings[name] for name in READ_ONLY_PRAGMAS}),
+    factory=db_connection_factory, cached_statements=DB_STATEMENT_CACHE_SIZE
+) if REPORT_SNAPSHOT_PATH else None
+
+if report_snapshots is not None and shard_router is not None:
+    raise RuntimeError("REPORT_SNAPSHOT_PATH snapshots a single database and cannot be combined with DB_SHARD_DIR")
+
+# Background rollups behind the report routes: colleges with writes are
+# recomputed every ROLLUP_INTERVAL seconds, all colleges every
+# ROLLUP_FULL_REFRESH_INTERVAL seconds (ROLLUP_INTERVAL=0 = reports query live counters)
+ROLLUP_INTERVAL = float(os.environ.get('ROLLUP_INTERVAL', 5))
+ROLLUP_FULL_REFRESH_INTERVAL = float(os.environ.get('ROLLUP_FULL_REFRESH_INTERVAL', 300))
+ROLLUP_TOP_STUDENTS = int(os.environ.get('ROLLUP_TOP_STUDENTS', 10))
+
+def rollup_connection(college_id):
+    pool = db_pool if shard_router is None else shard_router.pool(college_id)
+    return pool.connection()
+
+def rollup_colleges():
+    if shard_router is not None:
+        return shard_router.colleges()
+    with db_pool.connection() as connection:
+        return [row[0] for row in connection.execute(statement('college_ids'))]
+
+def rollup_refreshed(college_id, computed_at):
+    """New rollups are new report content: drop cached responses (the rollup_state trigger changes the ETags)"""
+    response_cache.invalidate_college(normalize_college_id(college_id))
+
+rollup_engine = RollupEngine(
+    rollup_connection, rollup_colleges, interval=ROLLUP_INTERVAL,
+    full_refresh_interval=ROLLUP_FULL_REFRESH_INTERVAL, top_students=ROLLUP_TOP_STUDENTS,
+    on_refresh=rollup_refreshed, busy_retries=DB_BUSY_RETRIES
+) if ROLLUP_INTERVAL > 0 else None
+
+def route_college_id():
+    """College whose shard serves the current request
+
+    Read from the college_id query argument, or from the JSON body's
+    college_id, event_id or student_id; defaults to college 1 like the routes.
+    Raises UnknownShardError with the error message for the client when the
+    event or student belongs to no shard.
+    """
+    if 'college_id' in request.args:
+        return request.args['college_id']
+    data = request.get_json(silent=True) if request.is_json else None
+    if isinstance(data, dict):
+        if data.get('college_id') is not None:
+            return data['college_id']
+        for key, lookup, not_found in (('event_id', shard_router.college_for_event, 'Event not found'),
+                                       ('student_id', shard_router.college_for_student, 'Student not found')):
+            if data.get(key) is not None:
+                college_id = lookup(data[key])
+                if college_id is None or college_id not in shard_router.colleges():
+                    raise UnknownShardError(not_found)
+                return college_id
+    return 1
+
+def request_pool():
+    """Connection pool holding the current request's data"""
+    if shard_router is None:
+        return db_pool
+    college_id = route_college_id()
+    try:
+        return shard_router.pool(college_id)
+    except UnknownShardError:
+        raise UnknownShardError('College not found') from None
 
 def get_db_connection():
-    """Create and return database connection"""
+    """Return the pooled database connection for the current request
+
+    In shard mode, requests for an event, student or college that no shard
+    holds raise UnknownShardError, which is answered with 404.
+    """
+    if 'db' not in g:
+        pool = request_pool()
+        try:
+            g.db = pool.acquire()
+            g.db_owner = pool
+        except sqlite3.Error as e:
+            print(f"Error connecting to SQLite: {e}")
+            return None
+    return g.db
+
+def get_report_connection():
+    """Return a connection for report queries: the read-only snapshot when one is configured"""
+    if 'report_snapshot' not in g:
+        return get_db_connection()
+    if 'report_db' not in g:
+        try:
+            g.report_db = g.report_snapshot.pool.acquire()
+        except sqlite3.Error as e:
+            print(f"Error connecting to report snapshot: {e}")
+            return None
+    return g.report_db
+
+def uses_report_snapshot(view):
+    """Serve a report route from the read-only snapshot when REPORT_SNAPSHOT_PATH is set
+
+    Must wrap conditional_get / cached_response so their ETags and cache keys
+    include the snapshot generation.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if report_snapshots is not None:
+            try:
+                g.report_snapshot = report_snapshots.current()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Report snapshot unavailable, reading the primary: {e}")
+        return view(*args, **kwargs)
+    return wrapper
+
+def snapshot_generation():
+    """Generation of the snapshot serving this request, or None when reading the primary"""
+    snapshot = g.get('report_snapshot')
+    return snapshot.generation if snapshot is not None else None
+
+def uses_rollups(view):
+    """Let a report route read the precomputed rollups while the rollup worker runs"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_rollups = rollup_engine is not None and rollup_engine.running
+        return view(*args, **kwargs)
+    return wrapper
+
+def rollup_computed_at(connection, college_id):
+    """computed_at of the college's rollups if this request should read them, otherwise None"""
+    if not g.get('use_rollups'):
+        return None
+    row = connection.execute(statement('rollup_computed_at'), (college_id,)).fetchone()
+    if row is None:
+        return None
+    g.rollup_computed_at = row[0]
+    return row[0]
+
+@app.before_request
+def start_request_timing():
+    if METRICS_ENABLED:
+        metrics.begin_request()
+
+# Registered first so it runs after the other after_request handlers
+@app.after_request
+def add_server_timing(response):
+    """Count the request and report its SQL / serialization / other time as Server-Timing"""
+    if METRICS_ENABLED:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        timings = metrics.end_request(request.method, endpoint, response.status_code)
+        if timings is not None:
+            response.headers['Server-Timing'] = timings.server_timing()
+    return response
+
+@app.after_request
+def add_rollup_computed_at(response):
+    """Tell clients when the rollups behind a report were computed"""
+    computed_at = g.get('rollup_computed_at')
+    if computed_at is None and g.get('use_rollups'):
+        # Cache hits skip the view; the worker's last refresh is what they were built from
+        computed_at = rollup_engine.computed_at(request.args.get('college_id', 1))
+    if computed_at is not None:
+        response.headers['X-Rollup-Computed-At'] = computed_at
+    return response
+
+@app.after_request
+def add_snapshot_age(response):
+    """Tell clients how stale a snapshot-served report may be"""
+    snapshot = g.get('report_snapshot')
+    if snapshot is not None:
+        response.headers['X-Snapshot-Age'] = f"{snapshot.age:.1f}"
+    return response
+
+@app.teardown_appcontext
+def release_db_connection(exception):
+    """Return the request's connection to the pool"""
+    connection = g.pop('db', None)
+    if connection is not None:
+        g.pop('db_owner', db_pool).release(connection)
+    connection = g.pop('report_db', None)
+    if connection is not None:
+        g.report_snapshot.pool.release(connection)
+    snapshot = g.pop('report_snapshot', None)
+    # A streamed response releases the snapshot once its body is closed
+    if snapshot is not None and not g.pop('report_snapshot_detached', False):
+        snapshot.release()
+
+class DetachedStream:
+    """Response body that reads the request's connection after the request has ended
+
+    The connection is taken away from the teardown hook and returned to its
+    pool once the chunks are drained, or from close(), which the WSGI server
+    calls even when the body is never iterated (HEAD requests, clients that
+    disconnect before the first chunk).
+    """
+
+    def __init__(self, chunks):
+        self._snapshot = None
+        if 'report_db' in g:
+            self._connection, self._snapshot = g.pop('report_db'), g.report_snapshot
+            self._pool = self._snapshot.pool
+            g.report_snapshot_detached = True
+        else:
+            self._connection, self._pool = g.pop('db'), g.pop('db_owner', db_pool)
+        self._chunks = chunks
+
+    def __iter__(self):
+        try:
+            yield from self._chunks
+        finally:
+            self.close()
+
+    def close(self):
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        # Stop the generator before its cursor's connection goes back to the pool
+        close_chunks = getattr(self._chunks, 'close', None)
+        if close_chunks is not None:
+            close_chunks()
+        self._pool.release(connection)
+        if self._snapshot is not None:
+            self._snapshot.release()
+
+def streamed_response(cursor, stream_format):
+    """Stream the cursor's rows as a JSON array or NDJSON without materializing them"""
+    stream = stream_ndjson if stream_format == 'ndjson' else stream_json_array
+    mimetype = NDJSON_MIMETYPE if stream_format == 'ndjson' else 'application/json'
+    return Response(DetachedStream(stream(cursor, app.json.dumps)), mimetype=mimetype)
+
+def normalize_college_id(value):
+    """Canonical cache tag for a college_id argument ('01', 1 and '1' are the same college)"""
+    value = str(value).strip()
+    return str(int(value)) if value.isdigit() else value
+
+def data_version(college_id):
+    """(version, last_modified) of a college as seen by this request's connection, None if unavailable"""
+    connection = get_report_connection()
+    if connection is None:
+        return None
     try:
-        connection = sqlite3.connect(DB_PATH)
-        connection.row_factory = sqlite3.Row  # This enables column access by name
-        return connection
+        return data_versions.get(connection, college_id)
     except sqlite3.Error as e:
-        print(f"Error connecting to SQLite: {e}")
+        print(f"Error reading the data version: {e}")
         return None
 
+def cached_response(*arg_names, per_college=True):
+    """Serve a GET endpoint from response_cache, keyed by path and normalized query args
+
+    Entries are tagged with the request's college_id so that writes to that
+    college invalidate them; per_college=False entries only expire by TTL.
+    The key also carries the college's data version read before the view
+    runs, so a body computed while a write was invalidating the college is
+    never served under the newer version.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                streaming = get_stream_format(request)
+            except ValueError:
+                streaming = True  # let the view report the bad format
+            if not response_cache.enabled or streaming:
+                return view(*args, **kwargs)
+            
+            college_id = normalize_college_id(request.args.get('college_id', 1)) if per_college else None
+            current = data_version(college_id)
+            if current is None:
+                return view(*args, **kwargs)
+            version = current[0]
+            key = (request.path, college_id, snapshot_generation(), version) + tuple(
+                (name, (request.args.get(name) or '').strip()) for name in arg_names
+            )
+            payload = response_cache.get(key)
+            if payload is not None:
+                return Response(payload, mimetype='application/json', headers={'X-Cache': 'HIT'})
+            
+            response = app.make_response(view(*args, **kwargs))
+            # A write that landed while the view ran may have read around it; don't keep the body
+            if (response.status_code == 200 and not response.is_streamed
+                    and data_version(college_id) == current):
+                response_cache.set(key, response.get_data(), college_id)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+def conditional_get(per_college=True):
+    """Answer If-None-Match / If-Modified-Since with 304 from the college's data version
+
+    The check runs before the view, so an unchanged resource costs one
+    primary-key lookup in college_versions and nothing else.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            college_id = normalize_college_id(request.args.get('college_id', 1)) if per_college else None
+            generation = snapshot_generation()
+            representation = request.full_path if generation is None else f"{request.full_path}@{generation}"
+            current = data_version(college_id)
+            if current is None:
+                return view(*args, **kwargs)
+            version, last_modified = current
+            etag = data_versions.etag(college_id, version, last_modified, representation)
+            if generation is not None:
+                # A refreshed snapshot is new content even without a write
+                last_modified = max(last_modified, g.report_snapshot.created_at)
+            last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+            
+            if not_modified:
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.last_modified = last_modified
+            # Clients may keep the body but must revalidate before reusing it
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+def college_data_changed(college_id):
+    """Drop the college's cached responses and schedule its rollups after a write
+
+    The write's own transaction already bumped the college's data version.
+    """
+    college_id = normalize_college_id(college_id)
+    response_cache.invalidate_college(college_id)
+    if rollup_engine is not None and college_id.isdigit():
+        rollup_engine.mark_dirty(college_id)
+
+def event_data_changed(connection, event_id):
+    """Record a write to the college that owns an event"""
+    row = connection.execute(statement('event_college'), (event_id,)).fetchone()
+    if row:
+        college_data_changed(row['college_id'])
+
+def rollback_request_transaction():
+    """Discard the failed transaction before a busy write is retried"""
+    connection = g.get('db')
+    if connection is not None and connection.in_transaction:
+        connection.rollback()
+
+# Retries write handlers whose transaction hit SQLITE_BUSY
+retry_busy_writes = retry_on_busy(retries=DB_BUSY_RETRIES, on_retry=rollback_request_transaction)
+
+@app.errorhandler(UnknownShardError)
+def unknown_shard(error):
+    """Events, students or colleges that no shard holds do not exist"""
+    return jsonify({'error': str(error)}), 404
+
+@app.errorhandler(DatabaseBusyError)
+def database_busy(error):
+    """Report lock contention that outlasted all retries as retryable"""
+    return jsonify({'error': 'Database is busy, please retry'}), 503, {'Retry-After': '1'}
+
 def init_database():
     """Initialize the database with tables and sample data"""
-    connection = get_db_connection()
-    if not connection:
-        return False
-    
     try:
-        cursor = connection.cursor()
-        
-        # Read and execute the SQL schema from parent directory
-        schema_path = '../database_schema_sqlite.sql'
-        with open(schema_path, 'r') as f:
-            sql_script = f.read()
-        
-        # Split the script into individual statements and execute them
-        statements = sql_script.split(';')
-        for statement in statements:
-            statement = statement.strip()
-            if statement:
-                cursor.execute(statement)
-        
-        connection.commit()
+        with db_pool.connection() as connection:
+            cursor = connection.cursor()
+            
+            # Read and execute the SQL schema from parent directory
+            schema_path = '../database_schema_sqlite.sql'
+            with open(schema_path, 'r') as f:
+                sql_script = f.read()
+            
+            # executescript handles statements that contain ';' themselves
+            cursor.executescript(sql_script)
+            
+            connection.commit()
+            apply_migrations(connection)
         print("Database initialized successfully!")
         return True
         
     except sqlite3.Error as e:
         print(f"Error initializing database: {e}")
         return False
-    finally:
-        if connection:
-            connection.close()
 
 # Routes for Admin Portal
 
@@ -87,55 +545,56 @@ def student_portal():
 
 # API Routes
 
+# Fields selectable with ?fields= on GET /api/events, in default output order
+EVENT_FIELDS = tuple(EVENT_COLUMNS)
+
 @app.route('/api/events', methods=['GET'])
+@conditional_get()
 def get_events():
-    """Get all events with optional filtering"""
+    """Get events with optional filtering, keyset pagination and field projection"""
     college_id = request.args.get('college_id', 1)
     event_type = request.args.get('event_type')
     
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        page_cursor = request.args.get('cursor')
+        cursor_values = decode_cursor(page_cursor, (str, int)) if page_cursor else None
+        fields = parse_fields(request.args.get('fields'), EVENT_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if page_cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
+        cursor = tuple_cursor(connection)
         
-        query = """
-        SELECT e.*, et.type_name, c.college_name,
-               COUNT(er.registration_id) as registration_count,
-               COUNT(a.attendance_id) as attendance_count
-        FROM events e
-        JOIN event_types et ON e.event_type_id = et.type_id
-        JOIN colleges c ON e.college_id = c.college_id
-        LEFT JOIN event_registrations er ON e.event_id = er.event_id AND er.status = 'registered'
-        LEFT JOIN attendance a ON e.event_id = a.event_id AND a.status = 'present'
-        WHERE e.college_id = ?
-        """
+        # Every column is selected so the statement text only varies with the filters;
+        # build_page projects the rows onto the requested fields
         params = [college_id]
-        
         if event_type:
-            query += " AND et.type_name = ?"
             params.append(event_type)
+        if cursor_values:
+            params.extend(cursor_values)
+        # One extra row tells us whether another page exists (LIMIT -1 = all rows)
+        params.append(limit + 1 if limit is not None else -1)
         
-        query += " GROUP BY e.event_id ORDER BY e.event_date DESC"
-        
-        cursor.execute(query, params)
+        cursor.execute(statement(events_query(bool(event_type), bool(cursor_values))), params)
         events = cursor.fetchall()
         
-        # Convert Row objects to dictionaries
-        events_list = []
-        for event in events:
-            events_list.append(dict(event))
-        
-        return jsonify(events_list)
+        events_list, next_cursor = build_page(events, EVENT_FIELDS, fields, limit, ('event_date', 'event_id'))
+        if limit is None:
+            return jsonify(RowSet(fields, events_list))
+        return jsonify({'items': RowSet(fields, events_list), 'next_cursor': next_cursor})
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 @app.route('/api/events', methods=['POST'])
+@retry_busy_writes
 def create_event():
     """Create a new event"""
     data = request.json
@@ -147,12 +606,6 @@ def create_event():
     try:
         cursor = connection.cursor()
         
-        query = """
-        INSERT INTO events (college_id, event_name, event_description, event_type_id, 
-                           event_date, event_time, location, max_capacity, created_by)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """
-        
         values = (
             data['college_id'],
             data['event_name'],
@@ -165,46 +618,62 @@ def create_event():
             data['created_by']
         )
         
-        cursor.execute(query, values)
+        cursor.execute(statement('create_event'), values)
         connection.commit()
+        college_data_changed(data['college_id'])
         
         return jsonify({'message': 'Event created successfully', 'event_id': cursor.lastrowid})
     
     except sqlite3.Error as e:
+        if is_busy_error(e):
+            raise  # Let retry_busy_writes roll back and try again
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
+
+# Fields selectable with ?fields= on GET /api/students, in default output order
+STUDENT_FIELDS = STUDENT_COLUMNS
 
 @app.route('/api/students', methods=['GET'])
+@conditional_get()
 def get_students():
-    """Get all students"""
+    """Get students with keyset pagination and field projection"""
     college_id = request.args.get('college_id', 1)
     
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        page_cursor = request.args.get('cursor')
+        cursor_values = decode_cursor(page_cursor, (str, int)) if page_cursor else None
+        fields = parse_fields(request.args.get('fields'), STUDENT_FIELDS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if page_cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        query = "SELECT * FROM students WHERE college_id = ? ORDER BY student_name"
-        cursor.execute(query, [college_id])
-        students = cursor.fetchall()
+        cursor = tuple_cursor(connection)
+        
+        params = [college_id]
+        if cursor_values:
+            params.extend(cursor_values)
+        # One extra row tells us whether another page exists (LIMIT -1 = all rows)
+        params.append(limit + 1 if limit is not None else -1)
         
-        # Convert Row objects to dictionaries
-        students_list = []
-        for student in students:
-            students_list.append(dict(student))
+        cursor.execute(statement(students_query(bool(cursor_values))), params)
+        students = cursor.fetchall()
         
-        return jsonify(students_list)
+        students_list, next_cursor = build_page(students, STUDENT_FIELDS, fields, limit, ('student_name', 'student_id'))
+        if limit is None:
+            return jsonify(RowSet(fields, students_list))
+        return jsonify({'items': RowSet(fields, students_list), 'next_cursor': next_cursor})
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 @app.route('/api/register', methods=['POST'])
+@retry_busy_writes
 def register_student():
     """Register a student for an event"""
     data = request.json
@@ -214,32 +683,117 @@ def register_student():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        
-        # Check if already registered
-        check_query = "SELECT registration_id FROM event_registrations WHERE event_id = ? AND student_id = ?"
-        cursor.execute(check_query, (data['event_id'], data['student_id']))
+        # BEGIN IMMEDIATE serializes seat allocation: no other writer can take
+        # the free seat between the event_seats check and the registration
+        connection.execute("BEGIN IMMEDIATE")
+        outcome, detail = request_seat(connection, data['event_id'], data['student_id'])
+        connection.commit()
         
-        if cursor.fetchone():
+        if outcome == EVENT_NOT_FOUND:
+            return jsonify({'error': 'Event not found'}), 404
+        if outcome == ALREADY_REGISTERED:
             return jsonify({'error': 'Student already registered for this event'}), 400
+        if outcome == ALREADY_WAITLISTED:
+            return jsonify({'error': 'Student is already on the waitlist for this event',
+                            'waitlist_position': detail}), 400
+        if outcome == WAITLISTED:
+            return jsonify({'message': 'Event is full; added to the waitlist', 'waitlist_position': detail}), 202
         
-        # Register student
-        insert_query = """
-        INSERT INTO event_registrations (event_id, student_id)
-        VALUES (?, ?)
-        """
-        cursor.execute(insert_query, (data['event_id'], data['student_id']))
+        event_data_changed(connection, data['event_id'])
+        
+        return jsonify({'message': 'Registration successful', 'registration_id': detail})
+    
+    except sqlite3.Error as e:
+        if is_busy_error(e):
+            raise  # Let retry_busy_writes roll back and try again
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/register/cancel', methods=['POST'])
+@retry_busy_writes
+def cancel_registration():
+    """Cancel a registration or waitlist entry, promoting the next waitlisted student"""
+    data = request.json
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        outcome, promoted = cancel_seat(connection, data['event_id'], data['student_id'])
         connection.commit()
         
-        return jsonify({'message': 'Registration successful'})
+        if outcome is None:
+            return jsonify({'error': 'No registration or waitlist entry for this event'}), 404
+        if outcome == 'cancelled':
+            event_data_changed(connection, data['event_id'])
+        
+        return jsonify({'message': 'Registration cancelled' if outcome == 'cancelled' else 'Removed from the waitlist',
+                        'promoted_student_ids': promoted})
+    
+    except sqlite3.Error as e:
+        if is_busy_error(e):
+            raise  # Let retry_busy_writes roll back and try again
+        return jsonify({'error': str(e)}), 500
+
+def bulk_register_across_shards(items):
+    """Run a bulk registration on each shard that owns some of the items' events
+
+    Every shard commits its part separately; results keep the request order.
+    """
+    results = [None] * len(items)
+    groups = {}
+    for index, (event_id, student_id, error) in enumerate(parse_registration_items(items)):
+        college_id = shard_router.college_for_event(event_id) if error is None else None
+        if college_id is None or college_id not in shard_router.colleges():
+            results[index] = {'event_id': event_id, 'student_id': student_id, 'status': REJECTED,
+                              'error': error or 'Event not found'}
+        else:
+            groups.setdefault(college_id, []).append(index)
+    
+    college_ids = set()
+    for college_id, indexes in groups.items():
+        with shard_router.pool(college_id).connection() as connection:
+            shard_results, changed = bulk_register(connection, [items[index] for index in indexes])
+        college_ids |= changed
+        for index, result in zip(indexes, shard_results):
+            results[index] = result
+    return results, college_ids
+
+@app.route('/api/register/bulk', methods=['POST'])
+@retry_busy_writes
+def register_students_bulk():
+    """Register many students for events in a single transaction"""
+    data = request.json
+    items = data.get('registrations') if isinstance(data, dict) else data
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty list of registrations'}), 400
+    if len(items) > BULK_REGISTRATION_MAX_BATCH:
+        return jsonify({'error': f'At most {BULK_REGISTRATION_MAX_BATCH} registrations per request'}), 400
+    
+    try:
+        if shard_router is not None:
+            results, college_ids = bulk_register_across_shards(items)
+        else:
+            connection = get_db_connection()
+            if not connection:
+                return jsonify({'error': 'Database connection failed'}), 500
+            results, college_ids = bulk_register(connection, items)
+        for college_id in college_ids:
+            college_data_changed(college_id)
+        
+        summary = {status: sum(1 for result in results if result['status'] == status)
+                   for status in (CREATED, WAITLISTED, DUPLICATE, REJECTED)}
+        return jsonify({'results': results, 'summary': summary})
     
     except sqlite3.Error as e:
+        if is_busy_error(e):
+            raise  # Let retry_busy_writes roll back and try again
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 @app.route('/api/attendance', methods=['POST'])
+@retry_busy_writes
 def mark_attendance():
     """Mark attendance for an event"""
     data = request.json
@@ -251,30 +805,77 @@ def mark_attendance():
     try:
         cursor = connection.cursor()
         
-        # Check if already marked
-        check_query = "SELECT attendance_id FROM attendance WHERE event_id = ? AND student_id = ?"
-        cursor.execute(check_query, (data['event_id'], data['student_id']))
+        # Mark attendance (no row comes back if it was already marked)
+        inserted = cursor.execute(statement('insert_attendance'), (data['event_id'], data['student_id'], data['status'])).fetchall()
+        connection.commit()
         
-        if cursor.fetchone():
+        if not inserted:
             return jsonify({'error': 'Attendance already marked for this event'}), 400
         
-        # Mark attendance
-        insert_query = """
-        INSERT INTO attendance (event_id, student_id, status)
-        VALUES (?, ?, ?)
-        """
-        cursor.execute(insert_query, (data['event_id'], data['student_id'], data['status']))
-        connection.commit()
+        event_data_changed(connection, data['event_id'])
         
         return jsonify({'message': 'Attendance marked successfully'})
     
     except sqlite3.Error as e:
+        if is_busy_error(e):
+            raise  # Let retry_busy_writes roll back and try again
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
+
+@app.route('/api/attendance/batch', methods=['POST'])
+def mark_attendance_batch():
+    """Check in a batch of door scans; answers once every scan is committed"""
+    data = request.json
+    scans = data.get('scans') if isinstance(data, dict) else data
+    
+    if not isinstance(scans, list) or not scans:
+        return jsonify({'error': 'Expected a non-empty list of scans'}), 400
+    if len(scans) > CHECKIN_MAX_SCANS:
+        return jsonify({'error': f'At most {CHECKIN_MAX_SCANS} scans per request'}), 400
+    
+    parsed = parse_scans(scans)
+    
+    # Group the well-formed scans by the database file that holds their event
+    batches = {}
+    for index, (event_id, student_id, status, error) in enumerate(parsed):
+        if error is not None:
+            continue
+        college_id = None
+        if shard_router is not None:
+            college_id = shard_router.college_for_event(event_id)
+            if college_id is None or college_id not in shard_router.colleges():
+                parsed[index] = (event_id, student_id, status, 'Event not found')
+                continue
+        batches.setdefault(college_id, []).append(index)
+    
+    try:
+        pending = {}
+        for college_id, indexes in batches.items():
+            futures = get_checkin_batcher(college_id).enqueue([parsed[index][:3] for index in indexes])
+            pending.update(zip(indexes, futures))
+        committed = dict(zip(pending, wait_for_commits(pending.values(), CHECKIN_ACK_TIMEOUT)))
+    except FutureTimeoutError:
+        return jsonify({'error': 'Check-in was not committed in time; retry the scans'}), 503
+    except DatabaseBusyError:
+        raise  # Answered with 503 + Retry-After by the errorhandler
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    
+    results = []
+    for index, (event_id, student_id, status, error) in enumerate(parsed):
+        if error is None:
+            results.append(committed[index])
+        else:
+            results.append({'event_id': event_id, 'student_id': student_id, 'status': REJECTED, 'error': error})
+    
+    for college_id in {result['college_id'] for result in results if result['status'] == CHECKED_IN}:
+        college_data_changed(college_id)
+    
+    summary = {status: sum(1 for result in results if result['status'] == status)
+               for status in (CHECKED_IN, DUPLICATE, REJECTED)}
+    return jsonify({'results': results, 'summary': summary})
 
 @app.route('/api/feedback', methods=['POST'])
+@retry_busy_writes
 def submit_feedback():
     """Submit feedback for an event"""
     data = request.json
@@ -286,173 +887,360 @@ def submit_feedback():
     try:
         cursor = connection.cursor()
         
-        # Check if feedback already submitted
-        check_query = "SELECT feedback_id FROM feedback WHERE event_id = ? AND student_id = ?"
-        cursor.execute(check_query, (data['event_id'], data['student_id']))
+        # Submit feedback (no row comes back if it was already submitted)
+        inserted = cursor.execute(statement('insert_feedback'), (data['event_id'], data['student_id'], data['rating'], data.get('comments', ''))).fetchall()
+        connection.commit()
         
-        if cursor.fetchone():
+        if not inserted:
             return jsonify({'error': 'Feedback already submitted for this event'}), 400
         
-        # Submit feedback
-        insert_query = """
-        INSERT INTO feedback (event_id, student_id, rating, comments)
-        VALUES (?, ?, ?, ?)
-        """
-        cursor.execute(insert_query, (data['event_id'], data['student_id'], data['rating'], data.get('comments', '')))
-        connection.commit()
+        event_data_changed(connection, data['event_id'])
         
         return jsonify({'message': 'Feedback submitted successfully'})
     
     except sqlite3.Error as e:
+        if is_busy_error(e):
+            raise  # Let retry_busy_writes roll back and try again
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 # Report Routes
 
 @app.route('/api/reports/event-popularity')
+@uses_report_snapshot
+@uses_rollups
+@conditional_get()
+@cached_response()
 def event_popularity_report():
     """Generate event popularity report (sorted by registrations)"""
     college_id = request.args.get('college_id', 1)
     
-    connection = get_db_connection()
+    try:
+        stream_format = get_stream_format(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    connection = get_report_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT e.event_name, et.type_name, e.event_date,
-               COUNT(er.registration_id) as total_registrations,
-               COUNT(a.attendance_id) as attendance_count,
-               ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_percentage,
-               ROUND(AVG(f.rating), 2) as average_rating
-        FROM events e
-        JOIN event_types et ON e.event_type_id = et.type_id
-        LEFT JOIN event_registrations er ON e.event_id = er.event_id AND er.status = 'registered'
-        LEFT JOIN attendance a ON e.event_id = a.event_id AND a.status = 'present'
-        LEFT JOIN feedback f ON e.event_id = f.event_id
-        WHERE e.college_id = ?
-        GROUP BY e.event_id
-        ORDER BY total_registrations DESC
-        """
-        cursor.execute(query, [college_id])
-        report = cursor.fetchall()
-        
-        # Convert Row objects to dictionaries
-        report_list = []
-        for row in report:
-            report_list.append(dict(row))
+        cursor = tuple_cursor(connection)
+        # The rollup is already sorted by the rollup worker
+        query = 'event_popularity_rollup' if rollup_computed_at(connection, college_id) else 'event_popularity_report'
+        cursor.execute(statement(query), [college_id])
+        if stream_format:
+            return streamed_response(cursor, stream_format)
         
-        return jsonify(report_list)
+        return jsonify(RowSet.from_cursor(cursor))
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 @app.route('/api/reports/student-participation')
+@uses_report_snapshot
+@uses_rollups
+@conditional_get()
+@cached_response('student_id')
 def student_participation_report():
     """Generate student participation report"""
     college_id = request.args.get('college_id', 1)
     student_id = request.args.get('student_id')
     
-    connection = get_db_connection()
+    try:
+        stream_format = get_stream_format(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    connection = get_report_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
+        cursor = tuple_cursor(connection)
         
-        if student_id:
+        if rollup_computed_at(connection, college_id):
+            if student_id:
+                cursor.execute(statement('student_participation_rollup_student'), (college_id, student_id))
+            else:
+                cursor.execute(statement('student_participation_rollup'), [college_id])
+        elif student_id:
             # Specific student report
-            query = """
-            SELECT s.student_name, s.email,
-                   COUNT(er.registration_id) as events_registered,
-                   COUNT(a.attendance_id) as events_attended,
-                   ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_rate
-            FROM students s
-            LEFT JOIN event_registrations er ON s.student_id = er.student_id AND er.status = 'registered'
-            LEFT JOIN attendance a ON s.student_id = a.student_id AND a.status = 'present'
-            WHERE s.student_id = ? AND s.college_id = ?
-            GROUP BY s.student_id
-            """
-            cursor.execute(query, (student_id, college_id))
+            cursor.execute(statement('student_participation_student'), (student_id, college_id))
         else:
             # All students report
-            query = """
-            SELECT s.student_name, s.email,
-                   COUNT(er.registration_id) as events_registered,
-                   COUNT(a.attendance_id) as events_attended,
-                   ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_rate
-            FROM students s
-            LEFT JOIN event_registrations er ON s.student_id = er.student_id AND er.status = 'registered'
-            LEFT JOIN attendance a ON s.student_id = a.student_id AND a.status = 'present'
-            WHERE s.college_id = ?
-            GROUP BY s.student_id
-            ORDER BY events_attended DESC
-            """
-            cursor.execute(query, [college_id])
-        
-        report = cursor.fetchall()
-        
-        # Convert Row objects to dictionaries
-        report_list = []
-        for row in report:
-            report_list.append(dict(row))
+            cursor.execute(statement('student_participation_report'), [college_id])
+        
+        if stream_format:
+            return streamed_response(cursor, stream_format)
         
-        return jsonify(report_list)
+        return jsonify(RowSet.from_cursor(cursor))
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 @app.route('/api/reports/top-active-students')
+@uses_report_snapshot
+@uses_rollups
+@conditional_get()
+@cached_response()
 def top_active_students_report():
     """Generate top 3 most active students report"""
     college_id = request.args.get('college_id', 1)
     
+    try:
+        stream_format = get_stream_format(request)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    connection = get_report_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        cursor = tuple_cursor(connection)
+        # The live query walks idx_student_stats_leaderboard in order and stops after three rows
+        query = 'top_active_students_rollup' if rollup_computed_at(connection, college_id) else 'top_active_students_report'
+        cursor.execute(statement(query), [college_id])
+        if stream_format:
+            return streamed_response(cursor, stream_format)
+        
+        return jsonify(RowSet.from_cursor(cursor))
+    
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/export/<name>')
+def export_data(name):
+    """Stream a report or one of a college's raw tables as CSV, Arrow IPC or Parquet
+
+    Raw tables accept ?since_rowid= (from the previous export's
+    X-Export-High-Watermark header) and/or ?since=<timestamp> for incremental syncs.
+    """
+    college_id = request.args.get('college_id', 1)
+    export_format = request.args.get('format', 'csv')
+    since = request.args.get('since')
+    try:
+        since_rowid = int(request.args['since_rowid']) if 'since_rowid' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'since_rowid must be an integer'}), 400
+    if export_format not in EXPORT_MIMETYPES:
+        return jsonify({'error': f"Unknown export format: {export_format} (expected csv, arrow or parquet)"}), 400
+    if export_format != 'csv':
+        try:
+            require_pyarrow()
+        except ExportError as e:
+            return jsonify({'error': str(e)}), 501
+    
     connection = get_db_connection()
     if not connection:
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        query = """
-        SELECT s.student_name, s.email,
-               COUNT(er.registration_id) as events_registered,
-               COUNT(a.attendance_id) as events_attended,
-               ROUND((COUNT(a.attendance_id) * 100.0 / COUNT(er.registration_id)), 2) as attendance_rate
-        FROM students s
-        LEFT JOIN event_registrations er ON s.student_id = er.student_id AND er.status = 'registered'
-        LEFT JOIN attendance a ON s.student_id = a.student_id AND a.status = 'present'
-        WHERE s.college_id = ?
-        GROUP BY s.student_id
-        HAVING events_registered > 0
-        ORDER BY events_attended DESC, events_registered DESC
-        LIMIT 3
-        """
-        cursor.execute(query, [college_id])
-        report = cursor.fetchall()
-        
-        # Convert Row objects to dictionaries
+        export = open_export(connection, name, college_id, since_rowid, since)
+    except ExportError as e:
+        return jsonify({'error': str(e)}), 400
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    
+    filename = f"{name}-college-{normalize_college_id(college_id)}.{EXPORT_EXTENSIONS[export_format]}"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    if export.high_watermark is not None:
+        headers['X-Export-High-Watermark'] = str(export.high_watermark)
+    return Response(DetachedStream(stream_export(export, export_format)),
+                    mimetype=EXPORT_MIMETYPES[export_format], headers=headers)
+
+# Rejected rows listed in an import response; the summary counts all of them
+IMPORT_MAX_REJECTS = int(os.environ.get('IMPORT_MAX_REJECTS', 1000))
+
+IMPORT_CONTENT_TYPES = {'text/csv': 'csv', NDJSON_MIMETYPE: 'ndjson', 'application/jsonl': 'ndjson'}
+
+@app.route('/api/import/<kind>', methods=['POST'])
+def import_roster(kind):
+    """Import students or events from a CSV or NDJSON upload, validated and inserted in batches
+
+    The file is sent as the request body or as the multipart field "file";
+    its format comes from ?format=, the file name or the Content-Type.
+    ?college_id= fills in rows without one (required with shards). Index
+    deferral drops indexes that concurrent requests rely on, so it is only
+    offered by the command line import.
+    """
+    upload = request.files.get('file')
+    stream = upload.stream if upload else request.stream
+    import_format = (request.args.get('format')
+                     or detect_format(upload.filename if upload else None)
+                     or IMPORT_CONTENT_TYPES.get((upload.mimetype if upload else request.mimetype)))
+    if import_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Unknown import format (pass ?format=csv or ?format=ndjson)'}), 400
+    if 'defer_indexes' in request.args:
+        return jsonify({'error': 'defer_indexes is only available from the command line import '
+                                 '(python src/backend/roster_import.py --defer-indexes)'}), 400
+    college_id = request.args.get('college_id')
+    if shard_router is not None and college_id is None:
+        return jsonify({'error': 'college_id is required when the database is sharded by college'}), 400
+    try:
+        college_id = int(college_id) if college_id is not None else None
+        batch_size = int(request.args.get('batch_size', IMPORT_BATCH_SIZE))
+    except ValueError:
+        return jsonify({'error': 'college_id and batch_size must be integers'}), 400
+    
+    connection = get_db_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    rejects = []
+    def collect_reject(line, record, errors):
+        if len(rejects) < IMPORT_MAX_REJECTS:
+            rejects.append({'line': line, 'errors': errors, 'row': record})
+    
+    try:
+        summary = import_records(connection, kind, read_records(io.TextIOWrapper(stream, encoding='utf-8', newline=''),
+                                                                import_format),
+                                 college_id, batch_size=max(1, batch_size),
+                                 on_reject=collect_reject, on_commit=college_data_changed,
+                                 busy_retries=DB_BUSY_RETRIES)
+    except RosterImportError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'error': 'The file must be UTF-8 encoded'}), 400
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    
+    summary['rejects'] = rejects
+    summary['rejects_truncated'] = summary['rejected'] > len(rejects)
+    return jsonify(summary)
+
+# Columnar analytics (needs NumPy): arrays older than ANALYTICS_MAX_AGE seconds
+# are brought up to date from their rowid watermarks before answering
+ANALYTICS_MAX_AGE = float(os.environ.get('ANALYTICS_MAX_AGE', 10))
+
+# One columnar cache per database file, keyed like checkin_batchers
+analytics_caches = {}
+analytics_caches_lock = threading.Lock()
+
+def get_analytics_cache(college_id=None):
+    """Refreshed columnar cache of the database (or shard) that holds college_id"""
+    key = int(college_id) if shard_router is not None else None
+    with analytics_caches_lock:
+        cache = analytics_caches.get(key)
+        if cache is None:
+            pool = db_pool if key is None else shard_router.pool(key)
+            cache = analytics_caches[key] = ColumnarCache(pool.connection)
+    if cache.refreshed_at is None or time.time() - cache.refreshed_at > ANALYTICS_MAX_AGE:
+        cache.refresh()
+    return cache
+
+ANALYTICS_REPORTS = ('event-popularity', 'student-participation', 'top-active-students')
+
+@app.route('/api/analytics/<report>')
+def analytics_report(report):
+    """Report rows for every college (or ?college_id=) computed from the columnar cache"""
+    if report not in ANALYTICS_REPORTS:
+        return jsonify({'error': f"Unknown report, expected one of: {', '.join(ANALYTICS_REPORTS)}"}), 404
+    try:
+        college_id = int(request.args['college_id']) if 'college_id' in request.args else None
+        student_id = int(request.args['student_id']) if 'student_id' in request.args else None
+        limit = int(request.args.get('limit', 3))
+    except ValueError:
+        return jsonify({'error': 'college_id, student_id and limit must be integers'}), 400
+    
+    # Shards hold one college each; a cross-college report is their reports in college order
+    if shard_router is None:
+        targets = [college_id]
+    else:
+        targets = [college_id] if college_id is not None else shard_router.colleges()
+    
+    try:
         report_list = []
-        for row in report:
-            report_list.append(dict(row))
+        for target in targets:
+            cache = get_analytics_cache(target)
+            if report == 'event-popularity':
+                rows = cache.event_popularity(target)
+            elif report == 'student-participation':
+                rows = cache.student_participation(target, student_id)
+            else:
+                rows = cache.top_students(target, limit)
+            if college_id is None and target is not None:
+                for row in rows:
+                    row['college_id'] = target
+            report_list.extend(rows)
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 501
+    except UnknownShardError as e:
+        return jsonify({'error': str(e)}), 404
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify(report_list)
+
+@app.route('/api/analytics/stats')
+def analytics_stats():
+    """Report columnar cache sizes and refresh counters"""
+    if shard_router is None:
+        cache = analytics_caches.get(None)
+        return jsonify(cache.stats() if cache is not None else {})
+    return jsonify({str(college_id): cache.stats() for college_id, cache in analytics_caches.items()})
+
+# Days of daily registration counts returned by the summary report by default
+SUMMARY_DEFAULT_DAYS = int(os.environ.get('SUMMARY_DEFAULT_DAYS', 30))
+
+@app.route('/api/reports/summary')
+@uses_report_snapshot
+@uses_rollups
+@conditional_get()
+@cached_response('days')
+def summary_report():
+    """Per-event-type attendance and ratings, daily registrations and top students from the rollups"""
+    college_id = request.args.get('college_id', 1)
+    try:
+        days = int(request.args.get('days', SUMMARY_DEFAULT_DAYS))
+        if days < 1:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'days must be a positive integer'}), 400
+    if rollup_engine is None:
+        return jsonify({'error': 'Rollups are disabled (set ROLLUP_INTERVAL)'}), 404
+    
+    connection = get_report_connection()
+    if not connection:
+        return jsonify({'error': 'Database connection failed'}), 500
+    
+    try:
+        computed_at = rollup_computed_at(connection, college_id)
+        if computed_at is None:
+            if str(college_id).isdigit():
+                rollup_engine.mark_dirty(college_id)
+            return (jsonify({'error': 'Rollups for this college are not computed yet'}), 503,
+                    {'Retry-After': str(max(1, int(ROLLUP_INTERVAL)))})
         
-        return jsonify(report_list)
+        histograms = {}
+        for row in connection.execute(statement('summary_rating_histogram'), [college_id]):
+            histograms.setdefault(row['type_id'], {})[str(row['rating'])] = row['responses']
+        event_types = []
+        for row in connection.execute(statement('summary_event_types'), [college_id]):
+            event_type = dict(row)
+            del event_type['college_id']
+            event_type['rating_histogram'] = histograms.get(row['type_id'], {})
+            event_types.append(event_type)
+        
+        # The last `days` days that have registrations, newest first
+        daily_registrations = RowSet.from_cursor(tuple_cursor(connection).execute(
+            statement('summary_daily_registrations'), (college_id, f'-{days} days', college_id)))
+        top_students = RowSet.from_cursor(tuple_cursor(connection).execute(
+            statement('summary_top_students'), [college_id]))
+        
+        return jsonify({
+            'college_id': int(college_id),
+            'computed_at': computed_at,
+            'event_types': event_types,
+            'daily_registrations': daily_registrations,
+            'top_students': top_students,
+        })
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
 @app.route('/api/event-types')
+@conditional_get(per_college=False)
+@cached_response(per_college=False)
 def get_event_types():
     """Get all event types"""
     connection = get_db_connection()
@@ -460,28 +1248,114 @@ def get_event_types():
         return jsonify({'error': 'Database connection failed'}), 500
     
     try:
-        cursor = connection.cursor()
-        query = "SELECT * FROM event_types ORDER BY type_name"
-        cursor.execute(query)
-        event_types = cursor.fetchall()
-        
-        # Convert Row objects to dictionaries
-        event_types_list = []
-        for event_type in event_types:
-            event_types_list.append(dict(event_type))
-        
-        return jsonify(event_types_list)
+        cursor = tuple_cursor(connection)
+        cursor.execute(statement('event_types'))
+        return jsonify(RowSet.from_cursor(cursor))
     
     except sqlite3.Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection:
-            connection.close()
 
-if __name__ == '__main__':
-    # Initialize database on startup
+@app.route('/api/db/pool-stats')
+def db_pool_stats():
+    """Report connection pool usage, checkout wait times and busy retries"""
+    stats = db_pool.stats()
+    stats.update(busy_stats())
+    stats['tuning_profile'] = DB_TUNING_PROFILE
+    stats['report_snapshot'] = report_snapshots.stats() if report_snapshots is not None else None
+    stats['shards'] = shard_router.stats() if shard_router is not None else None
+    return jsonify(stats)
+
+@app.route('/api/db/shards')
+def shard_summary():
+    """Row counts per shard, gathered with a parallel fan-out query"""
+    if shard_router is None:
+        return jsonify({'error': 'Sharding is not enabled (set DB_SHARD_DIR)'}), 404
+    try:
+        counts = shard_router.fan_out(statement('shard_counts'))
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    shards = {str(college_id): dict(rows[0]) for college_id, rows in sorted(counts.items())}
+    totals = {name: sum(shard[name] for shard in shards.values()) for name in ('events', 'students', 'registrations')}
+    return jsonify({'shards': shards, 'totals': totals})
+
+@app.route('/api/db/query-stats')
+def query_stats():
+    """Report per-fingerprint SQL totals, slowest first, and the slow-query log"""
+    return jsonify({
+        'enabled': METRICS_ENABLED,
+        'slow_query_ms': SLOW_QUERY_MS,
+        'statements': metrics.statement_stats(),
+        'slow_queries': metrics.slow_queries(),
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request, SQL, pool, cache and busy-retry metrics in the Prometheus text format"""
+    pool_stats = {'primary': db_pool.stats()}
+    if shard_router is not None:
+        pool_stats.update((f'college_{college_id}', stats) for college_id, stats in shard_router.stats()['pools'].items())
+    lines = metrics.render()
+    lines += prometheus_lines('campus_db_pool_connections', 'gauge', 'Pooled connections by state', [
+        ({'pool': name, 'state': state}, stats[f'{state}_connections'])
+        for name, stats in pool_stats.items() for state in ('open', 'idle', 'in_use')])
+    lines += prometheus_lines('campus_db_pool_checkouts_total', 'counter', 'Connection checkouts',
+                              [({'pool': name}, stats['checkouts']) for name, stats in pool_stats.items()])
+    lines += prometheus_lines('campus_db_pool_checkout_timeouts_total', 'counter', 'Checkouts that timed out',
+                              [({'pool': name}, stats['checkout_timeouts']) for name, stats in pool_stats.items()])
+    busy = busy_stats()
+    lines += prometheus_lines('campus_db_busy_retries_total', 'counter', 'Writes retried after database is locked',
+                              [({}, busy['busy_retries'])])
+    lines += prometheus_lines('campus_db_busy_failures_total', 'counter', 'Writes that stayed locked after all retries',
+                              [({}, busy['busy_failures'])])
+    cache = response_cache.stats()
+    lines += prometheus_lines('campus_response_cache_lookups_total', 'counter', 'Response cache lookups by result',
+                              [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses'])])
+    lines += prometheus_lines('campus_response_cache_bytes', 'gauge', 'Memory held by cached responses',
+                              [({}, cache['bytes'])])
+    return Response('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/cache/stats')
+def cache_stats():
+    """Report response cache size and hit/miss/eviction counters"""
+    return jsonify(response_cache.stats())
+
+@app.route('/api/rollups/stats')
+def rollup_stats():
+    """Report rollup refresh counters and when each college was last computed"""
+    if rollup_engine is None:
+        return jsonify({'error': 'Rollups are disabled (set ROLLUP_INTERVAL)'}), 404
+    return jsonify(rollup_engine.stats())
+
+@app.route('/api/attendance/batch/stats')
+def checkin_stats():
+    """Report check-in batch sizes and ack / commit latency percentiles"""
+    if shard_router is None:
+        return jsonify(get_checkin_batcher().stats())
+    return jsonify({str(college_id): batcher.stats() for college_id, batcher in checkin_batchers.items()})
+
+def prepare_database():
+    """Create the database on first run, otherwise apply pending migrations"""
+    if shard_router is not None:
+        for college_id in shard_router.colleges():
+            with shard_router.pool(college_id).connection() as connection:
+                apply_migrations(connection, verbose=False)
+        return
     if not os.path.exists(DB_PATH):
         print("Initializing database...")
         init_database()
+    else:
+        # Bring existing databases up to the current schema version
+        with db_pool.connection() as connection:
+            apply_migrations(connection)
+
+def start_background_workers():
+    """Start the per-process rollup worker; call once the schema is current"""
+    if rollup_engine is not None:
+        rollup_engine.start()
+
+if __name__ == '__main__':
+    # Initialize database on startup
+    prepare_database()
+    start_background_workers()
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
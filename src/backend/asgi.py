@@ -0,0 +1,260 @@
+"""ASGI serving mode for the Flask API
+
+Each request runs the Flask app on a bounded thread pool, so the blocking
+sqlite3 calls never run on the event loop. Report, export and analytics
+routes get their own small pool: a burst of slow reads can exhaust only
+that pool and queue behind each other, while registrations, attendance
+and the other routes keep their threads. When a pool's queue is full the
+request is answered with 503 + Retry-After instead of piling up.
+
+Run from the repository root:
+
+    python src/backend/asgi.py                                   # uvicorn with ASGI_WORKERS processes
+    uvicorn asgi:application --app-dir src/backend --workers 4   # or any ASGI server
+"""
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import app as backend
+
+ASGI_HOST = os.environ.get('ASGI_HOST', '0.0.0.0')
+ASGI_PORT = int(os.environ.get('ASGI_PORT', 8000))
+ASGI_WORKERS = int(os.environ.get('ASGI_WORKERS', 1))
+
+# Threads per process for report routes and for everything else, and how many
+# requests may wait for a thread before new ones are turned away with 503
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 8))
+ASGI_REPORT_THREADS = int(os.environ.get('ASGI_REPORT_THREADS', 2))
+ASGI_MAX_QUEUED = int(os.environ.get('ASGI_MAX_QUEUED', 64))
+
+# Seconds to let in-flight requests finish on shutdown
+ASGI_SHUTDOWN_TIMEOUT = float(os.environ.get('ASGI_SHUTDOWN_TIMEOUT', 30))
+
+# Set to 0 when migrations were already applied before the workers started
+ASGI_PREPARE_DATABASE = os.environ.get('ASGI_PREPARE_DATABASE', '1') == '1'
+
+# Long-running reads served by the reports executor: reports, export streams and columnar analytics
+REPORT_PATH_PREFIXES = ('/api/reports/', '/api/export/', '/api/analytics/')
+
+
+class BoundedExecutor:
+    """ThreadPoolExecutor that refuses work once max_queued requests are waiting"""
+
+    def __init__(self, name, threads, max_queued):
+        self.name = name
+        self.threads = threads
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f'asgi-{name}')
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._rejected = 0
+
+    def submit(self, func, *args):
+        """Schedule func; returns None when the pool and its queue are full"""
+        with self._lock:
+            if len(self._in_flight) >= self.threads + self.max_queued:
+                self._rejected += 1
+                return None
+            future = self._executor.submit(func, *args)
+            self._in_flight.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._in_flight.discard(future)
+
+    def shutdown(self, timeout):
+        """Wait up to timeout seconds for in-flight requests, then stop the threads"""
+        with self._lock:
+            pending = set(self._in_flight)
+        _, not_done = wait(pending, timeout=timeout)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return len(not_done)
+
+    def stats(self):
+        with self._lock:
+            in_flight = len(self._in_flight)
+            return {
+                'threads': self.threads,
+                'in_flight': in_flight,
+                'queued': max(0, in_flight - self.threads),
+                'max_queued': self.max_queued,
+                'rejected': self._rejected,
+            }
+
+
+executors = {
+    'reports': BoundedExecutor('reports', ASGI_REPORT_THREADS, ASGI_MAX_QUEUED),
+    'default': BoundedExecutor('default', ASGI_THREADS, ASGI_MAX_QUEUED),
+}
+
+
+def pick_executor(path):
+    return executors['reports'] if path.startswith(REPORT_PATH_PREFIXES) else executors['default']
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': ASGI_WORKERS > 1,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = name
+        else:
+            key = f'HTTP_{name}'
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is fully read already, also for chunked uploads without a length
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+def run_wsgi(environ, send, loop):
+    """Run the Flask app on a worker thread, forwarding the response to the event loop"""
+    def send_message(message):
+        asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    response = backend.app.wsgi_app(environ, start_response)
+    try:
+        # Streamed reports are forwarded chunk by chunk as the generator yields them
+        sent_start = False
+        for chunk in response:
+            if not sent_start:
+                send_message({'type': 'http.response.start', 'status': started['status'],
+                              'headers': started['headers']})
+                sent_start = True
+            if chunk:
+                send_message({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        if not sent_start:
+            send_message({'type': 'http.response.start', 'status': started['status'],
+                          'headers': started['headers']})
+        send_message({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        # Runs Flask teardown and releases a streamed response's connection
+        if hasattr(response, 'close'):
+            response.close()
+
+
+async def send_error(send, status, message, retry_after=None):
+    body = backend.app.json.dumps({'error': message}).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    if retry_after is not None:
+        headers.append((b'retry-after', str(retry_after).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+
+
+async def handle_http(scope, receive, send):
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        body.extend(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+
+    loop = asyncio.get_running_loop()
+    future = pick_executor(scope['path']).submit(run_wsgi, build_environ(scope, bytes(body)), send, loop)
+    if future is None:
+        await send_error(send, 503, 'Server is busy, please retry', retry_after=1)
+        return
+    await asyncio.wrap_future(future)
+
+
+def shutdown():
+    """Drain in-flight requests, flush queued check-ins and close the database pools"""
+    for executor in executors.values():
+        abandoned = executor.shutdown(ASGI_SHUTDOWN_TIMEOUT)
+        if abandoned:
+            print(f"Shutdown: {abandoned} {executor.name} requests still running after {ASGI_SHUTDOWN_TIMEOUT}s")
+    for batcher in list(backend.checkin_batchers.values()):
+        batcher.close()
+    if backend.rollup_engine is not None:
+        backend.rollup_engine.stop()
+    backend.db_pool.close_all()
+    if backend.shard_router is not None:
+        backend.shard_router.close_all()
+    if backend.report_snapshots is not None:
+        backend.report_snapshots.close_all()
+
+
+async def handle_lifespan(receive, send):
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                if ASGI_PREPARE_DATABASE:
+                    await loop.run_in_executor(None, backend.prepare_database)
+                await loop.run_in_executor(None, backend.start_background_workers)
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await loop.run_in_executor(None, shutdown)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI 3 entry point"""
+    if scope['type'] == 'http':
+        await handle_http(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await handle_lifespan(receive, send)
+    else:
+        raise NotImplementedError(f"Unsupported ASGI scope type: {scope['type']}")
+
+
+@backend.app.route('/api/asgi/stats')
+def asgi_stats():
+    """Report per-pool thread usage and rejected requests"""
+    return backend.jsonify({name: executor.stats() for name, executor in executors.items()})
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        print("ASGI mode needs an ASGI server: pip install uvicorn")
+        sys.exit(1)
+
+    # Migrate once here instead of in every worker's startup
+    backend.prepare_database()
+    os.environ['ASGI_PREPARE_DATABASE'] = '0'
+
+    uvicorn.run('asgi:application', host=ASGI_HOST, port=ASGI_PORT, workers=ASGI_WORKERS,
+                app_dir=os.path.dirname(os.path.abspath(__file__)),
+                timeout_graceful_shutdown=ASGI_SHUTDOWN_TIMEOUT, lifespan='on')
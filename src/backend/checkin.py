@@ -0,0 +1,275 @@
+import atexit
+import json
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from db_tuning import retry_on_busy
+
+# Per-scan outcomes of a batched check-in
+CHECKED_IN = 'checked_in'
+DUPLICATE = 'duplicate'
+REJECTED = 'rejected'
+
+ATTENDANCE_STATUSES = ('present', 'absent')
+
+
+def parse_scans(scans):
+    """Validate door scans
+
+    Accepts [{"event_id": 1, "student_id": 2, "status": "present"}, ...];
+    status defaults to 'present'. Returns (event_id, student_id, status, error)
+    tuples in request order; error is None for well-formed scans.
+    """
+    parsed = []
+    for scan in scans:
+        if not isinstance(scan, dict):
+            parsed.append((None, None, None, 'Expected {"event_id", "student_id"}'))
+            continue
+        event_id, student_id = scan.get('event_id'), scan.get('student_id')
+        status = scan.get('status', 'present')
+        if not isinstance(event_id, int) or isinstance(event_id, bool) \
+                or not isinstance(student_id, int) or isinstance(student_id, bool):
+            parsed.append((event_id, student_id, status, 'event_id and student_id must be integers'))
+        elif status not in ATTENDANCE_STATUSES:
+            parsed.append((event_id, student_id, status, f"status must be one of {', '.join(ATTENDANCE_STATUSES)}"))
+        else:
+            parsed.append((event_id, student_id, status, None))
+    return parsed
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def wait_for_commits(futures, timeout):
+    """Results of enqueued scans, waiting at most timeout seconds in total"""
+    deadline = time.monotonic() + timeout
+    return [future.result(max(0, deadline - time.monotonic())) for future in futures]
+
+
+class CheckinBatcher:
+    """Write-behind queue that group-commits attendance scans
+
+    Scans submitted by concurrent requests are collected by one writer
+    thread for up to max_delay seconds or max_batch_size scans and then
+    inserted in a single transaction, so a burst of door scans costs one
+    write lock and one fsync instead of one per scan. submit() returns only
+    after the batch holding the caller's scans has committed.
+
+    If the writer cannot open its connection, every queued scan fails with
+    that error and the next enqueue() starts a new writer.
+    """
+
+    def __init__(self, connect, max_batch_size=500, max_delay=0.005, busy_retries=5, latency_window=10000):
+        self._connect = connect
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._commit_batch = retry_on_busy(retries=busy_retries)(self._commit_batch)
+
+        # Metrics
+        self._latencies = deque(maxlen=latency_window)   # enqueue -> ack, seconds
+        self._commit_times = deque(maxlen=latency_window)
+        self._scans = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._failed_batches = 0
+        self._failed_connects = 0
+        self._last_error = None
+
+    def _ensure_started(self):
+        """Start the writer thread if none is running; caller must hold the lock"""
+        if self._closed:
+            raise RuntimeError("Check-in batcher is closed")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='checkin-batcher', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, scans):
+        """Queue (event_id, student_id, status) scans; returns one Future per scan"""
+        futures = []
+        enqueued_at = time.monotonic()
+        # Queued under the lock so a writer failing to connect cannot miss them
+        with self._lock:
+            self._ensure_started()
+            for event_id, student_id, status in scans:
+                future = Future()
+                self._queue.put((event_id, student_id, status, enqueued_at, future))
+                futures.append(future)
+        return futures
+
+    def submit(self, scans, timeout=10.0):
+        """Queue scans and wait until they are committed
+
+        Returns one result dict per scan. Raises concurrent.futures.TimeoutError
+        if the commit does not happen within timeout seconds.
+        """
+        return wait_for_commits(self.enqueue(scans), timeout)
+
+    def _run(self):
+        try:
+            connection = self._connect()
+        except Exception as e:
+            self._connect_failed(e)
+            return
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                batch = [item]
+                deadline = time.monotonic() + self.max_delay
+                stop = False
+
+                # Coalesce whatever else arrives before the deadline
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+
+                self._flush(connection, batch)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _connect_failed(self, error):
+        """Fail every queued scan with the connection error and let the next enqueue() retry"""
+        with self._lock:
+            self._thread = None
+            self._failed_connects += 1
+            self._last_error = f"{type(error).__name__}: {error}"
+            pending = []
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    pending.append(item)
+        for item in pending:
+            item[4].set_exception(error)
+
+    def _flush(self, connection, batch):
+        start = time.monotonic()
+        try:
+            results = self._commit_batch(connection, [item[:3] for item in batch])
+        except Exception as e:
+            with self._lock:
+                self._failed_batches += 1
+                self._last_error = f"{type(e).__name__}: {e}"
+            for item in batch:
+                item[4].set_exception(e)
+            return
+
+        acked_at = time.monotonic()
+        with self._lock:
+            self._scans += len(batch)
+            self._batches += 1
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._commit_times.append(acked_at - start)
+            for item in batch:
+                self._latencies.append(acked_at - item[3])
+        for item, result in zip(batch, results):
+            item[4].set_result(result)
+
+    def _commit_batch(self, connection, scans):
+        """Insert one batch of scans in a single transaction"""
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            event_colleges = dict(connection.execute(
+                "SELECT event_id, college_id FROM events WHERE event_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted({scan[0] for scan in scans})),)
+            ).fetchall())
+            known_students = {row[0] for row in connection.execute(
+                "SELECT student_id FROM students WHERE student_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted({scan[1] for scan in scans})),)
+            )}
+
+            results = []
+            for event_id, student_id, status in scans:
+                result = {'event_id': event_id, 'student_id': student_id}
+                if event_id not in event_colleges:
+                    result.update(status=REJECTED, error='Event not found')
+                elif student_id not in known_students:
+                    result.update(status=REJECTED, error='Student not found')
+                else:
+                    cursor = connection.execute(
+                        """
+                        INSERT INTO attendance (event_id, student_id, status)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT (event_id, student_id) DO NOTHING
+                        """,
+                        (event_id, student_id, status)
+                    )
+                    result['status'] = CHECKED_IN if cursor.rowcount == 1 else DUPLICATE
+                    result['college_id'] = event_colleges[event_id]
+                results.append(result)
+
+            connection.commit()
+            return results
+        except BaseException:
+            connection.rollback()
+            raise
+
+    def close(self):
+        """Flush queued scans and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def stats(self):
+        """Return batch counters and end-to-end / commit latency percentiles in ms"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            commit_times = sorted(self._commit_times)
+            stats = {
+                'scans': self._scans,
+                'batches': self._batches,
+                'failed_batches': self._failed_batches,
+                'failed_connects': self._failed_connects,
+                'last_error': self._last_error,
+                'avg_batch_size': round(self._scans / self._batches, 2) if self._batches else 0.0,
+                'largest_batch': self._largest_batch,
+                'queued': self._queue.qsize(),
+                'max_batch_size': self.max_batch_size,
+                'max_delay_ms': self.max_delay * 1000,
+            }
+        for name, values in (('ack_latency_ms', latencies), ('commit_ms', commit_times)):
+            stats[name] = {
+                'p50': round(percentile(values, 0.50) * 1000, 3),
+                'p95': round(percentile(values, 0.95) * 1000, 3),
+                'p99': round(percentile(values, 0.99) * 1000, 3),
+                'max': round(values[-1] * 1000, 3) if values else 0.0,
+            }
+        return stats
+
+
+def create_batcher(connect, **kwargs):
+    """Create a CheckinBatcher that flushes its queue at interpreter exit"""
+    batcher = CheckinBatcher(connect, **kwargs)
+    atexit.register(batcher.close)
+    return batcher
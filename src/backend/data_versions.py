@@ -0,0 +1,85 @@
+import hashlib
+import time
+
+# Per-college data versions stored in the database. Triggers bump a college's
+# row in the same transaction as every write to its events, students,
+# registrations, attendance, feedback or rollups, so every worker process (and
+# any other writer, e.g. a roster import from the CLI) invalidates the ETags
+# and cached responses of all the others.
+NOW_EPOCH = "((julianday('now') - 2440587.5) * 86400.0)"
+
+# (table, column naming the row's owner, college of that owner); tables
+# without a college_id column follow their event
+VERSIONED_TABLES = [
+    ('events', 'college_id', '{row}.college_id'),
+    ('students', 'college_id', '{row}.college_id'),
+    ('event_registrations', 'event_id', '(SELECT college_id FROM events WHERE event_id = {row}.event_id)'),
+    ('attendance', 'event_id', '(SELECT college_id FROM events WHERE event_id = {row}.event_id)'),
+    ('feedback', 'event_id', '(SELECT college_id FROM events WHERE event_id = {row}.event_id)'),
+    ('rollup_state', 'college_id', '{row}.college_id'),
+]
+
+
+def _bump_statement(college, condition=None):
+    # No row (and no bump) when the college is unknown, e.g. an orphaned event_id
+    return f"""
+        INSERT INTO college_versions (college_id, version, modified_at)
+        SELECT college_id, 1, {NOW_EPOCH} FROM (SELECT {college} as college_id)
+        WHERE college_id IS NOT NULL{f' AND {condition}' if condition else ''}
+        ON CONFLICT (college_id) DO UPDATE SET version = version + 1, modified_at = excluded.modified_at;"""
+
+
+COLLEGE_VERSIONS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS college_versions (
+        college_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        modified_at REAL NOT NULL
+    )
+    """,
+]
+for _table, _owner, _college in VERSIONED_TABLES:
+    for _event, _statements in (
+            ('insert', [_bump_statement(_college.format(row='NEW'))]),
+            # A row moved to another owner changes the old owner's college too
+            ('update', [_bump_statement(_college.format(row='NEW')),
+                        _bump_statement(_college.format(row='OLD'), f"OLD.{_owner} IS NOT NEW.{_owner}")]),
+            ('delete', [_bump_statement(_college.format(row='OLD'))])):
+        COLLEGE_VERSIONS_SCHEMA.append(
+            f"""
+    CREATE TRIGGER IF NOT EXISTS trg_college_versions_{_table}_{_event}
+    AFTER {_event.upper()} ON {_table}
+    BEGIN{''.join(_statements)}
+    END
+    """)
+
+VERSION_QUERY = "SELECT version, modified_at FROM college_versions WHERE college_id = ?"
+
+
+class DataVersions:
+    """Per-college data versions used to build ETags and response cache keys
+
+    get() reads the college's row from college_versions, one primary-key
+    lookup per request. Colleges that were never written since the table was
+    created (and cross-college data, college_id None) have no row; they get
+    version 0 dated from this process's start, which keeps their ETags from
+    matching another process's and at worst costs a full response.
+    """
+
+    def __init__(self):
+        self._started_at = time.time()
+
+    def get(self, connection, college_id):
+        """Return (version, last_modified timestamp) for a college"""
+        if college_id is not None:
+            row = connection.execute(VERSION_QUERY, (college_id,)).fetchone()
+            if row is not None:
+                return row[0], row[1]
+        return 0, self._started_at
+
+    def etag(self, college_id, version, last_modified, representation):
+        """Strong ETag for one representation (path + query) of a college's data"""
+        digest = hashlib.sha1(representation.encode()).hexdigest()[:12]
+        # last_modified tells apart equal versions of a database that was recreated
+        return f"{college_id}-{version}-{int(last_modified * 1000000):x}-{digest}"
+
@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe checkout/return pool of SQLite connections
+
+    Connections are opened lazily up to pool_size and reused across requests,
+    so the connect cost and SQLite's schema parsing are paid once per
+    connection instead of once per request.
+    """
+
+    def __init__(self, db_path, pool_size=5, timeout=10.0, health_check_interval=30.0,
+                 on_connect=None, uri=False, factory=sqlite3.Connection, cached_statements=128):
+        self.db_path = db_path
+        self.uri = uri  # db_path is a file: URI, e.g. with ?mode=ro
+        self.factory = factory  # connection class, e.g. one that times its statements
+        self.cached_statements = cached_statements  # prepared statements kept per connection
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect  # e.g. apply PRAGMA tuning to new connections
+
+        self._lock = threading.Condition()
+        self._idle = []          # list of (connection, last_used) tuples
+        self._open_count = 0
+        self._closed = False
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._health_check_failures = 0
+
+    def _create_connection(self):
+        """Open a new connection configured like the old get_db_connection()"""
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, uri=self.uri, factory=self.factory,
+                                     cached_statements=self.cached_statements)
+        connection.row_factory = sqlite3.Row  # This enables column access by name
+        if self.on_connect:
+            try:
+                self.on_connect(connection)
+            except sqlite3.Error:
+                connection.close()
+                raise
+        return connection
+
+    def _is_healthy(self, connection, last_used):
+        """Ping connections that have been idle longer than the check interval"""
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """Check a connection out of the pool, waiting up to self.timeout"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Connection pool is closed")
+
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+
+                if self._open_count < self.pool_size:
+                    # Reserve the slot now, open the connection outside the lock
+                    self._open_count += 1
+                    connection = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"Timed out after {self.timeout}s waiting for a database connection"
+                    )
+                waited = True
+                self._lock.wait(remaining)
+
+        if connection is not None and not self._is_healthy(connection, last_used):
+            with self._lock:
+                self._health_check_failures += 1
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+            connection = None
+
+        if connection is None:
+            try:
+                connection = self._create_connection()
+            except sqlite3.Error:
+                with self._lock:
+                    self._open_count -= 1
+                    self._lock.notify()
+                raise
+
+        wait_time = time.monotonic() - start
+        with self._lock:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._total_wait += wait_time
+            self._max_wait = max(self._max_wait, wait_time)
+
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool, discarding any uncommitted work"""
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+
+        with self._lock:
+            if self._closed or not healthy:
+                self._open_count -= 1
+                if not healthy:
+                    self._health_check_failures += 1
+                try:
+                    connection.close()
+                except sqlite3.Error:
+                    pass
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager for code running outside a Flask request"""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close_all(self):
+        """Close idle connections and stop handing out new ones"""
+        with self._lock:
+            self._closed = True
+            for connection, _ in self._idle:
+                connection.close()
+                self._open_count -= 1
+            self._idle = []
+            self._lock.notify_all()
+
+    def stats(self):
+        """Return pool usage and checkout wait-time metrics"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'pool_size': self.pool_size,
+                'cached_statements': self.cached_statements,
+                'open_connections': self._open_count,
+                'idle_connections': len(self._idle),
+                'in_use_connections': self._open_count - len(self._idle),
+                'checkouts': checkouts,
+                'checkouts_waited': self._waits,
+                'checkout_timeouts': self._timeouts,
+                'health_check_failures': self._health_check_failures,
+                'avg_wait_ms': round(self._total_wait * 1000 / checkouts, 3) if checkouts else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+                'total_wait_ms': round(self._total_wait * 1000, 3),
+            }
@@ -0,0 +1,109 @@
+import functools
+import random
+import sqlite3
+import threading
+import time
+
+# SQLite result codes for lock contention
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+
+# Named PRAGMA profiles applied to every new connection.
+# Both use WAL so readers never block the registration/attendance writers;
+# they differ in how hard each commit is pushed to disk.
+PROFILES = {
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',       # fsync the WAL on every commit
+        'cache_size': -16000,        # ~16 MB page cache
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,        # ms to wait on a locked database
+    },
+    'throughput': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',     # fsync only at checkpoints; still safe in WAL mode
+        'cache_size': -64000,        # ~64 MB page cache
+        'mmap_size': 268435456,      # 256 MB memory-mapped I/O
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+# Order matters: journal_mode must be switched before the other settings
+PRAGMA_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+
+class DatabaseBusyError(sqlite3.OperationalError):
+    """Raised when a write is still blocked after all busy retries"""
+
+
+def get_profile(name, **overrides):
+    """Return the PRAGMA settings for a named profile with optional overrides"""
+    if name not in PROFILES:
+        raise ValueError(f"Unknown database tuning profile: {name!r} (expected one of {sorted(PROFILES)})")
+    settings = dict(PROFILES[name])
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return settings
+
+
+def apply_pragmas(connection, settings):
+    """Apply PRAGMA settings to a freshly opened connection"""
+    for pragma in PRAGMA_ORDER:
+        if pragma in settings:
+            connection.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+
+
+def is_busy_error(error):
+    """Return True for transient SQLITE_BUSY / SQLITE_LOCKED errors"""
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    code = getattr(error, 'sqlite_errorcode', None)
+    if code is not None:
+        # Extended result codes keep the primary code in the low byte
+        return code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED)
+    message = str(error).lower()
+    return 'database is locked' in message or 'database table is locked' in message or 'busy' in message
+
+
+_stats_lock = threading.Lock()
+_busy_stats = {'busy_retries': 0, 'busy_failures': 0}
+
+
+def busy_stats():
+    """Return counters for retried and abandoned busy writes"""
+    with _stats_lock:
+        return dict(_busy_stats)
+
+
+def retry_on_busy(retries=5, base_delay=0.05, max_delay=1.0, on_retry=None):
+    """Decorator that re-runs a function when it fails with a transient busy error
+
+    Delays grow exponentially with full jitter so competing writers spread out.
+    on_retry is called before each new attempt, e.g. to roll back the
+    failed transaction. Once retries are exhausted a DatabaseBusyError is raised.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            attempt = 0
+            while True:
+                try:
+                    return func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not is_busy_error(e):
+                        raise
+                    if attempt >= retries:
+                        with _stats_lock:
+                            _busy_stats['busy_failures'] += 1
+                        raise DatabaseBusyError(f"Database busy after {retries} retries: {e}") from e
+
+                    with _stats_lock:
+                        _busy_stats['busy_retries'] += 1
+                    if on_retry:
+                        on_retry()
+                    delay = min(max_delay, base_delay * (2 ** attempt))
+                    time.sleep(random.uniform(0, delay))
+                    attempt += 1
+        return wrapper
+    return decorator
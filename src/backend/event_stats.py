@@ -0,0 +1,203 @@
+import sqlite3
+import sys
+
+# Per-event counters served by /api/events and the event popularity report.
+# Triggers on the child tables keep them current, so reads are O(events)
+# instead of re-aggregating every registration, attendance and feedback row.
+EVENT_STATS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS event_stats (
+        event_id INTEGER PRIMARY KEY,
+        registered INTEGER NOT NULL DEFAULT 0,
+        present INTEGER NOT NULL DEFAULT 0,
+        rating_sum INTEGER NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (event_id) REFERENCES events(event_id)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_event_insert
+    AFTER INSERT ON events
+    BEGIN
+        INSERT OR IGNORE INTO event_stats (event_id) VALUES (NEW.event_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_event_delete
+    AFTER DELETE ON events
+    BEGIN
+        DELETE FROM event_stats WHERE event_id = OLD.event_id;
+    END
+    """,
+    # Registrations: only status = 'registered' is counted
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_registration_insert
+    AFTER INSERT ON event_registrations
+    WHEN NEW.status = 'registered'
+    BEGIN
+        INSERT INTO event_stats (event_id, registered) VALUES (NEW.event_id, 1)
+        ON CONFLICT (event_id) DO UPDATE SET registered = registered + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_registration_update
+    AFTER UPDATE OF event_id, status ON event_registrations
+    BEGIN
+        UPDATE event_stats SET registered = registered - 1
+        WHERE event_id = OLD.event_id AND OLD.status = 'registered';
+        INSERT INTO event_stats (event_id, registered)
+        SELECT NEW.event_id, 1 WHERE NEW.status = 'registered'
+        ON CONFLICT (event_id) DO UPDATE SET registered = registered + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_registration_delete
+    AFTER DELETE ON event_registrations
+    WHEN OLD.status = 'registered'
+    BEGIN
+        UPDATE event_stats SET registered = registered - 1 WHERE event_id = OLD.event_id;
+    END
+    """,
+    # Attendance: only status = 'present' is counted
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_attendance_insert
+    AFTER INSERT ON attendance
+    WHEN NEW.status = 'present'
+    BEGIN
+        INSERT INTO event_stats (event_id, present) VALUES (NEW.event_id, 1)
+        ON CONFLICT (event_id) DO UPDATE SET present = present + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_attendance_update
+    AFTER UPDATE OF event_id, status ON attendance
+    BEGIN
+        UPDATE event_stats SET present = present - 1
+        WHERE event_id = OLD.event_id AND OLD.status = 'present';
+        INSERT INTO event_stats (event_id, present)
+        SELECT NEW.event_id, 1 WHERE NEW.status = 'present'
+        ON CONFLICT (event_id) DO UPDATE SET present = present + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_attendance_delete
+    AFTER DELETE ON attendance
+    WHEN OLD.status = 'present'
+    BEGIN
+        UPDATE event_stats SET present = present - 1 WHERE event_id = OLD.event_id;
+    END
+    """,
+    # Feedback: running sum and count so the average is exact
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_feedback_insert
+    AFTER INSERT ON feedback
+    BEGIN
+        INSERT INTO event_stats (event_id, rating_sum, rating_count) VALUES (NEW.event_id, NEW.rating, 1)
+        ON CONFLICT (event_id) DO UPDATE SET rating_sum = rating_sum + NEW.rating,
+                                             rating_count = rating_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_feedback_update
+    AFTER UPDATE OF event_id, rating ON feedback
+    BEGIN
+        UPDATE event_stats SET rating_sum = rating_sum - OLD.rating, rating_count = rating_count - 1
+        WHERE event_id = OLD.event_id;
+        INSERT INTO event_stats (event_id, rating_sum, rating_count) VALUES (NEW.event_id, NEW.rating, 1)
+        ON CONFLICT (event_id) DO UPDATE SET rating_sum = rating_sum + NEW.rating,
+                                             rating_count = rating_count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_feedback_delete
+    AFTER DELETE ON feedback
+    BEGIN
+        UPDATE event_stats SET rating_sum = rating_sum - OLD.rating, rating_count = rating_count - 1
+        WHERE event_id = OLD.event_id;
+    END
+    """,
+]
+
+# Counters recomputed from the source tables, one row per event
+SOURCE_STATS_QUERY = """
+SELECT e.event_id,
+       (SELECT COUNT(*) FROM event_registrations er
+        WHERE er.event_id = e.event_id AND er.status = 'registered') as registered,
+       (SELECT COUNT(*) FROM attendance a
+        WHERE a.event_id = e.event_id AND a.status = 'present') as present,
+       (SELECT COALESCE(SUM(f.rating), 0) FROM feedback f
+        WHERE f.event_id = e.event_id) as rating_sum,
+       (SELECT COUNT(*) FROM feedback f
+        WHERE f.event_id = e.event_id) as rating_count
+FROM events e
+"""
+
+STAT_COLUMNS = ('registered', 'present', 'rating_sum', 'rating_count')
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM event_stats",
+    "INSERT INTO event_stats (event_id, registered, present, rating_sum, rating_count) " + SOURCE_STATS_QUERY,
+]
+
+
+def rebuild_event_stats(connection):
+    """Recompute event_stats from the source tables (run inside a transaction)
+
+    Returns the number of events rebuilt.
+    """
+    for statement in REBUILD_STATEMENTS:
+        cursor = connection.execute(statement)
+    return cursor.rowcount
+
+
+def verify_event_stats(connection):
+    """Compare event_stats against the source tables
+
+    Returns a list of (event_id, column, stored, expected) tuples, one per
+    drifted counter. A missing event_stats row is reported with stored None.
+    """
+    query = f"""
+    SELECT src.*, es.registered as stored_registered, es.present as stored_present,
+           es.rating_sum as stored_rating_sum, es.rating_count as stored_rating_count
+    FROM ({SOURCE_STATS_QUERY}) src
+    LEFT JOIN event_stats es ON es.event_id = src.event_id
+    """
+    drift = []
+    for row in connection.execute(query):
+        event_id = row[0]
+        for position, column in enumerate(STAT_COLUMNS, start=1):
+            expected = row[position]
+            stored = row[position + len(STAT_COLUMNS)]
+            if stored != expected:
+                drift.append((event_id, column, stored, expected))
+
+    # Stats rows left behind for events that no longer exist
+    for (event_id,) in connection.execute(
+            "SELECT event_id FROM event_stats WHERE event_id NOT IN (SELECT event_id FROM events)"):
+        drift.append((event_id, 'event_id', event_id, None))
+    return drift
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('verify', 'rebuild'):
+        print("Usage: python event_stats.py verify|rebuild [db_path]")
+        sys.exit(2)
+
+    command = sys.argv[1]
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'src/backend/campus_events.db'
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        drift = verify_event_stats(connection)
+        for event_id, column, stored, expected in drift:
+            print(f"Event {event_id}: {column} is {stored}, expected {expected}")
+
+        if command == 'verify':
+            print(f"{len(drift)} drifted counters" if drift else "event_stats is consistent")
+            sys.exit(1 if drift else 0)
+
+        connection.execute("BEGIN IMMEDIATE")
+        rebuilt = rebuild_event_stats(connection)
+        connection.execute("COMMIT")
+        print(f"Rebuilt event_stats for {rebuilt} events")
+    finally:
+        connection.close()
@@ -0,0 +1,240 @@
+import argparse
+import csv
+import io
+import sqlite3
+import sys
+
+from queries import statement
+from streaming import iter_batches
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # CSV exports work without it
+    pa = pq = None
+
+# Rows fetched from the cursor per exported chunk (one Arrow record batch / Parquet row group)
+EXPORT_BATCH_SIZE = 5000
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+}
+EXPORT_EXTENSIONS = {'csv': 'csv', 'arrow': 'arrows', 'parquet': 'parquet'}
+
+# Raw tables of one college, keyed by export name: (table, timestamp column for ?since=)
+TABLE_EXPORTS = {
+    'event_registrations': ('event_registrations', 'registration_date'),
+    'attendance': ('attendance', 'check_in_time'),
+    'feedback': ('feedback', 'submitted_at'),
+}
+
+# Reports, keyed like their /api/reports/* routes: (registered query name, column types)
+REPORT_EXPORTS = {
+    'event-popularity': ('event_popularity_report', {
+        'event_name': 'text', 'type_name': 'text', 'event_date': 'text', 'total_registrations': 'integer',
+        'attendance_count': 'integer', 'attendance_percentage': 'real', 'average_rating': 'real',
+    }),
+    'student-participation': ('student_participation_report', {
+        'student_name': 'text', 'email': 'text', 'events_registered': 'integer', 'events_attended': 'integer',
+        'attendance_rate': 'real',
+    }),
+    'top-active-students': ('top_active_students_report', {
+        'student_name': 'text', 'email': 'text', 'events_registered': 'integer', 'events_attended': 'integer',
+        'attendance_rate': 'real',
+    }),
+}
+
+
+class ExportError(ValueError):
+    """Raised for an export request that cannot be served"""
+
+
+def _column_kind(declared_type):
+    declared_type = (declared_type or '').upper()
+    if 'INT' in declared_type:
+        return 'integer'
+    if any(name in declared_type for name in ('REAL', 'FLOA', 'DOUB')):
+        return 'real'
+    return 'text'
+
+
+class Export:
+    """An open export: the cursor to stream plus its column types
+
+    high_watermark is the largest rowid included in a table export (None
+    for reports); passing it back as since_rowid exports only newer rows.
+    """
+
+    def __init__(self, cursor, columns, high_watermark=None):
+        self.cursor = cursor
+        self.columns = columns
+        self.high_watermark = high_watermark
+
+
+def open_export(connection, name, college_id, since_rowid=None, since=None):
+    """Run the query behind an export and return an Export without fetching any rows
+
+    Table exports include only rows of events owned by college_id, newer
+    than since_rowid and/or with a timestamp after since. Re-activated
+    registrations get a new registration_date but keep their rowid, so only
+    since picks them up.
+    """
+    if name in REPORT_EXPORTS:
+        if since_rowid is not None or since is not None:
+            raise ExportError("Reports are aggregates and cannot be exported incrementally")
+        query_name, columns = REPORT_EXPORTS[name]
+        cursor = connection.execute(statement(query_name), (college_id,))
+        return Export(cursor, columns)
+
+    if name not in TABLE_EXPORTS:
+        raise ExportError(f"Unknown export: {name} (expected one of {', '.join(list(REPORT_EXPORTS) + list(TABLE_EXPORTS))})")
+    table, timestamp_column = TABLE_EXPORTS[name]
+    columns = {row[1]: _column_kind(row[2]) for row in connection.execute(f"PRAGMA table_info({table})")}
+
+    # Fix the upper bound first so the reported watermark matches the rows sent
+    high_watermark = connection.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+    conditions = ["e.college_id = ?", "t.rowid <= ?"]
+    params = [college_id, high_watermark]
+    if since_rowid is not None:
+        conditions.append("t.rowid > ?")
+        params.append(since_rowid)
+    if since is not None:
+        conditions.append(f"t.{timestamp_column} > ?")
+        params.append(since)
+    cursor = connection.execute(
+        f"""
+        SELECT {', '.join(f't.{column}' for column in columns)}
+        FROM {table} t
+        JOIN events e ON e.event_id = t.event_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY t.rowid
+        """,
+        params
+    )
+    return Export(cursor, columns, high_watermark)
+
+
+def stream_csv(export, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the export as CSV with a header row, one chunk of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export.columns)
+    for rows in iter_batches(export.cursor, batch_size):
+        writer.writerows(tuple(row) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes to a generator as they arrive"""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema(columns):
+    types = {'integer': pa.int64(), 'real': pa.float64(), 'text': pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in columns.items()])
+
+
+def _record_batch(schema, rows):
+    return pa.RecordBatch.from_arrays(
+        [pa.array([row[index] for row in rows], type=field.type) for index, field in enumerate(schema)],
+        schema=schema)
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ExportError("Arrow and Parquet exports need pyarrow: pip install pyarrow")
+
+
+def stream_arrow(export, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the export as an Arrow IPC stream, one record batch per chunk of rows"""
+    require_pyarrow()
+    schema = _arrow_schema(export.columns)
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for rows in iter_batches(export.cursor, batch_size):
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_parquet(export, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the export as a Parquet file, one row group per chunk of rows"""
+    require_pyarrow()
+    schema = _arrow_schema(export.columns)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in iter_batches(export.cursor, batch_size):
+            writer.write_batch(_record_batch(schema, rows))
+            yield sink.drain()
+    yield sink.drain()
+
+
+STREAMERS = {'csv': stream_csv, 'arrow': stream_arrow, 'parquet': stream_parquet}
+
+
+def stream_export(export, export_format, batch_size=EXPORT_BATCH_SIZE):
+    """Yield the encoded export; checks the format before any row is read"""
+    if export_format not in STREAMERS:
+        raise ExportError(f"Unknown export format: {export_format} (expected csv, arrow or parquet)")
+    if export_format != 'csv':
+        require_pyarrow()
+    return STREAMERS[export_format](export, batch_size)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export a report or raw table of one college')
+    parser.add_argument('name', choices=list(REPORT_EXPORTS) + list(TABLE_EXPORTS))
+    parser.add_argument('output', help='output file')
+    parser.add_argument('--db', default='src/backend/campus_events.db')
+    parser.add_argument('--college-id', type=int, default=1)
+    parser.add_argument('--format', choices=list(STREAMERS), default='csv')
+    parser.add_argument('--since-rowid', type=int)
+    parser.add_argument('--since', help="timestamp, e.g. '2024-03-01 00:00:00'")
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.db)
+    try:
+        export = open_export(connection, args.name, args.college_id, args.since_rowid, args.since)
+        with open(args.output, 'w', newline='') if args.format == 'csv' else open(args.output, 'wb') as f:
+            for chunk in stream_export(export, args.format):
+                f.write(chunk)
+    except ExportError as e:
+        print(e)
+        sys.exit(2)
+    finally:
+        connection.close()
+    if export.high_watermark is not None:
+        print(f"Exported {args.name} to {args.output}; next incremental export: --since-rowid {export.high_watermark}")
+    else:
+        print(f"Exported {args.name} to {args.output}")
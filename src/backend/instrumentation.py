@@ -0,0 +1,399 @@
+import collections
+import functools
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+# Upper bounds of the request duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Statements worth an EXPLAIN QUERY PLAN when they are slow (not BEGIN, PRAGMA, ...)
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Normalize a statement so every call of the same query maps to one text
+
+    Comments and whitespace are collapsed, literals become ? and IN lists of
+    placeholders become (...), so queries that differ only in their values
+    or list lengths share a fingerprint.
+    """
+    sql = _COMMENTS.sub(' ', sql)
+    sql = _STRINGS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint_id(text):
+    """Short stable id of a fingerprint, used as the Prometheus label"""
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_lines(name, metric_type, help_text, samples):
+    """Exposition lines for one metric; samples is a list of (labels dict, value)"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{_label(label)}"' for key, label in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return lines
+
+
+class RequestTimings:
+    """Time spent by the current request in SQL and in JSON serialization"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.open = []  # statements that may still be fetched from
+        self.ended = False
+
+    def server_timing(self):
+        """Server-Timing header value: db, serialize, the rest of the handler and the total"""
+        total = time.perf_counter() - self.started
+        other = max(0.0, total - self.db_seconds - self.serialize_seconds)
+        return (f'db;dur={self.db_seconds * 1000:.2f};desc="{self.statements} queries, {self.rows} rows", '
+                f'serialize;dur={self.serialize_seconds * 1000:.2f}, app;dur={other * 1000:.2f}, '
+                f'total;dur={total * 1000:.2f}')
+
+
+class Statement:
+    """One execution of a statement
+
+    Fetches only add to seconds and rows; Metrics records what was not
+    recorded yet when the statement finishes (or its request ends), so
+    reading rows takes no lock.
+    """
+
+    __slots__ = ('fingerprint', 'sql', 'parameters', 'seconds', 'rows', 'request', 'executions',
+                 'recorded_seconds', 'recorded_rows', 'finished')
+
+    def __init__(self, sql, parameters, request):
+        self.fingerprint = fingerprint(sql)
+        self.sql = sql
+        self.parameters = parameters
+        self.seconds = 0.0
+        self.rows = 0
+        self.request = request
+        self.executions = 1
+        self.recorded_seconds = 0.0
+        self.recorded_rows = 0
+        self.finished = False
+
+
+_perf_counter = time.perf_counter
+_cursor_next = sqlite3.Cursor.__next__
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports the time and rows of each statement to its connection's Metrics
+
+    A statement's time covers execute() plus every fetch. It ends when its
+    rows are exhausted, the cursor runs another statement or is closed, or
+    the request that ran it finishes.
+    """
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._statement = None
+
+    def _run(self, method, sql, parameters, explain_parameters):
+        self._finish()
+        metrics = self.connection.metrics
+        statement = Statement(sql, explain_parameters, metrics.current_request())
+        start = _perf_counter()
+        try:
+            method(sql, parameters)
+        except sqlite3.Error:
+            statement.seconds = _perf_counter() - start
+            metrics.statement_failed(statement)
+            raise
+        statement.seconds = _perf_counter() - start
+        self._statement = statement
+        if self.description is None:
+            self._finish()  # no result rows to fetch
+        else:
+            metrics.statement_started(self.connection, statement)
+        return self
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        return self._run(super().executemany, sql, seq_of_parameters,
+                         seq_of_parameters[0] if seq_of_parameters else ())
+
+    def _fetched(self, start, rows, exhausted):
+        statement = self._statement
+        if statement is not None:
+            statement.seconds += _perf_counter() - start
+            statement.rows += rows
+            if exhausted:
+                self._finish()
+
+    def fetchone(self):
+        start = _perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = _perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        start = _perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        # Called once per row: no method lookups or locks beyond the two clock reads
+        start = _perf_counter()
+        try:
+            row = _cursor_next(self)
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        statement = self._statement
+        if statement is not None:
+            statement.seconds += _perf_counter() - start
+            statement.rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def _finish(self):
+        if self._statement is not None:
+            statement, self._statement = self._statement, None
+            self.connection.metrics.statement_finished(self.connection, statement)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors, execute() and executemany() are timed; see Metrics.connection_class"""
+
+    metrics = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+class Metrics:
+    """Process-wide request and SQL statement metrics
+
+    Statements run on connections of connection_class are aggregated per
+    fingerprint (executions, errors, seconds, rows). Statements slower than
+    slow_query_seconds are printed with their EXPLAIN QUERY PLAN and kept in
+    a log of the slow_log_size most recent. Requests are counted per
+    endpoint, method and status with a duration histogram, plus the SQL and
+    serialization time they contained. render() returns everything in the
+    Prometheus text format.
+    """
+
+    def __init__(self, slow_query_seconds=0.1, slow_log_size=100):
+        self.slow_query_seconds = slow_query_seconds
+        self.connection_class = type('InstrumentedConnection', (InstrumentedConnection,), {'metrics': self})
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._statements = {}   # fingerprint -> [executions, errors, seconds, rows]
+        self._requests = {}     # (method, endpoint, status) -> count
+        self._durations = {}    # endpoint -> [bucket counts..., sum, count]
+        self._endpoint_time = {}  # endpoint -> [db seconds, serialize seconds]
+        self._slow_log = collections.deque(maxlen=slow_log_size)
+        self._slow_statements = 0
+
+    # Per-request timings (thread-local)
+
+    def begin_request(self):
+        self._local.request = RequestTimings()
+
+    def current_request(self):
+        return getattr(self._local, 'request', None)
+
+    def end_request(self, method, endpoint, status):
+        """Close the current request's open statements and count it; returns its RequestTimings"""
+        timings = self.current_request()
+        if timings is None:
+            return None
+        self._local.request = None
+        for connection, statement in timings.open:
+            self.statement_finished(connection, statement)
+        timings.open = []
+        # Statements still streamed after this point only count toward the totals
+        timings.ended = True
+        seconds = time.perf_counter() - timings.started
+        with self._lock:
+            key = (method, endpoint, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            buckets = self._durations.setdefault(endpoint, [0] * (len(DURATION_BUCKETS) + 2))
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    buckets[index] += 1
+            buckets[-2] += seconds
+            buckets[-1] += 1
+            spent = self._endpoint_time.setdefault(endpoint, [0.0, 0.0])
+            spent[0] += timings.db_seconds
+            spent[1] += timings.serialize_seconds
+        return timings
+
+    def serialized(self, seconds):
+        """Add JSON encoding time to the current request"""
+        timings = self.current_request()
+        if timings is not None:
+            timings.serialize_seconds += seconds
+
+    # Called by InstrumentedCursor
+
+    def _record(self, statement, errors=0):
+        """Add the time and rows of a statement not recorded yet to the totals and its request"""
+        seconds = statement.seconds - statement.recorded_seconds
+        rows = statement.rows - statement.recorded_rows
+        executions, statement.executions = statement.executions, 0
+        statement.recorded_seconds, statement.recorded_rows = statement.seconds, statement.rows
+        with self._lock:
+            totals = self._statements.get(statement.fingerprint)
+            if totals is None:
+                totals = self._statements[statement.fingerprint] = [0, 0, 0.0, 0]
+            totals[0] += executions
+            totals[1] += errors
+            totals[2] += seconds
+            totals[3] += rows
+        timings = statement.request
+        if timings is not None and not timings.ended:
+            timings.statements += executions
+            timings.db_seconds += seconds
+            timings.rows += rows
+
+    def statement_started(self, connection, statement):
+        """Track a statement with rows to fetch so its request can finish it
+
+        Outside a request nothing finishes abandoned cursors, so the
+        execution is recorded right away and the fetches when it finishes.
+        """
+        if statement.request is not None:
+            statement.request.open.append((connection, statement))
+        else:
+            self._record(statement)
+
+    def statement_failed(self, statement):
+        self._record(statement, errors=1)
+
+    def statement_finished(self, connection, statement):
+        """Record a statement; may be called again for rows fetched after its request ended"""
+        self._record(statement)
+        if statement.finished:
+            return
+        statement.finished = True
+        if statement.seconds >= self.slow_query_seconds:
+            self._log_slow(connection, statement)
+
+    def _log_slow(self, connection, statement):
+        plan = []
+        if connection is not None and statement.fingerprint.upper().startswith(EXPLAINABLE):
+            try:
+                # A plain cursor, so the EXPLAIN itself is not counted
+                plan = [row[-1] for row in sqlite3.Cursor(connection).execute(
+                    f"EXPLAIN QUERY PLAN {statement.sql}", statement.parameters)]
+            except sqlite3.Error as e:
+                plan = [f"EXPLAIN QUERY PLAN failed: {e}"]
+        entry = {
+            'logged_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'duration_ms': round(statement.seconds * 1000, 3),
+            'rows': statement.rows,
+            'fingerprint': fingerprint_id(statement.fingerprint),
+            'statement': statement.fingerprint,
+            'plan': plan,
+        }
+        with self._lock:
+            self._slow_statements += 1
+            self._slow_log.append(entry)
+        print(f"Slow query ({entry['duration_ms']} ms, {statement.rows} rows): {statement.fingerprint}")
+        for detail in plan:
+            print(f"    {detail}")
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow_log)
+
+    def statement_stats(self):
+        """Per-fingerprint totals, slowest first"""
+        with self._lock:
+            items = [(text, list(totals)) for text, totals in self._statements.items()]
+        return sorted(({'fingerprint': fingerprint_id(text), 'statement': text, 'executions': executions,
+                        'errors': errors, 'total_ms': round(seconds * 1000, 3), 'rows': rows}
+                       for text, (executions, errors, seconds, rows) in items),
+                      key=lambda stats: stats['total_ms'], reverse=True)
+
+    def render(self):
+        """Request and statement metrics in the Prometheus text exposition format"""
+        with self._lock:
+            requests = dict(self._requests)
+            durations = {endpoint: list(buckets) for endpoint, buckets in self._durations.items()}
+            endpoint_time = {endpoint: list(spent) for endpoint, spent in self._endpoint_time.items()}
+            statements = {text: list(totals) for text, totals in self._statements.items()}
+            slow_statements = self._slow_statements
+
+        lines = prometheus_lines(
+            'campus_http_requests_total', 'counter', 'HTTP requests by method, route and status',
+            [({'method': method, 'endpoint': endpoint, 'status': status}, count)
+             for (method, endpoint, status), count in sorted(requests.items())])
+        lines += prometheus_lines('campus_http_request_duration_seconds', 'histogram', 'HTTP request duration by route',
+                                  [])
+        for endpoint, buckets in sorted(durations.items()):
+            label = _label(endpoint)
+            for bound, count in zip(DURATION_BUCKETS, buckets):
+                lines.append(f'campus_http_request_duration_seconds_bucket{{endpoint="{label}",le="{bound}"}} {count}')
+            lines.append(f'campus_http_request_duration_seconds_bucket{{endpoint="{label}",le="+Inf"}} {buckets[-1]}')
+            lines.append(f'campus_http_request_duration_seconds_sum{{endpoint="{label}"}} {buckets[-2]:.6f}')
+            lines.append(f'campus_http_request_duration_seconds_count{{endpoint="{label}"}} {buckets[-1]}')
+        lines += prometheus_lines(
+            'campus_http_db_seconds_total', 'counter', 'Time requests spent executing SQL and fetching rows',
+            [({'endpoint': endpoint}, f'{spent[0]:.6f}') for endpoint, spent in sorted(endpoint_time.items())])
+        lines += prometheus_lines(
+            'campus_http_serialization_seconds_total', 'counter', 'Time requests spent encoding JSON',
+            [({'endpoint': endpoint}, f'{spent[1]:.6f}') for endpoint, spent in sorted(endpoint_time.items())])
+
+        by_id = sorted((fingerprint_id(text), text, totals) for text, totals in statements.items())
+        lines += prometheus_lines('campus_sql_statement_info', 'gauge', 'Normalized SQL text of each fingerprint',
+                                  [({'fingerprint': id_, 'statement': text}, 1) for id_, text, _ in by_id])
+        for name, index, help_text in (
+                ('campus_sql_executions_total', 0, 'Statement executions by fingerprint'),
+                ('campus_sql_errors_total', 1, 'Statement executions that raised an error'),
+                ('campus_sql_seconds_total', 2, 'Execute plus fetch time by fingerprint'),
+                ('campus_sql_rows_total', 3, 'Rows fetched by fingerprint')):
+            lines += prometheus_lines(name, 'counter', help_text,
+                                      [({'fingerprint': id_}, f'{totals[index]:.6f}' if index == 2 else totals[index])
+                                       for id_, _, totals in by_id])
+        lines += prometheus_lines('campus_sql_slow_statements_total', 'counter',
+                                  f'Statements slower than {self.slow_query_seconds}s', [({}, slow_statements)])
+        return lines
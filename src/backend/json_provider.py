@@ -0,0 +1,101 @@
+import datetime
+import decimal
+import json
+import os
+import sqlite3
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: `pip install orjson`; the stdlib encoder is used without it
+    orjson = None
+
+# 'orjson' or 'json' (stdlib); defaults to orjson when it is installed
+JSON_BACKEND = os.environ.get('JSON_BACKEND', 'orjson' if orjson is not None else 'json')
+
+
+class RowSet:
+    """Query results as plain tuples plus their column names
+
+    Serialized as a JSON array of objects, so views can hand the rows of a
+    tuple cursor to jsonify without building an intermediate dict per row.
+    """
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = rows
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        """Fetch the remaining rows of an executed tuple cursor"""
+        return cls([column[0] for column in cursor.description], cursor.fetchall())
+
+    def __len__(self):
+        return len(self.rows)
+
+    def as_dicts(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self.rows]
+
+
+def tuple_cursor(connection):
+    """A cursor returning plain tuples, whatever the connection's row_factory"""
+    cursor = connection.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def encode_default(obj):
+    """Encode the types neither encoder handles on its own"""
+    if isinstance(obj, RowSet):
+        return obj.as_dicts()
+    if isinstance(obj, sqlite3.Row):
+        return dict(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, (datetime.timedelta, decimal.Decimal)):
+        return str(obj)
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson when available
+
+    Dates and datetimes are written as ISO 8601, sqlite3.Row and RowSet as
+    objects. Responses are built from the encoded bytes directly. Options
+    orjson does not support (custom separators, cls, ...) fall back to
+    Flask's stdlib encoder.
+    """
+
+    def __init__(self, app, backend=JSON_BACKEND):
+        super().__init__(app)
+        if backend not in ('orjson', 'json'):
+            raise ValueError(f"Unknown JSON backend: {backend} (expected orjson or json)")
+        if backend == 'orjson' and orjson is None:
+            raise RuntimeError("JSON_BACKEND=orjson needs the orjson package (pip install orjson)")
+        self.backend = backend
+
+    def encode(self, obj, indent=None):
+        """Serialize obj to UTF-8 JSON bytes"""
+        if self.backend == 'orjson':
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=encode_default, option=option)
+        return json.dumps(obj, default=encode_default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                          indent=indent, separators=None if indent else (',', ':')).encode()
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            kwargs.setdefault('default', encode_default)
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        return self._app.response_class(self.encode(obj, indent) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,110 @@
+import re
+import sqlite3
+import sys
+
+from data_versions import COLLEGE_VERSIONS_SCHEMA
+from event_stats import EVENT_STATS_SCHEMA, REBUILD_STATEMENTS as EVENT_STATS_REBUILD
+from rollups import ROLLUP_SCHEMA
+from seats import EVENT_SEATS_SCHEMA, EVENT_SEATS_TRIGGERS, REBUILD_STATEMENTS as EVENT_SEATS_REBUILD
+from student_stats import STUDENT_STATS_SCHEMA, BACKFILL_STATEMENTS as STUDENT_STATS_BACKFILL
+
+# Ordered schema migrations for existing databases. The applied version is
+# tracked in PRAGMA user_version; every statement is idempotent so running a
+# migration against a database created from the current schema is harmless.
+MIGRATIONS = [
+    (1, 'Add secondary indexes for hot filter and join columns', [
+        "CREATE INDEX IF NOT EXISTS idx_events_college_date ON events (college_id, event_date)",
+        "CREATE INDEX IF NOT EXISTS idx_students_college_name ON students (college_id, student_name)",
+        "CREATE INDEX IF NOT EXISTS idx_registrations_event_registered ON event_registrations (event_id, student_id) WHERE status = 'registered'",
+        "CREATE INDEX IF NOT EXISTS idx_registrations_student_registered ON event_registrations (student_id, event_id) WHERE status = 'registered'",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_event_present ON attendance (event_id, student_id) WHERE status = 'present'",
+        "CREATE INDEX IF NOT EXISTS idx_attendance_student_present ON attendance (student_id, event_id) WHERE status = 'present'",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_event_rating ON feedback (event_id, rating)",
+    ]),
+    (2, 'Add trigger-maintained event_stats counters', EVENT_STATS_SCHEMA + EVENT_STATS_REBUILD),
+    (3, 'Add trigger-maintained student_stats counters', STUDENT_STATS_SCHEMA + STUDENT_STATS_BACKFILL),
+    (4, 'Add event_seats capacity counters and event_waitlist', EVENT_SEATS_SCHEMA + EVENT_SEATS_REBUILD),
+    (5, 'Add per-college rollup tables for reports', ROLLUP_SCHEMA),
+    (6, 'Maintain event_seats.seats_taken with registration triggers', EVENT_SEATS_TRIGGERS + EVENT_SEATS_REBUILD),
+    (7, 'Add trigger-maintained college_versions behind ETags', COLLEGE_VERSIONS_SCHEMA),
+]
+
+
+def get_schema_version(connection):
+    """Return the last migration version applied to the database"""
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+INDEX_NAME = re.compile(r'CREATE\s+INDEX\s+IF\s+NOT\s+EXISTS\s+(\w+)', re.IGNORECASE)
+
+
+def restore_missing_indexes(connection, verbose=True):
+    """Recreate the indexes of applied migrations that no longer exist
+
+    A roster import with deferred indexes that was killed before rebuilding
+    them leaves its table without them. Returns the names recreated.
+    """
+    current = get_schema_version(connection)
+    existing = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    missing = []
+    for version, _, statements in MIGRATIONS:
+        if version > current:
+            break
+        for statement in statements:
+            match = INDEX_NAME.search(statement)
+            if match and match.group(1) not in existing:
+                missing.append((match.group(1), statement))
+    if not missing:
+        return []
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        for _, statement in missing:
+            connection.execute(statement)
+        connection.execute("COMMIT")
+    except sqlite3.Error:
+        connection.execute("ROLLBACK")
+        raise
+    if verbose:
+        print(f"Recreated missing indexes: {', '.join(name for name, _ in missing)}")
+    return [name for name, _ in missing]
+
+
+def apply_migrations(connection, verbose=True):
+    """Apply all pending migrations, each in its own transaction
+
+    Also recreates any index of an applied migration that has gone missing.
+    Returns the list of migration versions that were applied.
+    """
+    current = get_schema_version(connection)
+    applied = []
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for statement in statements:
+                connection.execute(statement)
+            # PRAGMA does not accept bound parameters
+            connection.execute(f"PRAGMA user_version = {int(version)}")
+            connection.execute("COMMIT")
+        except sqlite3.Error:
+            connection.execute("ROLLBACK")
+            raise
+        if verbose:
+            print(f"Applied migration {version}: {description}")
+        applied.append(version)
+
+    restore_missing_indexes(connection, verbose)
+    return applied
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'src/backend/campus_events.db'
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        applied = apply_migrations(connection)
+        if not applied:
+            print(f"Database already at version {get_schema_version(connection)}")
+    finally:
+        connection.close()
@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+
+# Upper bound for ?limit= so a single page stays small
+MAX_PAGE_SIZE = 500
+
+
+def parse_limit(value, max_limit=MAX_PAGE_SIZE):
+    """Parse the ?limit= argument, or return None when pagination is not requested"""
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f"limit must be between 1 and {max_limit}")
+    return limit
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    payload = json.dumps(list(values), separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """Decode a cursor produced by encode_cursor into its key values
+
+    types holds the expected type of each key value, e.g. (str, int); a
+    cursor of another length or with values of other types is rejected.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    for value, expected in zip(values, types):
+        # JSON true/false decode to bool, which isinstance() accepts as int
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_fields(value, allowed):
+    """Parse a comma-separated ?fields= projection against the allowed field names
+
+    Returns the requested fields in request order, or all allowed fields
+    when no projection was given.
+    """
+    if not value:
+        return list(allowed)
+    fields = []
+    for field in value.split(','):
+        field = field.strip()
+        if not field:
+            continue
+        if field not in allowed:
+            raise ValueError(f"Unknown field: {field}")
+        if field not in fields:
+            fields.append(field)
+    if not fields:
+        raise ValueError("fields must name at least one field")
+    return fields
+
+
+def build_page(rows, columns, fields, limit, key_fields):
+    """Project rows onto fields and build the cursor for the following page
+
+    rows are tuples in `columns` order and should hold up to limit + 1
+    rows; the extra row only signals that another page exists. Returns
+    (item tuples in `fields` order, next_cursor).
+    """
+    columns = list(columns)
+    items = rows[:limit]
+    if list(fields) != columns:
+        indices = [columns.index(field) for field in fields]
+        items = [tuple([row[index] for index in indices]) for row in items]
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[columns.index(key)] for key in key_fields)
+    return items, next_cursor
@@ -0,0 +1,306 @@
+# Registry of the API's SQL statements. Every statement has a name and fixed
+# text: optional filters and pagination select between registered variants
+# instead of concatenating SQL per request, so each connection's sqlite3
+# statement cache (keyed by the exact text) is reused across requests.
+#
+# Each statement also records the EXPLAIN QUERY PLAN shape it is expected to
+# have; query_plans.py checks them all against the schema. 'indexes' must
+# all appear in the plan, 'no_scan' lists table aliases that must never be
+# read with a full table SCAN and 'no_sort' forbids a temp B-tree sort, i.e.
+# the ORDER BY must be satisfied by index order. 'params' are sample
+# arguments for the plan check.
+
+# Statements sqlite3 keeps prepared per connection when nothing else is
+# configured; the rest of the app (seats, checkin, rollups, roster imports)
+# uses fewer than this on top of the registry
+SQLITE_DEFAULT_CACHED_STATEMENTS = 128
+
+
+class Query:
+    """A named, parameterized statement and the plan it is expected to have"""
+    __slots__ = ('name', 'sql', 'params', 'indexes', 'no_scan', 'no_sort')
+
+    def __init__(self, name, sql, params=(), indexes=(), no_scan=(), no_sort=False):
+        self.name = name
+        self.sql = sql
+        self.params = tuple(params)
+        self.indexes = list(indexes)
+        self.no_scan = list(no_scan)
+        self.no_sort = no_sort
+
+    def __repr__(self):
+        return f"Query({self.name!r})"
+
+
+QUERIES = {}
+
+
+def register(name, sql, **expected):
+    if name in QUERIES:
+        raise ValueError(f"Query {name} is already registered")
+    QUERIES[name] = Query(name, sql, **expected)
+    return QUERIES[name]
+
+
+def statement(name):
+    """Return the SQL text of a registered statement"""
+    return QUERIES[name].sql
+
+
+# Events
+
+# Output columns of the event listing, in default output order
+EVENT_COLUMNS = {
+    'event_id': 'e.event_id',
+    'college_id': 'e.college_id',
+    'event_name': 'e.event_name',
+    'event_description': 'e.event_description',
+    'event_type_id': 'e.event_type_id',
+    'event_date': 'e.event_date',
+    'event_time': 'e.event_time',
+    'location': 'e.location',
+    'max_capacity': 'e.max_capacity',
+    'created_by': 'e.created_by',
+    'created_at': 'e.created_at',
+    'type_name': 'et.type_name',
+    'college_name': 'c.college_name',
+    'registration_count': 'COALESCE(es.registered, 0)',
+    'attendance_count': 'COALESCE(es.present, 0)',
+}
+
+_EVENTS_SELECT = "SELECT " + ", ".join(f"{expression} as {column}" for column, expression in EVENT_COLUMNS.items()) + """
+        FROM events e
+        JOIN event_types et ON e.event_type_id = et.type_id
+        JOIN colleges c ON e.college_id = c.college_id
+        LEFT JOIN event_stats es ON es.event_id = e.event_id
+        WHERE e.college_id = ?"""
+
+
+def events_query(by_type=False, after=False):
+    """Name of the event listing variant; parameters are college_id, [type_name], [event_date, event_id], limit
+
+    LIMIT -1 returns every row.
+    """
+    return 'events' + ('_by_type' if by_type else '') + ('_after' if after else '')
+
+
+for _by_type in (False, True):
+    for _after in (False, True):
+        register(
+            events_query(_by_type, _after),
+            _EVENTS_SELECT
+            + ("\n        AND e.event_type_id = (SELECT type_id FROM event_types WHERE type_name = ?)" if _by_type else "")
+            # Keyset pagination: continue strictly after the previous page's last row
+            + ("\n        AND (e.event_date, e.event_id) < (?, ?)" if _after else "")
+            + "\n        ORDER BY e.event_date DESC, e.event_id DESC\n        LIMIT ?\n        ",
+            params=(1,) + (('Workshop',) if _by_type else ()) + (('2024-03-01', 10) if _after else ()) + (51,),
+            indexes=['idx_events_college_date'],
+            no_scan=['e', 'es'],
+            no_sort=True,
+        )
+
+register('create_event', """
+        INSERT INTO events (college_id, event_name, event_description, event_type_id,
+                           event_date, event_time, location, max_capacity, created_by)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+         params=(1, 'Event', '', 1, '2024-03-01', '10:00:00', 'Hall', None, 'Admin'))
+
+register('event_college', "SELECT college_id FROM events WHERE event_id = ?",
+         params=(1,),
+         no_scan=['events'])
+
+register('event_types', "SELECT * FROM event_types ORDER BY type_name",
+         indexes=['sqlite_autoindex_event_types_1'],
+         no_sort=True)
+
+register('college_ids', "SELECT college_id FROM colleges ORDER BY college_id",
+         no_sort=True)
+
+# Students
+
+# Output columns of the student listing, in default output order
+STUDENT_COLUMNS = ('student_id', 'college_id', 'student_name', 'email', 'student_id_number', 'created_at')
+
+
+def students_query(after=False):
+    """Name of the student listing variant; parameters are college_id, [student_name, student_id], limit"""
+    return 'students_after' if after else 'students'
+
+
+for _after in (False, True):
+    register(
+        students_query(_after),
+        "SELECT " + ", ".join(STUDENT_COLUMNS) + """
+        FROM students WHERE college_id = ?"""
+        + ("\n        AND (student_name, student_id) > (?, ?)" if _after else "")
+        + "\n        ORDER BY student_name, student_id\n        LIMIT ?\n        ",
+        params=(1,) + (('Alice', 1) if _after else ()) + (51,),
+        indexes=['idx_students_college_name'],
+        no_scan=['students'],
+        no_sort=True,
+    )
+
+# Check-in and feedback (no row comes back if one already exists)
+
+register('insert_attendance', """
+        INSERT INTO attendance (event_id, student_id, status)
+        VALUES (?, ?, ?)
+        ON CONFLICT (event_id, student_id) DO NOTHING
+        RETURNING attendance_id
+        """,
+         params=(1, 1, 'present'))
+
+register('insert_feedback', """
+        INSERT INTO feedback (event_id, student_id, rating, comments)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (event_id, student_id) DO NOTHING
+        RETURNING feedback_id
+        """,
+         params=(1, 1, 5, ''))
+
+# Reports from the trigger-maintained counters
+
+# Counters come from event_stats, so the report costs one primary-key lookup per event
+register('event_popularity_report', """
+        SELECT e.event_name, et.type_name, e.event_date,
+               COALESCE(es.registered, 0) as total_registrations,
+               COALESCE(es.present, 0) as attendance_count,
+               ROUND((es.present * 100.0 / es.registered), 2) as attendance_percentage,
+               ROUND((es.rating_sum * 1.0 / es.rating_count), 2) as average_rating
+        FROM events e
+        JOIN event_types et ON e.event_type_id = et.type_id
+        LEFT JOIN event_stats es ON es.event_id = e.event_id
+        WHERE e.college_id = ?
+        ORDER BY total_registrations DESC
+        """,
+         params=(1,),
+         indexes=['idx_events_college_date'],
+         no_scan=['e', 'es'])
+
+_PARTICIPATION_SELECT = """
+        SELECT s.student_name, s.email,
+               ss.events_registered,
+               ss.events_attended,
+               ROUND((ss.events_attended * 100.0 / ss.events_registered), 2) as attendance_rate
+        FROM student_stats ss
+        JOIN students s ON s.student_id = ss.student_id"""
+
+register('student_participation_report', _PARTICIPATION_SELECT + """
+        WHERE ss.college_id = ?
+        ORDER BY ss.events_attended DESC
+        """,
+         params=(1,),
+         indexes=['idx_student_stats_leaderboard'],
+         no_scan=['ss', 's'])
+
+# Parameters are student_id, college_id
+register('student_participation_student', _PARTICIPATION_SELECT + """
+        WHERE ss.student_id = ? AND ss.college_id = ?
+        """,
+         params=(1, 1),
+         no_scan=['ss', 's'])
+
+# Walks idx_student_stats_leaderboard in order and stops after three rows
+register('top_active_students_report', _PARTICIPATION_SELECT + """
+        WHERE ss.college_id = ? AND ss.events_registered > 0
+        ORDER BY ss.events_attended DESC, ss.events_registered DESC
+        LIMIT 3
+        """,
+         params=(1,),
+         indexes=['idx_student_stats_leaderboard'],
+         no_scan=['ss', 's'],
+         no_sort=True)
+
+# Reports from the per-college rollups (already sorted by the rollup worker)
+
+register('rollup_computed_at', "SELECT computed_at FROM rollup_state WHERE college_id = ?",
+         params=(1,),
+         no_scan=['rollup_state'])
+
+register('event_popularity_rollup', """
+        SELECT event_name, type_name, event_date, total_registrations, attendance_count,
+               attendance_percentage, average_rating
+        FROM rollup_event_popularity
+        WHERE college_id = ?
+        ORDER BY position
+        """,
+         params=(1,),
+         indexes=['sqlite_autoindex_rollup_event_popularity_1'],
+         no_scan=['rollup_event_popularity'],
+         no_sort=True)
+
+_PARTICIPATION_ROLLUP_SELECT = """
+        SELECT student_name, email, events_registered, events_attended, attendance_rate
+        FROM rollup_student_participation"""
+
+register('student_participation_rollup', _PARTICIPATION_ROLLUP_SELECT + """
+        WHERE college_id = ?
+        ORDER BY position
+        """,
+         params=(1,),
+         indexes=['sqlite_autoindex_rollup_student_participation_1'],
+         no_scan=['rollup_student_participation'],
+         no_sort=True)
+
+register('student_participation_rollup_student', _PARTICIPATION_ROLLUP_SELECT + """
+        WHERE college_id = ? AND student_id = ?
+        """,
+         params=(1, 1),
+         indexes=['idx_rollup_participation_student'],
+         no_scan=['rollup_student_participation'])
+
+register('top_active_students_rollup', """
+        SELECT student_name, email, events_registered, events_attended, attendance_rate
+        FROM rollup_top_students
+        WHERE college_id = ?
+        ORDER BY position
+        LIMIT 3
+        """,
+         params=(1,),
+         indexes=['sqlite_autoindex_rollup_top_students_1'],
+         no_scan=['rollup_top_students'],
+         no_sort=True)
+
+register('summary_rating_histogram',
+         "SELECT type_id, rating, responses FROM rollup_rating_histogram WHERE college_id = ?",
+         params=(1,),
+         indexes=['sqlite_autoindex_rollup_rating_histogram_1'],
+         no_scan=['rollup_rating_histogram'])
+
+register('summary_event_types', "SELECT * FROM rollup_event_types WHERE college_id = ? ORDER BY type_id",
+         params=(1,),
+         indexes=['sqlite_autoindex_rollup_event_types_1'],
+         no_scan=['rollup_event_types'],
+         no_sort=True)
+
+# The last `days` days that have registrations, newest first; parameters are
+# college_id, the '-N days' date modifier, college_id
+register('summary_daily_registrations', """
+        SELECT day, type_id, registrations FROM rollup_daily_registrations
+        WHERE college_id = ?
+          AND day > (SELECT date(MAX(day), ?) FROM rollup_daily_registrations WHERE college_id = ?)
+        ORDER BY day DESC, type_id
+        """,
+         params=(1, '-30 days', 1),
+         indexes=['sqlite_autoindex_rollup_daily_registrations_1'],
+         no_scan=['rollup_daily_registrations'])
+
+register('summary_top_students', """
+        SELECT student_id, student_name, email, events_registered, events_attended, attendance_rate
+        FROM rollup_top_students WHERE college_id = ? ORDER BY position
+        """,
+         params=(1,),
+         indexes=['sqlite_autoindex_rollup_top_students_1'],
+         no_scan=['rollup_top_students'],
+         no_sort=True)
+
+# Row counts of one shard
+register('shard_counts', """
+        SELECT (SELECT COUNT(*) FROM events) as events,
+               (SELECT COUNT(*) FROM students) as students,
+               (SELECT COUNT(*) FROM event_registrations WHERE status = 'registered') as registrations
+        """)
+
+# The registry's statements stay prepared on top of sqlite3's default cache size
+STATEMENT_CACHE_SIZE = SQLITE_DEFAULT_CACHED_STATEMENTS + len(QUERIES)
@@ -0,0 +1,89 @@
+import argparse
+import os
+import sqlite3
+import sys
+
+from migrations import apply_migrations
+from queries import QUERIES, STATEMENT_CACHE_SIZE
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           '..', '..', 'database', 'database_schema_sqlite.sql')
+
+
+def explain(connection, sql, params=()):
+    """Return the detail lines of EXPLAIN QUERY PLAN for a statement"""
+    return [row[3] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def check_plan(connection, query):
+    """Return a list of problems with one registered query's plan (empty when it is as expected)"""
+    plan = explain(connection, query.sql, query.params)
+    problems = []
+
+    for index in query.indexes:
+        if not any(index in line for line in plan):
+            problems.append(f"{query.name}: index {index} not used")
+
+    for alias in query.no_scan:
+        for line in plan:
+            # e.g. "SCAN e" or "SCAN students"; "SCAN e USING INDEX ..." is still a full scan
+            if line == f"SCAN {alias}" or line.startswith(f"SCAN {alias} "):
+                problems.append(f"{query.name}: full scan of {alias} ({line})")
+
+    if query.no_sort:
+        for line in plan:
+            if line.startswith('USE TEMP B-TREE'):
+                problems.append(f"{query.name}: sorts instead of using index order ({line})")
+
+    return problems
+
+
+def create_reference_database():
+    """Build an empty in-memory database from the schema plus all migrations
+
+    The planner has no ANALYZE statistics here, so plans depend only on the
+    available indexes and are stable between runs.
+    """
+    connection = sqlite3.connect(':memory:', isolation_level=None)
+    with open(SCHEMA_PATH, 'r') as f:
+        connection.executescript(f.read())
+    apply_migrations(connection, verbose=False)
+    return connection
+
+
+def check_query_plans(connection=None, cached_statements=STATEMENT_CACHE_SIZE):
+    """Check the plan of every registered query and return the list of regressions
+
+    cached_statements is the statement cache size the pools are configured
+    with (DB_STATEMENT_CACHE_SIZE); a registry that outgrows it is reported
+    because its statements would be re-prepared on every request.
+    """
+    if connection is None:
+        connection = create_reference_database()
+    problems = []
+    for query in QUERIES.values():
+        problems.extend(check_plan(connection, query))
+    if len(QUERIES) > cached_statements:
+        problems.append(f"{len(QUERIES)} registered queries do not fit the {cached_statements}-statement cache")
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check the EXPLAIN QUERY PLAN of every registered query")
+    parser.add_argument('--show', action='store_true', help='print each query\'s plan')
+    parser.add_argument('--cached-statements', type=int,
+                        default=int(os.environ.get('DB_STATEMENT_CACHE_SIZE', STATEMENT_CACHE_SIZE)),
+                        help='statement cache size of the pooled connections (default: DB_STATEMENT_CACHE_SIZE)')
+    args = parser.parse_args()
+    if args.show:
+        connection = create_reference_database()
+        for query in QUERIES.values():
+            print(query.name)
+            for line in explain(connection, query.sql, query.params) or ['(no plan)']:
+                print(f"    {line}")
+    problems = check_query_plans(cached_statements=args.cached_statements)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"All {len(QUERIES)} query plans use their expected indexes")
@@ -0,0 +1,128 @@
+import json
+
+from seats import WAITLISTED
+
+# Per-item outcomes of a bulk registration
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+REJECTED = 'rejected'
+
+
+def parse_registration_items(items):
+    """Validate bulk registration items
+
+    Accepts [{"event_id": 1, "student_id": 2}, ...] or [[1, 2], ...].
+    Returns a list of (event_id, student_id, error) tuples in request order;
+    error is None for well-formed items.
+    """
+    parsed = []
+    for item in items:
+        if isinstance(item, dict):
+            event_id, student_id = item.get('event_id'), item.get('student_id')
+        elif isinstance(item, (list, tuple)) and len(item) == 2:
+            event_id, student_id = item
+        else:
+            parsed.append((None, None, 'Expected {"event_id", "student_id"} or [event_id, student_id]'))
+            continue
+
+        if not isinstance(event_id, int) or isinstance(event_id, bool) \
+                or not isinstance(student_id, int) or isinstance(student_id, bool):
+            parsed.append((event_id, student_id, 'event_id and student_id must be integers'))
+        else:
+            parsed.append((event_id, student_id, None))
+    return parsed
+
+
+def bulk_register(connection, items):
+    """Register many (event_id, student_id) pairs in a single write transaction
+
+    Unknown events or students are rejected, pairs that are already
+    registered (or repeated in the batch) are reported as duplicates, and
+    the rest are inserted with one executemany until each event's capacity
+    is reached; the overflow goes to the event's waitlist. Returns (results,
+    college_ids) where results holds one dict per item in request order and
+    college_ids is the set of colleges that received new registrations.
+    """
+    parsed = parse_registration_items(items)
+    pairs = [[event_id, student_id] for event_id, student_id, error in parsed if error is None]
+
+    # BEGIN IMMEDIATE takes the write lock up front, so nothing can register
+    # the same pairs between the duplicate check and the insert
+    connection.execute("BEGIN IMMEDIATE")
+
+    event_ids = json.dumps(sorted({pair[0] for pair in pairs}))
+    event_colleges = dict(connection.execute(
+        "SELECT event_id, college_id FROM events WHERE event_id IN (SELECT value FROM json_each(?))",
+        (event_ids,)
+    ).fetchall())
+    # Free seats per event (None = unlimited); safe to read-then-update under the write lock
+    free_seats = {event_id: None if capacity is None else capacity - seats_taken
+                  for event_id, capacity, seats_taken in connection.execute(
+                      "SELECT event_id, capacity, seats_taken FROM event_seats "
+                      "WHERE event_id IN (SELECT value FROM json_each(?))",
+                      (event_ids,))}
+    known_students = {row[0] for row in connection.execute(
+        "SELECT student_id FROM students WHERE student_id IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted({pair[1] for pair in pairs})),)
+    )}
+    existing = {tuple(row) for row in connection.execute(
+        """
+        SELECT er.event_id, er.student_id
+        FROM json_each(?) p
+        JOIN event_registrations er
+          ON er.event_id = json_extract(p.value, '$[0]') AND er.student_id = json_extract(p.value, '$[1]')
+        WHERE er.status = 'registered'
+        """,
+        (json.dumps(pairs),)
+    )}
+
+    results = []
+    to_insert = []
+    to_waitlist = []
+    seen = set()
+    for event_id, student_id, error in parsed:
+        result = {'event_id': event_id, 'student_id': student_id}
+        if error is None and event_id not in event_colleges:
+            error = 'Event not found'
+        if error is None and student_id not in known_students:
+            error = 'Student not found'
+
+        if error is not None:
+            result.update(status=REJECTED, error=error)
+        elif (event_id, student_id) in existing or (event_id, student_id) in seen:
+            result['status'] = DUPLICATE
+        elif free_seats.get(event_id) is not None and free_seats[event_id] <= 0:
+            result['status'] = WAITLISTED
+            to_waitlist.append((event_id, student_id))
+        else:
+            result['status'] = CREATED
+            to_insert.append((event_id, student_id))
+            if free_seats.get(event_id) is not None:
+                free_seats[event_id] -= 1
+        seen.add((event_id, student_id))
+        results.append(result)
+
+    # Cancelled registrations are re-activated rather than reported as duplicates
+    connection.executemany(
+        """
+        INSERT INTO event_registrations (event_id, student_id)
+        VALUES (?, ?)
+        ON CONFLICT (event_id, student_id) DO UPDATE
+        SET status = 'registered', registration_date = CURRENT_TIMESTAMP
+        WHERE status = 'cancelled'
+        """,
+        to_insert
+    )
+    connection.executemany("DELETE FROM event_waitlist WHERE event_id = ? AND student_id = ?", to_insert)
+    connection.executemany(
+        """
+        INSERT INTO event_waitlist (event_id, student_id)
+        VALUES (?, ?)
+        ON CONFLICT (event_id, student_id) DO NOTHING
+        """,
+        to_waitlist
+    )
+    connection.commit()
+
+    college_ids = {event_colleges[event_id] for event_id, _ in to_insert}
+    return results, college_ids
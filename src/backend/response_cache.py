@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Thread-safe in-process cache of serialized responses
+
+    Entries expire after ttl seconds and the least recently used ones are
+    evicted once max_entries or max_bytes is exceeded. Each entry is tagged
+    with the college it was computed for so writes can invalidate just that
+    college; entries tagged None hold cross-college data and only expire.
+    """
+
+    def __init__(self, ttl=60.0, max_entries=1024, max_bytes=16 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (payload, college_id, expires_at)
+        self._by_college = {}           # college_id -> set of keys
+        self._bytes = 0
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        """Return the cached payload for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            payload, _, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return payload
+
+    def set(self, key, payload, college_id=None):
+        """Store a payload, evicting least recently used entries to stay within limits"""
+        if not self.enabled or len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, college_id, time.monotonic() + self.ttl)
+            self._by_college.setdefault(college_id, set()).add(key)
+            self._bytes += len(payload)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate_college(self, college_id):
+        """Drop every entry computed for one college"""
+        with self._lock:
+            keys = self._by_college.pop(college_id, set())
+            for key in keys:
+                self._remove(key, untag=False)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_college.clear()
+            self._bytes = 0
+
+    def _remove(self, key, untag=True):
+        """Remove one entry; caller must hold the lock"""
+        payload, college_id, _ = self._entries.pop(key)
+        self._bytes -= len(payload)
+        if untag:
+            keys = self._by_college.get(college_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_college[college_id]
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'ttl_seconds': self.ttl,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'expirations': self._expirations,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
@@ -0,0 +1,340 @@
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from db_tuning import DatabaseBusyError, retry_on_busy
+
+# Precomputed per-college summaries for the report routes. Each table is
+# rebuilt one college at a time by RollupEngine, so serving a report is a
+# range read on the rollup's primary key however much history the college
+# has. rollup_state records when each college was last computed.
+ROLLUP_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        college_id INTEGER PRIMARY KEY,
+        computed_at TEXT NOT NULL,
+        duration_ms REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_daily_registrations (
+        college_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        type_id INTEGER NOT NULL,
+        registrations INTEGER NOT NULL,
+        PRIMARY KEY (college_id, day, type_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_event_types (
+        college_id INTEGER NOT NULL,
+        type_id INTEGER NOT NULL,
+        type_name TEXT NOT NULL,
+        events INTEGER NOT NULL,
+        registrations INTEGER NOT NULL,
+        attendance INTEGER NOT NULL,
+        attendance_rate REAL,
+        rating_count INTEGER NOT NULL,
+        average_rating REAL,
+        PRIMARY KEY (college_id, type_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_rating_histogram (
+        college_id INTEGER NOT NULL,
+        type_id INTEGER NOT NULL,
+        rating INTEGER NOT NULL,
+        responses INTEGER NOT NULL,
+        PRIMARY KEY (college_id, type_id, rating)
+    )
+    """,
+    # Report rows in the order the report serves them
+    """
+    CREATE TABLE IF NOT EXISTS rollup_event_popularity (
+        college_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        event_id INTEGER NOT NULL,
+        event_name TEXT,
+        type_name TEXT,
+        event_date DATE,
+        total_registrations INTEGER,
+        attendance_count INTEGER,
+        attendance_percentage REAL,
+        average_rating REAL,
+        PRIMARY KEY (college_id, position)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rollup_student_participation (
+        college_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        student_name TEXT,
+        email TEXT,
+        events_registered INTEGER,
+        events_attended INTEGER,
+        attendance_rate REAL,
+        PRIMARY KEY (college_id, position)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_rollup_participation_student ON rollup_student_participation (college_id, student_id)",
+    """
+    CREATE TABLE IF NOT EXISTS rollup_top_students (
+        college_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        student_name TEXT,
+        email TEXT,
+        events_registered INTEGER,
+        events_attended INTEGER,
+        attendance_rate REAL,
+        PRIMARY KEY (college_id, position)
+    )
+    """,
+]
+
+ROLLUP_TABLES = ('rollup_daily_registrations', 'rollup_event_types', 'rollup_rating_histogram',
+                 'rollup_event_popularity', 'rollup_student_participation', 'rollup_top_students')
+
+# Each statement fills one rollup table for the college bound to :college_id
+REFRESH_STATEMENTS = [
+    """
+    INSERT INTO rollup_daily_registrations (college_id, day, type_id, registrations)
+    SELECT e.college_id, date(er.registration_date), e.event_type_id, COUNT(*)
+    FROM events e
+    JOIN event_registrations er ON er.event_id = e.event_id AND er.status = 'registered'
+    WHERE e.college_id = :college_id
+    GROUP BY date(er.registration_date), e.event_type_id
+    """,
+    """
+    INSERT INTO rollup_event_types (college_id, type_id, type_name, events, registrations, attendance,
+                                    attendance_rate, rating_count, average_rating)
+    SELECT e.college_id, et.type_id, et.type_name, COUNT(*),
+           COALESCE(SUM(es.registered), 0), COALESCE(SUM(es.present), 0),
+           ROUND(SUM(es.present) * 100.0 / NULLIF(SUM(es.registered), 0), 2),
+           COALESCE(SUM(es.rating_count), 0),
+           ROUND(SUM(es.rating_sum) * 1.0 / NULLIF(SUM(es.rating_count), 0), 2)
+    FROM events e
+    JOIN event_types et ON et.type_id = e.event_type_id
+    LEFT JOIN event_stats es ON es.event_id = e.event_id
+    WHERE e.college_id = :college_id
+    GROUP BY et.type_id
+    """,
+    """
+    INSERT INTO rollup_rating_histogram (college_id, type_id, rating, responses)
+    SELECT e.college_id, e.event_type_id, f.rating, COUNT(*)
+    FROM events e
+    JOIN feedback f ON f.event_id = e.event_id
+    WHERE e.college_id = :college_id
+    GROUP BY e.event_type_id, f.rating
+    """,
+    """
+    INSERT INTO rollup_event_popularity (college_id, position, event_id, event_name, type_name, event_date,
+                                         total_registrations, attendance_count, attendance_percentage,
+                                         average_rating)
+    SELECT e.college_id,
+           ROW_NUMBER() OVER (ORDER BY COALESCE(es.registered, 0) DESC, e.event_id),
+           e.event_id, e.event_name, et.type_name, e.event_date,
+           COALESCE(es.registered, 0), COALESCE(es.present, 0),
+           ROUND((es.present * 100.0 / es.registered), 2),
+           ROUND((es.rating_sum * 1.0 / es.rating_count), 2)
+    FROM events e
+    JOIN event_types et ON e.event_type_id = et.type_id
+    LEFT JOIN event_stats es ON es.event_id = e.event_id
+    WHERE e.college_id = :college_id
+    """,
+    """
+    INSERT INTO rollup_student_participation (college_id, position, student_id, student_name, email,
+                                              events_registered, events_attended, attendance_rate)
+    SELECT ss.college_id,
+           ROW_NUMBER() OVER (ORDER BY ss.events_attended DESC, ss.events_registered DESC, ss.student_id),
+           ss.student_id, s.student_name, s.email, ss.events_registered, ss.events_attended,
+           ROUND((ss.events_attended * 100.0 / ss.events_registered), 2)
+    FROM student_stats ss
+    JOIN students s ON s.student_id = ss.student_id
+    WHERE ss.college_id = :college_id
+    """,
+    """
+    INSERT INTO rollup_top_students (college_id, position, student_id, student_name, email,
+                                     events_registered, events_attended, attendance_rate)
+    SELECT ss.college_id,
+           ROW_NUMBER() OVER (ORDER BY ss.events_attended DESC, ss.events_registered DESC, ss.student_id),
+           ss.student_id, s.student_name, s.email, ss.events_registered, ss.events_attended,
+           ROUND((ss.events_attended * 100.0 / ss.events_registered), 2)
+    FROM student_stats ss
+    JOIN students s ON s.student_id = ss.student_id
+    WHERE ss.college_id = :college_id AND ss.events_registered > 0
+    ORDER BY ss.events_attended DESC, ss.events_registered DESC, ss.student_id
+    LIMIT :top_students
+    """,
+]
+
+
+def refresh_college(connection, college_id, top_students=10):
+    """Recompute every rollup of one college (run inside a transaction)
+
+    Returns the computed_at timestamp written to rollup_state.
+    """
+    start = time.perf_counter()
+    params = {'college_id': college_id, 'top_students': top_students}
+    for table in ROLLUP_TABLES:
+        connection.execute(f"DELETE FROM {table} WHERE college_id = ?", (college_id,))
+    for statement in REFRESH_STATEMENTS:
+        connection.execute(statement, params)
+    computed_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    connection.execute(
+        """
+        INSERT INTO rollup_state (college_id, computed_at, duration_ms) VALUES (?, ?, ?)
+        ON CONFLICT (college_id) DO UPDATE SET computed_at = excluded.computed_at, duration_ms = excluded.duration_ms
+        """,
+        (college_id, computed_at, round((time.perf_counter() - start) * 1000, 3))
+    )
+    return computed_at
+
+
+class RollupEngine:
+    """Background worker that keeps the rollup tables current
+
+    Writes mark their college dirty; every `interval` seconds the worker
+    recomputes just the dirty colleges, and every `full_refresh_interval`
+    seconds all of them, which also picks up writes made by other processes.
+    connection_for(college_id) must return a context manager yielding a
+    connection to the database holding that college; colleges() lists the
+    colleges to refresh. on_refresh(college_id, computed_at) is called after
+    each committed refresh, e.g. to invalidate cached responses.
+    """
+
+    def __init__(self, connection_for, colleges, interval=5.0, full_refresh_interval=300.0,
+                 top_students=10, on_refresh=None, busy_retries=5):
+        self.connection_for = connection_for
+        self.colleges = colleges
+        self.interval = interval
+        self.full_refresh_interval = full_refresh_interval
+        self.top_students = top_students
+        self.on_refresh = on_refresh
+
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._computed_at = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_full_refresh = 0.0
+        self._refresh = retry_on_busy(retries=busy_retries)(self._refresh)
+
+        # Metrics
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._last_refresh_seconds = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Load the stored computed_at of every college and start the worker thread"""
+        if self.running:
+            return
+        for college_id in self.colleges():
+            with self.connection_for(college_id) as connection:
+                row = connection.execute(
+                    "SELECT computed_at FROM rollup_state WHERE college_id = ?", (college_id,)).fetchone()
+            if row is None:
+                self.mark_dirty(college_id)
+            else:
+                self._computed_at[college_id] = row[0]
+        # Stored rollups may predate writes from before this start, so refresh them all soon
+        self._last_full_refresh = time.monotonic() - self.full_refresh_interval + self.interval
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='rollup-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def mark_dirty(self, college_id):
+        """Queue a college for the next refresh"""
+        with self._lock:
+            self._dirty.add(int(college_id))
+
+    def computed_at(self, college_id):
+        """When the college's served rollups were computed, or None before the first refresh"""
+        try:
+            return self._computed_at.get(int(college_id))
+        except (TypeError, ValueError):
+            return None
+
+    def _refresh(self, college_id):
+        with self.connection_for(college_id) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                computed_at = refresh_college(connection, college_id, self.top_students)
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+        return computed_at
+
+    def refresh(self, college_id):
+        """Recompute one college now; returns its new computed_at"""
+        start = time.perf_counter()
+        computed_at = self._refresh(int(college_id))
+        self._computed_at[int(college_id)] = computed_at
+        self._refreshes += 1
+        self._last_refresh_seconds = time.perf_counter() - start
+        if self.on_refresh:
+            self.on_refresh(int(college_id), computed_at)
+        return computed_at
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                pending, self._dirty = self._dirty, set()
+            if time.monotonic() - self._last_full_refresh >= self.full_refresh_interval:
+                try:
+                    pending.update(self.colleges())
+                    self._last_full_refresh = time.monotonic()
+                except sqlite3.Error as e:
+                    print(f"Rollup refresh could not list colleges: {e}")
+            for college_id in sorted(pending):
+                if self._stop.is_set():
+                    break
+                try:
+                    self.refresh(college_id)
+                except (sqlite3.Error, DatabaseBusyError, LookupError) as e:
+                    self._refresh_failures += 1
+                    self.mark_dirty(college_id)
+                    print(f"Rollup refresh of college {college_id} failed: {e}")
+
+    def stats(self):
+        """Return refresh counters and the age of each college's rollups"""
+        with self._lock:
+            dirty = sorted(self._dirty)
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'full_refresh_interval_seconds': self.full_refresh_interval,
+            'refreshes': self._refreshes,
+            'refresh_failures': self._refresh_failures,
+            'last_refresh_ms': round(self._last_refresh_seconds * 1000, 3),
+            'dirty_colleges': dirty,
+            'computed_at': {str(college_id): computed_at for college_id, computed_at in sorted(self._computed_at.items())},
+        }
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'src/backend/campus_events.db'
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        colleges = [row[0] for row in connection.execute("SELECT college_id FROM colleges ORDER BY college_id")]
+        for college_id in colleges:
+            connection.execute("BEGIN IMMEDIATE")
+            computed_at = refresh_college(connection, college_id)
+            connection.execute("COMMIT")
+            print(f"College {college_id}: rollups computed at {computed_at}")
+    finally:
+        connection.close()
@@ -0,0 +1,386 @@
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from db_tuning import retry_on_busy
+
+# Rows validated and inserted per write transaction
+IMPORT_BATCH_SIZE = 1000
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Columns written per kind, in INSERT order; unknown input columns are ignored
+IMPORT_COLUMNS = {
+    'students': ('college_id', 'student_name', 'email', 'student_id_number'),
+    'events': ('college_id', 'event_name', 'event_description', 'event_type_id', 'event_date', 'event_time',
+               'location', 'max_capacity', 'created_by'),
+}
+
+INSERT_SQL = {
+    kind: f"INSERT INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    for kind, columns in IMPORT_COLUMNS.items()
+}
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+class RosterImportError(ValueError):
+    """Raised for an import that cannot start (unknown kind or format)"""
+
+
+def detect_format(filename):
+    """csv or ndjson from a file name's extension, None when it says neither"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.ndjson', '.jsonl'):
+        return 'ndjson'
+    return None
+
+
+def read_records(f, file_format):
+    """Yield (line, record, error) for every row of a text file, one row at a time
+
+    record is a dict of the row's fields (CSV empty cells become None);
+    error is set for rows that could not be parsed at all.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(f, restkey='_extra')
+        for record in reader:
+            record = {key.strip() if isinstance(key, str) else key: value if value != '' else None
+                      for key, value in record.items()}
+            yield reader.line_num, record, 'Too many fields' if record.pop('_extra', None) else None
+    elif file_format == 'ndjson':
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                yield line, {'_raw': text.rstrip('\n')}, f'Invalid JSON: {e}'
+                continue
+            if isinstance(record, dict):
+                yield line, record, None
+            else:
+                yield line, {'_raw': text.rstrip('\n')}, 'Expected a JSON object'
+    else:
+        raise RosterImportError(f"Unknown import format: {file_format} (expected csv or ndjson)")
+
+
+def _text(record, name, errors, required=True):
+    value = record.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            errors.append(f'{name} is required')
+        return None
+    if not isinstance(value, str):
+        errors.append(f'{name} must be text')
+        return None
+    return value.strip()
+
+
+def _integer(record, name, errors, required=True):
+    value = record.get(name)
+    if value is None:
+        if required:
+            errors.append(f'{name} is required')
+        return None
+    if isinstance(value, str) and re.fullmatch(r'\s*-?\d+\s*', value):
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        errors.append(f'{name} must be an integer')
+        return None
+    return value
+
+
+def _timestamp(record, name, errors, formats):
+    value = _text(record, name, errors)
+    if value is None:
+        return None
+    for pattern in formats:
+        try:
+            return datetime.strptime(value, pattern)
+        except ValueError:
+            pass
+    errors.append(f'{name} must look like {datetime(2024, 3, 1, 10).strftime(formats[0])}')
+    return None
+
+
+def parse_student(record, college_id, event_types):
+    """Field-level checks for a student row; returns (values, errors)"""
+    errors = []
+    values = (
+        _integer(record, 'college_id', errors, required=college_id is None),
+        _text(record, 'student_name', errors),
+        _text(record, 'email', errors),
+        _text(record, 'student_id_number', errors),
+    )
+    if values[2] is not None and not EMAIL_PATTERN.match(values[2]):
+        errors.append('email is not a valid address')
+    return values, errors
+
+
+def parse_event(record, college_id, event_types):
+    """Field-level checks for an event row; returns (values, errors)
+
+    The type is given as event_type_id or by name as event_type.
+    """
+    errors = []
+    if record.get('event_type_id') is None and record.get('event_type') is not None:
+        type_name = _text(record, 'event_type', errors)
+        type_id = event_types.get(type_name.lower()) if type_name else None
+        if type_name and type_id is None:
+            errors.append(f'Unknown event_type: {type_name}')
+    else:
+        type_id = _integer(record, 'event_type_id', errors)
+        if type_id is not None and type_id not in event_types.values():
+            errors.append(f'Unknown event_type_id: {type_id}')
+
+    event_date = _timestamp(record, 'event_date', errors, ('%Y-%m-%d',))
+    event_time = _timestamp(record, 'event_time', errors, ('%H:%M:%S', '%H:%M'))
+    max_capacity = _integer(record, 'max_capacity', errors, required=False)
+    if max_capacity is not None and max_capacity < 0:
+        errors.append('max_capacity must not be negative')
+    values = (
+        _integer(record, 'college_id', errors, required=college_id is None),
+        _text(record, 'event_name', errors),
+        _text(record, 'event_description', errors, required=False),
+        type_id,
+        event_date.strftime('%Y-%m-%d') if event_date else None,
+        event_time.strftime('%H:%M:%S') if event_time else None,
+        _text(record, 'location', errors, required=False),
+        max_capacity,
+        _text(record, 'created_by', errors),
+    )
+    return values, errors
+
+
+PARSERS = {'students': parse_student, 'events': parse_event}
+
+
+def _existing(connection, sql, values):
+    """Run a lookup query over a JSON array of values; returns the set of matching rows"""
+    return {tuple(row) if len(row) > 1 else row[0] for row in connection.execute(sql, (json.dumps(values),))}
+
+
+def _check_batch(connection, kind, batch):
+    """Database checks for one batch, run inside its write transaction
+
+    batch holds (line, record, values, errors) entries that passed the field
+    checks; errors is extended in place. Students must be new by email and
+    by (college_id, student_id_number), including within the batch.
+    """
+    known_colleges = _existing(connection, "SELECT college_id FROM colleges WHERE college_id IN "
+                                           "(SELECT value FROM json_each(?))",
+                               sorted({entry[2][0] for entry in batch}))
+    if kind == 'students':
+        taken_emails = _existing(connection, "SELECT email FROM students WHERE email IN "
+                                             "(SELECT value FROM json_each(?))",
+                                 sorted({entry[2][2] for entry in batch}))
+        taken_numbers = _existing(connection, """
+            SELECT s.college_id, s.student_id_number
+            FROM json_each(?) p
+            JOIN students s
+              ON s.college_id = json_extract(p.value, '$[0]') AND s.student_id_number = json_extract(p.value, '$[1]')
+            """, sorted({(entry[2][0], entry[2][3]) for entry in batch}))
+
+    for line, record, values, errors in batch:
+        if values[0] not in known_colleges:
+            errors.append(f'Unknown college_id: {values[0]}')
+        if kind == 'students':
+            if values[2] in taken_emails:
+                errors.append(f'email already exists: {values[2]}')
+            if (values[0], values[3]) in taken_numbers:
+                errors.append(f'student_id_number already exists in college {values[0]}: {values[3]}')
+            # Later rows of the batch see the earlier ones as existing
+            taken_emails.add(values[2])
+            taken_numbers.add((values[0], values[3]))
+
+
+def _write_batch(connection, kind, batch):
+    """Check and insert one batch in a single transaction; returns the inserted entries"""
+    for entry in batch:
+        entry[3].clear()  # left over from an attempt that hit a busy database
+    # BEGIN IMMEDIATE takes the write lock up front, so the duplicate checks stay valid until the insert
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        _check_batch(connection, kind, batch)
+        accepted = [entry for entry in batch if not entry[3]]
+        connection.executemany(INSERT_SQL[kind], [entry[2] for entry in accepted])
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    return accepted
+
+
+def drop_deferrable_indexes(connection, kind):
+    """Drop the plain secondary indexes of a table; returns their CREATE statements for restore_indexes"""
+    indexes = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL "
+        "AND sql NOT LIKE 'CREATE UNIQUE%'",
+        (kind,)
+    ).fetchall()
+    for name, _ in indexes:
+        connection.execute(f"DROP INDEX IF EXISTS {name}")
+    connection.commit()
+    return [sql for _, sql in indexes]
+
+
+def restore_indexes(connection, statements):
+    for sql in statements:
+        connection.execute(sql)
+    connection.commit()
+
+
+def import_records(connection, kind, records, college_id=None, batch_size=IMPORT_BATCH_SIZE,
+                   defer_indexes=False, on_reject=None, on_commit=None, busy_retries=5):
+    """Validate and insert rows from read_records() in batches of batch_size
+
+    Every batch is checked and inserted with one executemany in its own
+    transaction, so a large file never holds the write lock for long and a
+    failure keeps the batches already committed. Rejected rows are skipped
+    and passed to on_reject(line, record, errors) in file order, one batch
+    at a time. on_commit(college_id) is called for every college that
+    received rows, after each batch commits.
+
+    college_id fills in rows without one and rejects rows of other colleges.
+    defer_indexes drops the table's plain secondary indexes for the duration
+    and rebuilds each once at the end, which pays off for loads that are
+    large compared to the table; readers see full scans meanwhile, so it is
+    meant for offline loads (apply_migrations recreates indexes a killed
+    import left dropped).
+
+    Returns a summary dict with the counts, the colleges that received rows
+    and the throughput.
+    """
+    if kind not in PARSERS:
+        raise RosterImportError(f"Unknown import kind: {kind} (expected students or events)")
+    start = time.perf_counter()
+    parse = PARSERS[kind]
+    event_types = {name.lower(): type_id for type_id, name in connection.execute(
+        "SELECT type_id, type_name FROM event_types")}
+    write_batch = retry_on_busy(retries=busy_retries, on_retry=connection.rollback)(_write_batch)
+    summary = {'kind': kind, 'rows': 0, 'imported': 0, 'rejected': 0, 'batches': 0}
+    college_ids = set()
+
+    def flush(batch, rejected):
+        if batch:
+            accepted = write_batch(connection, kind, batch)
+            summary['batches'] += 1
+            summary['imported'] += len(accepted)
+            batch_college_ids = {entry[2][0] for entry in accepted}
+            college_ids.update(batch_college_ids)
+            if on_commit:
+                for changed_college_id in sorted(batch_college_ids):
+                    on_commit(changed_college_id)
+            rejected = sorted(rejected + [(line, record, errors) for line, record, _, errors in batch if errors],
+                              key=lambda rejection: rejection[0])
+        summary['rejected'] += len(rejected)
+        if on_reject:
+            for line, record, errors in rejected:
+                on_reject(line, record, errors)
+
+    deferred = drop_deferrable_indexes(connection, kind) if defer_indexes else []
+    try:
+        batch, rejected = [], []
+        for line, record, error in records:
+            summary['rows'] += 1
+            if error:
+                rejected.append((line, record, [error]))
+                continue
+            values, errors = parse(record, college_id, event_types)
+            if college_id is not None:
+                if values[0] is None:
+                    values = (int(college_id),) + values[1:]
+                elif values[0] != int(college_id):
+                    errors.append(f'college_id {values[0]} does not match the import college {college_id}')
+            if errors:
+                rejected.append((line, record, errors))
+            else:
+                batch.append((line, record, values, []))
+            if len(batch) + len(rejected) >= batch_size:
+                flush(batch, rejected)
+                batch, rejected = [], []
+        flush(batch, rejected)
+    finally:
+        if deferred:
+            restore_indexes(connection, deferred)
+
+    seconds = time.perf_counter() - start
+    summary.update(
+        college_ids=sorted(college_ids),
+        deferred_indexes=len(deferred),
+        seconds=round(seconds, 3),
+        rows_per_second=round(summary['rows'] / seconds) if seconds else None,
+    )
+    return summary
+
+
+class RejectWriter:
+    """Write rejected rows to a CSV or NDJSON report file
+
+    CSV reports repeat the input columns after _line and _errors, so the
+    file can be corrected and imported again (the extra columns are ignored).
+    NDJSON reports hold one {"line", "errors", "row"} object per rejected row.
+    """
+
+    def __init__(self, f, file_format):
+        self.f = f
+        self.file_format = file_format
+        self._writer = None
+
+    def __call__(self, line, record, errors):
+        if self.file_format == 'ndjson':
+            self.f.write(json.dumps({'line': line, 'errors': errors, 'row': record}, default=str) + '\n')
+            return
+        if self._writer is None:
+            self._writer = csv.DictWriter(self.f, ['_line', '_errors'] + [key for key in record if key != '_raw'],
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow(dict(record, _line=line, _errors='; '.join(errors)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import students or events from a CSV or NDJSON file')
+    parser.add_argument('kind', choices=list(IMPORT_COLUMNS))
+    parser.add_argument('input', help='CSV or NDJSON file')
+    parser.add_argument('--db', default='src/backend/campus_events.db')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='default: from the file extension')
+    parser.add_argument('--college-id', type=int, help='college of rows without a college_id column')
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument('--defer-indexes', action='store_true',
+                        help='drop secondary indexes during the import and rebuild them at the end '
+                             '(offline loads only: other clients scan the table meanwhile)')
+    parser.add_argument('--rejects', help='write rejected rows to this .csv or .ndjson file (default: <input>.rejects.<input ext>)')
+    args = parser.parse_args()
+
+    file_format = args.format or detect_format(args.input)
+    if file_format is None:
+        print(f"Cannot tell the format of {args.input}; pass --format csv or --format ndjson")
+        sys.exit(2)
+    rejects_path = args.rejects or f"{os.path.splitext(args.input)[0]}.rejects.{file_format}"
+    rejects_format = detect_format(rejects_path) or file_format
+
+    connection = sqlite3.connect(args.db)
+    try:
+        with open(args.input, 'r', newline='', encoding='utf-8') as f, \
+                open(rejects_path, 'w', newline='', encoding='utf-8') as rejects:
+            summary = import_records(connection, args.kind, read_records(f, file_format), args.college_id,
+                                     batch_size=args.batch_size, defer_indexes=args.defer_indexes,
+                                     on_reject=RejectWriter(rejects, rejects_format))
+    finally:
+        connection.close()
+
+    print(f"Imported {summary['imported']} of {summary['rows']} {args.kind} rows in {summary['seconds']}s "
+          f"({summary['rows_per_second']} rows/s, {summary['batches']} batches)")
+    if summary['rejected']:
+        print(f"Rejected {summary['rejected']} rows; see {rejects_path}")
+    else:
+        os.remove(rejects_path)
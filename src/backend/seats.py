@@ -0,0 +1,272 @@
+import sqlite3
+import sys
+
+# Outcomes of a seat request
+REGISTERED = 'registered'
+WAITLISTED = 'waitlisted'
+ALREADY_REGISTERED = 'already_registered'
+ALREADY_WAITLISTED = 'already_waitlisted'
+EVENT_NOT_FOUND = 'event_not_found'
+
+# One seat counter per event plus an ordered waitlist. seats_taken counts the
+# event's 'registered' rows and, like event_stats, is kept current by triggers
+# on event_registrations, so rows written outside this module (bulk loads,
+# sample data) are counted too. The functions below check it under BEGIN
+# IMMEDIATE, which enforces max_capacity without counting registrations.
+# capacity mirrors events.max_capacity (NULL means unlimited).
+EVENT_SEATS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS event_seats (
+        event_id INTEGER PRIMARY KEY,
+        capacity INTEGER,
+        seats_taken INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (event_id) REFERENCES events(event_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS event_waitlist (
+        waitlist_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (event_id) REFERENCES events(event_id),
+        FOREIGN KEY (student_id) REFERENCES students(student_id),
+        UNIQUE (event_id, student_id)
+    )
+    """,
+    # Promotion order: oldest entry first
+    "CREATE INDEX IF NOT EXISTS idx_waitlist_event_order ON event_waitlist (event_id, waitlist_id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_seats_event_insert
+    AFTER INSERT ON events
+    BEGIN
+        INSERT OR IGNORE INTO event_seats (event_id, capacity) VALUES (NEW.event_id, NEW.max_capacity);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_seats_event_update
+    AFTER UPDATE OF max_capacity ON events
+    BEGIN
+        UPDATE event_seats SET capacity = NEW.max_capacity WHERE event_id = NEW.event_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_seats_event_delete
+    AFTER DELETE ON events
+    BEGIN
+        DELETE FROM event_seats WHERE event_id = OLD.event_id;
+        DELETE FROM event_waitlist WHERE event_id = OLD.event_id;
+    END
+    """,
+]
+
+# Registrations claim and release seats in the same transaction that writes them
+EVENT_SEATS_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_seats_registration_insert
+    AFTER INSERT ON event_registrations
+    WHEN NEW.status = 'registered'
+    BEGIN
+        UPDATE event_seats SET seats_taken = seats_taken + 1 WHERE event_id = NEW.event_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_seats_registration_update
+    AFTER UPDATE OF event_id, status ON event_registrations
+    BEGIN
+        UPDATE event_seats SET seats_taken = seats_taken - 1
+        WHERE event_id = OLD.event_id AND OLD.status = 'registered';
+        UPDATE event_seats SET seats_taken = seats_taken + 1
+        WHERE event_id = NEW.event_id AND NEW.status = 'registered';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_seats_registration_delete
+    AFTER DELETE ON event_registrations
+    WHEN OLD.status = 'registered'
+    BEGIN
+        UPDATE event_seats SET seats_taken = seats_taken - 1 WHERE event_id = OLD.event_id;
+    END
+    """,
+]
+
+# Seat counters recomputed from the source tables, one row per event
+SOURCE_SEATS_QUERY = """
+SELECT e.event_id, e.max_capacity as capacity,
+       (SELECT COUNT(*) FROM event_registrations er
+        WHERE er.event_id = e.event_id AND er.status = 'registered') as seats_taken
+FROM events e
+"""
+
+SEAT_COLUMNS = ('capacity', 'seats_taken')
+
+REBUILD_STATEMENTS = [
+    "DELETE FROM event_seats",
+    "INSERT INTO event_seats (event_id, capacity, seats_taken) " + SOURCE_SEATS_QUERY,
+]
+
+# 1 if the event has a free seat, 0 if it is full, no row if it does not exist
+FREE_SEAT_QUERY = "SELECT capacity IS NULL OR seats_taken < capacity FROM event_seats WHERE event_id = ?"
+
+# Re-activates a cancelled registration; returns no row if already registered
+UPSERT_REGISTRATION_QUERY = """
+INSERT INTO event_registrations (event_id, student_id)
+VALUES (?, ?)
+ON CONFLICT (event_id, student_id) DO UPDATE
+SET status = 'registered', registration_date = CURRENT_TIMESTAMP
+WHERE status = 'cancelled'
+RETURNING registration_id
+"""
+
+
+def has_free_seat(connection, event_id):
+    """True / False whether the event has room, None when it does not exist"""
+    row = connection.execute(FREE_SEAT_QUERY, (event_id,)).fetchone()
+    return None if row is None else bool(row[0])
+
+
+def waitlist_position(connection, event_id, waitlist_id):
+    """1-based position of a waitlist entry within its event"""
+    return connection.execute(
+        "SELECT COUNT(*) FROM event_waitlist WHERE event_id = ? AND waitlist_id <= ?",
+        (event_id, waitlist_id)
+    ).fetchone()[0]
+
+
+def request_seat(connection, event_id, student_id):
+    """Register a student, or waitlist them if the event is full
+
+    Must run inside a BEGIN IMMEDIATE transaction. Returns (outcome, detail)
+    where detail is the registration_id for REGISTERED and the waitlist
+    position for WAITLISTED / ALREADY_WAITLISTED.
+    """
+    free = has_free_seat(connection, event_id)
+    if free is None:
+        return EVENT_NOT_FOUND, None
+    if free:
+        # The registration triggers claim the seat
+        registered = connection.execute(UPSERT_REGISTRATION_QUERY, (event_id, student_id)).fetchall()
+        if not registered:
+            return ALREADY_REGISTERED, None
+        connection.execute("DELETE FROM event_waitlist WHERE event_id = ? AND student_id = ?",
+                           (event_id, student_id))
+        return REGISTERED, registered[0][0]
+
+    if connection.execute(
+            "SELECT 1 FROM event_registrations WHERE event_id = ? AND student_id = ? AND status = 'registered'",
+            (event_id, student_id)).fetchone():
+        return ALREADY_REGISTERED, None
+
+    waitlisted = connection.execute(
+        """
+        INSERT INTO event_waitlist (event_id, student_id)
+        VALUES (?, ?)
+        ON CONFLICT (event_id, student_id) DO NOTHING
+        RETURNING waitlist_id
+        """,
+        (event_id, student_id)
+    ).fetchall()
+    if waitlisted:
+        return WAITLISTED, waitlist_position(connection, event_id, waitlisted[0][0])
+
+    waitlist_id = connection.execute(
+        "SELECT waitlist_id FROM event_waitlist WHERE event_id = ? AND student_id = ?",
+        (event_id, student_id)
+    ).fetchone()[0]
+    return ALREADY_WAITLISTED, waitlist_position(connection, event_id, waitlist_id)
+
+
+def promote_waitlist(connection, event_id):
+    """Move waitlisted students into free seats, oldest first
+
+    Must run inside a BEGIN IMMEDIATE transaction. Returns the promoted student ids.
+    """
+    promoted = []
+    while True:
+        entry = connection.execute(
+            "SELECT waitlist_id, student_id FROM event_waitlist WHERE event_id = ? ORDER BY waitlist_id LIMIT 1",
+            (event_id,)
+        ).fetchone()
+        if entry is None or not has_free_seat(connection, event_id):
+            return promoted
+        waitlist_id, student_id = entry
+        connection.execute("DELETE FROM event_waitlist WHERE waitlist_id = ?", (waitlist_id,))
+        if connection.execute(UPSERT_REGISTRATION_QUERY, (event_id, student_id)).fetchall():
+            promoted.append(student_id)
+
+
+def cancel_seat(connection, event_id, student_id):
+    """Cancel a registration (promoting the waitlist) or leave the waitlist
+
+    Must run inside a BEGIN IMMEDIATE transaction. Returns (outcome, promoted)
+    where outcome is 'cancelled', 'left_waitlist' or None if the student held
+    neither a seat nor a waitlist entry.
+    """
+    cancelled = connection.execute(
+        "UPDATE event_registrations SET status = 'cancelled' "
+        "WHERE event_id = ? AND student_id = ? AND status = 'registered'",
+        (event_id, student_id)
+    ).rowcount
+    if cancelled:
+        return 'cancelled', promote_waitlist(connection, event_id)
+
+    left = connection.execute("DELETE FROM event_waitlist WHERE event_id = ? AND student_id = ?",
+                              (event_id, student_id)).rowcount
+    return ('left_waitlist' if left else None), []
+
+
+def rebuild_event_seats(connection):
+    """Recompute event_seats from events and event_registrations (run inside a transaction)
+
+    Returns the number of events rebuilt.
+    """
+    for statement in REBUILD_STATEMENTS:
+        cursor = connection.execute(statement)
+    return cursor.rowcount
+
+
+def verify_event_seats(connection):
+    """Compare event_seats against the source tables
+
+    Returns a list of (event_id, column, stored, expected) tuples, one per
+    drifted value. A missing event_seats row is reported with stored None.
+    """
+    query = f"""
+    SELECT src.*, es.capacity as stored_capacity, es.seats_taken as stored_seats_taken
+    FROM ({SOURCE_SEATS_QUERY}) src
+    LEFT JOIN event_seats es ON es.event_id = src.event_id
+    """
+    drift = []
+    for row in connection.execute(query):
+        event_id = row[0]
+        for position, column in enumerate(SEAT_COLUMNS, start=1):
+            expected = row[position]
+            stored = row[position + len(SEAT_COLUMNS)]
+            if stored != expected:
+                drift.append((event_id, column, stored, expected))
+    return drift
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('verify', 'rebuild'):
+        print("Usage: python seats.py verify|rebuild [db_path]")
+        sys.exit(2)
+
+    command = sys.argv[1]
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'src/backend/campus_events.db'
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        drift = verify_event_seats(connection)
+        for event_id, column, stored, expected in drift:
+            print(f"Event {event_id}: {column} is {stored}, expected {expected}")
+
+        if command == 'verify':
+            print(f"{len(drift)} drifted counters" if drift else "event_seats is consistent")
+            sys.exit(1 if drift else 0)
+
+        connection.execute("BEGIN IMMEDIATE")
+        rebuilt = rebuild_event_seats(connection)
+        connection.execute("COMMIT")
+        print(f"Rebuilt event_seats for {rebuilt} events")
+    finally:
+        connection.close()
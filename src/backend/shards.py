@@ -0,0 +1,266 @@
+import glob
+import os
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from db_pool import ConnectionPool
+from event_stats import REBUILD_STATEMENTS as EVENT_STATS_REBUILD
+from migrations import apply_migrations, get_schema_version
+from seats import REBUILD_STATEMENTS as EVENT_SEATS_REBUILD
+from student_stats import BACKFILL_STATEMENTS as STUDENT_STATS_BACKFILL
+
+# Rows created in a shard get ids in [college_id * SHARD_ID_SPAN, (college_id + 1) * SHARD_ID_SPAN),
+# so the owning college of any new event or student follows from its id alone.
+# Ids below the span predate the split and are looked up in the shard directory.
+SHARD_ID_SPAN = 10 ** 9
+
+SHARD_FILE_PATTERN = re.compile(r'^college_(\d+)\.db$')
+DIRECTORY_FILE = 'shard_directory.db'
+
+# Derived tables are recomputed in each shard instead of copied
+DERIVED_TABLES = {
+    'event_stats': EVENT_STATS_REBUILD,
+    'student_stats': STUDENT_STATS_BACKFILL,
+    'event_seats': EVENT_SEATS_REBUILD,
+}
+
+
+class UnknownShardError(LookupError):
+    """Raised when a request cannot be routed to a college's shard"""
+
+
+def shard_path(shard_dir, college_id):
+    return os.path.join(shard_dir, f'college_{int(college_id)}.db')
+
+
+class ShardRouter:
+    """Routes each college to its own database file
+
+    Connections come from one ConnectionPool per shard, opened lazily.
+    Events and students are mapped to their college from the id range, or
+    from the directory written by split_database for pre-split ids.
+    """
+
+    def __init__(self, shard_dir, pool_size=5, timeout=10.0, on_connect=None, fan_out_workers=8,
+                 factory=sqlite3.Connection, cached_statements=128):
+        self.shard_dir = shard_dir
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self.factory = factory
+        self.cached_statements = cached_statements
+        self.fan_out_workers = fan_out_workers
+
+        self._pools = {}
+        self._colleges = sorted(
+            int(match.group(1)) for match in
+            (SHARD_FILE_PATTERN.match(os.path.basename(path)) for path in glob.glob(os.path.join(shard_dir, '*.db')))
+            if match
+        )
+        self._event_colleges = {}
+        self._student_colleges = {}
+        directory_path = os.path.join(shard_dir, DIRECTORY_FILE)
+        if os.path.exists(directory_path):
+            directory = sqlite3.connect(directory_path)
+            try:
+                self._event_colleges = dict(directory.execute("SELECT event_id, college_id FROM event_colleges"))
+                self._student_colleges = dict(directory.execute("SELECT student_id, college_id FROM student_colleges"))
+            finally:
+                directory.close()
+
+    def colleges(self):
+        """College ids that have a shard"""
+        return list(self._colleges)
+
+    def pool(self, college_id):
+        """Connection pool of one college's shard"""
+        try:
+            college_id = int(college_id)
+        except (TypeError, ValueError):
+            raise UnknownShardError(f"Invalid college_id: {college_id!r}")
+        if college_id not in self._colleges:
+            raise UnknownShardError(f"No shard for college {college_id}")
+        pool = self._pools.get(college_id)
+        if pool is None:
+            # setdefault keeps one pool per shard if two threads race here
+            pool = self._pools.setdefault(college_id, ConnectionPool(
+                shard_path(self.shard_dir, college_id), pool_size=self.pool_size, timeout=self.timeout,
+                on_connect=self.on_connect, factory=self.factory,
+                cached_statements=self.cached_statements))
+        return pool
+
+    def college_for_event(self, event_id):
+        """College owning an event id, or None if it is unknown"""
+        return self._college_for_id(event_id, self._event_colleges)
+
+    def college_for_student(self, student_id):
+        """College owning a student id, or None if it is unknown"""
+        return self._college_for_id(student_id, self._student_colleges)
+
+    def _college_for_id(self, row_id, directory):
+        try:
+            row_id = int(row_id)
+        except (TypeError, ValueError):
+            return None
+        if row_id >= SHARD_ID_SPAN:
+            return row_id // SHARD_ID_SPAN
+        return directory.get(row_id)
+
+    def fan_out(self, sql, params=()):
+        """Run a read query on every shard in parallel
+
+        Returns {college_id: rows}; merging and ordering are up to the caller.
+        """
+        def run(college_id):
+            with self.pool(college_id).connection() as connection:
+                return college_id, connection.execute(sql, params).fetchall()
+
+        with ThreadPoolExecutor(max_workers=min(self.fan_out_workers, len(self._colleges)) or 1) as executor:
+            return dict(executor.map(run, self._colleges))
+
+    def close_all(self):
+        for pool in list(self._pools.values()):
+            pool.close_all()
+
+    def stats(self):
+        """Return per-shard pool stats for the shards opened so far"""
+        return {
+            'shard_dir': self.shard_dir,
+            'shards': len(self._colleges),
+            'pools': {str(college_id): pool.stats() for college_id, pool in sorted(self._pools.items())},
+        }
+
+
+def _table_columns(connection, schema, table):
+    return [row[1] for row in connection.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def split_database(source_path, shard_dir, verbose=True):
+    """Split a single database into one shard file per college plus the shard directory
+
+    Tables with a college_id column are partitioned by it, tables with an
+    event_id column follow their event, and the rest (colleges, event_types)
+    are reference data copied into every shard. Derived counter tables are
+    recomputed per shard. Returns {college_id: {table: rows}}.
+    """
+    source = sqlite3.connect(source_path)
+    try:
+        for table in ('events', 'students'):
+            max_id = source.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+            if max_id >= SHARD_ID_SPAN:
+                raise ValueError(f"{table} ids reach {max_id}; pre-split ids must stay below {SHARD_ID_SPAN}")
+        schema = source.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+        ).fetchall()
+        colleges = [row[0] for row in source.execute("SELECT college_id FROM colleges ORDER BY college_id")]
+        version = get_schema_version(source)
+        event_colleges = source.execute("SELECT event_id, college_id FROM events").fetchall()
+        student_colleges = source.execute("SELECT student_id, college_id FROM students").fetchall()
+    finally:
+        source.close()
+
+    if any(college_id < 1 for college_id in colleges):
+        raise ValueError("college ids must be positive to get their own id range")
+    tables = [name for kind, name, _ in schema if kind == 'table']
+    autoincrement_tables = [name for kind, name, sql in schema
+                            if kind == 'table' and name not in DERIVED_TABLES and 'AUTOINCREMENT' in sql.upper()]
+    os.makedirs(shard_dir, exist_ok=True)
+    counts = {}
+
+    for college_id in colleges:
+        path = shard_path(shard_dir, college_id)
+        if os.path.exists(path):
+            raise FileExistsError(f"Shard already exists: {path}")
+        shard = sqlite3.connect(path, isolation_level=None)
+        try:
+            # ATTACH is not allowed inside a transaction
+            shard.execute("ATTACH DATABASE ? AS source", (source_path,))
+            shard.execute("BEGIN")
+            for kind, _, sql in schema:
+                if kind == 'table':
+                    shard.execute(sql)
+
+            counts[college_id] = {}
+            # events and students first: the event_id filter below reads main.events
+            for table in sorted(tables, key=lambda name: name not in ('events', 'students')):
+                if table in DERIVED_TABLES:
+                    continue
+                columns = _table_columns(shard, 'main', table)
+                column_list = ', '.join(columns)
+                if 'college_id' in columns and table != 'colleges':
+                    where, params = "WHERE college_id = ?", (college_id,)
+                elif 'event_id' in columns:
+                    where, params = "WHERE event_id IN (SELECT event_id FROM main.events)", ()
+                else:
+                    where, params = "", ()
+                cursor = shard.execute(
+                    f"INSERT INTO main.{table} ({column_list}) SELECT {column_list} FROM source.{table} {where}", params)
+                counts[college_id][table] = cursor.rowcount
+
+            for table, statements in DERIVED_TABLES.items():
+                if table in tables:
+                    for statement in statements:
+                        shard.execute(statement)
+            for kind, _, sql in schema:
+                if kind in ('index', 'trigger', 'view'):
+                    shard.execute(sql)
+
+            # New rows in this shard get ids from the college's range
+            for table in autoincrement_tables:
+                max_id = shard.execute(f"SELECT MAX(rowid) FROM {table}").fetchone()[0] or 0
+                shard.execute("DELETE FROM sqlite_sequence WHERE name = ?", (table,))
+                shard.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)",
+                              (table, max(max_id, college_id * SHARD_ID_SPAN)))
+
+            shard.execute(f"PRAGMA user_version = {int(version)}")
+            shard.execute("COMMIT")
+            shard.execute("DETACH DATABASE source")
+            apply_migrations(shard, verbose=False)
+        except BaseException:
+            if shard.in_transaction:
+                shard.execute("ROLLBACK")
+            shard.close()
+            os.remove(path)
+            raise
+        shard.close()
+        if verbose:
+            print(f"College {college_id}: " + ', '.join(
+                f"{table} {rows}" for table, rows in counts[college_id].items()))
+
+    directory = sqlite3.connect(os.path.join(shard_dir, DIRECTORY_FILE), isolation_level=None)
+    try:
+        directory.execute("BEGIN")
+        directory.execute("CREATE TABLE event_colleges (event_id INTEGER PRIMARY KEY, college_id INTEGER NOT NULL)")
+        directory.execute("CREATE TABLE student_colleges (student_id INTEGER PRIMARY KEY, college_id INTEGER NOT NULL)")
+        directory.executemany("INSERT INTO event_colleges VALUES (?, ?)", event_colleges)
+        directory.executemany("INSERT INTO student_colleges VALUES (?, ?)", student_colleges)
+        directory.execute("COMMIT")
+    finally:
+        directory.close()
+    return counts
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('split', 'stats'):
+        print("Usage: python shards.py split <source_db> <shard_dir>\n"
+              "       python shards.py stats <shard_dir>")
+        sys.exit(2)
+
+    if sys.argv[1] == 'split':
+        if len(sys.argv) < 4:
+            print("Usage: python shards.py split <source_db> <shard_dir>")
+            sys.exit(2)
+        counts = split_database(sys.argv[2], sys.argv[3])
+        print(f"Split {sys.argv[2]} into {len(counts)} shards in {sys.argv[3]}")
+    else:
+        router = ShardRouter(sys.argv[2])
+        totals = router.fan_out(
+            "SELECT (SELECT COUNT(*) FROM events), (SELECT COUNT(*) FROM students), "
+            "(SELECT COUNT(*) FROM event_registrations)")
+        for college_id, rows in sorted(totals.items()):
+            events, students, registrations = rows[0]
+            print(f"College {college_id}: {events} events, {students} students, {registrations} registrations")
+        router.close_all()
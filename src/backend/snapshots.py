@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from urllib.request import pathname2url
+
+from db_pool import ConnectionPool
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are only serialized within one process
+    fcntl = None
+
+
+class Snapshot:
+    """One generation of the snapshot file and the read-only pool opened on it
+
+    Every user of a Snapshot returned by SnapshotManager.current() calls
+    release() when done. A snapshot replaced by a newer generation keeps
+    handing out connections until its last user releases it, and only then
+    closes its pool.
+    """
+
+    def __init__(self, generation, created_at, pool):
+        self.generation = generation
+        self.created_at = created_at
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._users = 0
+        self._retired = False
+
+    @property
+    def age(self):
+        return max(0.0, time.time() - self.created_at)
+
+    def hold(self):
+        with self._lock:
+            self._users += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            close = self._retired and self._users == 0
+        if close:
+            self.pool.close_all()
+
+    def retire(self):
+        """Close the pool once the last user has released the snapshot"""
+        with self._lock:
+            self._retired = True
+            close = self._users == 0
+        if close:
+            self.pool.close_all()
+
+
+class SnapshotManager:
+    """Read-only copy of the primary database for report traffic
+
+    The copy is made with the sqlite3 backup API into a temporary file and
+    swapped in with an atomic rename, then opened with mode=ro&immutable=1 so
+    report queries take no locks on either file. Once the copy is older than
+    max_age the next reader starts a refresh in the background and keeps
+    using the current copy meanwhile. The file's mtime is its creation time,
+    so every worker process sharing snapshot_path agrees on the age, and a
+    lock file makes sure only one of them refreshes at a time.
+    """
+
+    def __init__(self, primary_path, snapshot_path, max_age=30.0, pool_size=5, timeout=10.0, on_connect=None,
+                 factory=sqlite3.Connection, cached_statements=128):
+        self.primary_path = primary_path
+        self.snapshot_path = snapshot_path
+        self.max_age = max_age
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self.factory = factory
+        self.cached_statements = cached_statements
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._current = None
+
+        # Metrics
+        self._refreshes = 0
+        self._refresh_failures = 0
+        self._last_refresh_seconds = 0.0
+
+    def _open_pool(self):
+        uri = f"file:{pathname2url(os.path.abspath(self.snapshot_path))}?mode=ro&immutable=1"
+        return ConnectionPool(uri, pool_size=self.pool_size, timeout=self.timeout,
+                              on_connect=self.on_connect, uri=True, factory=self.factory,
+                              cached_statements=self.cached_statements)
+
+    def refresh(self, force=False, wait=False):
+        """Copy the primary database into a new snapshot file
+
+        Unless force is set, a snapshot younger than max_age is left alone.
+        Returns False without copying if another process holds the refresh
+        lock and wait is not set.
+        """
+        with self._refresh_lock:
+            with open(self.snapshot_path + '.lock', 'w') as lock_file:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+                    except BlockingIOError:
+                        return False
+
+                # Another process may have refreshed while we waited for the lock
+                if not force:
+                    try:
+                        if time.time() - os.stat(self.snapshot_path).st_mtime < self.max_age:
+                            return True
+                    except FileNotFoundError:
+                        pass
+
+                start = time.monotonic()
+                temporary_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+                source = sqlite3.connect(self.primary_path, timeout=self.timeout)
+                destination = sqlite3.connect(temporary_path)
+                try:
+                    source.backup(destination)
+                    # Readers open the copy immutable, so it must not depend on a -wal file
+                    destination.execute("PRAGMA journal_mode = DELETE")
+                finally:
+                    destination.close()
+                    source.close()
+                os.replace(temporary_path, self.snapshot_path)
+
+                self._refreshes += 1
+                self._last_refresh_seconds = time.monotonic() - start
+                return True
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            except (sqlite3.Error, OSError) as e:
+                self._refresh_failures += 1
+                print(f"Snapshot refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='snapshot-refresh', daemon=True).start()
+
+    def current(self):
+        """Hold and return the newest Snapshot, starting a background refresh if it is too old
+
+        The caller must release() the snapshot when done with it.
+        """
+        try:
+            stat = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            self.refresh(wait=True)
+            stat = os.stat(self.snapshot_path)
+
+        if time.time() - stat.st_mtime > self.max_age:
+            self._refresh_in_background()
+
+        with self._lock:
+            previous = self._current
+            if previous is None or previous.generation != stat.st_mtime_ns:
+                self._current = Snapshot(stat.st_mtime_ns, stat.st_mtime, self._open_pool())
+                if previous is not None:
+                    # Requests that already hold it keep reading the old file
+                    previous.retire()
+            return self._current.hold()
+
+    def close_all(self):
+        with self._lock:
+            if self._current is not None:
+                self._current.retire()
+
+    def stats(self):
+        """Return snapshot age and refresh counters"""
+        with self._lock:
+            current = self._current
+            return {
+                'snapshot_path': self.snapshot_path,
+                'max_age_seconds': self.max_age,
+                'age_seconds': round(current.age, 3) if current else None,
+                'refreshing': self._refreshing,
+                'refreshes': self._refreshes,
+                'refresh_failures': self._refresh_failures,
+                'last_refresh_ms': round(self._last_refresh_seconds * 1000, 3),
+                'pool': current.pool.stats() if current else None,
+            }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python snapshots.py <snapshot_path> [db_path]")
+        sys.exit(2)
+
+    snapshot_path = sys.argv[1]
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'src/backend/campus_events.db'
+    manager = SnapshotManager(db_path, snapshot_path)
+    manager.refresh(force=True, wait=True)
+    print(f"Wrote snapshot of {db_path} to {snapshot_path} in {manager.stats()['last_refresh_ms']} ms")
@@ -0,0 +1,51 @@
+from json_provider import RowSet
+
+# Rows fetched from the cursor per chunk of a streamed response
+STREAM_BATCH_SIZE = 500
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def get_stream_format(request):
+    """Return 'ndjson', 'json' (streamed array) or None for a regular response
+
+    Selected with ?format=ndjson|stream or an Accept: application/x-ndjson header.
+    """
+    requested = request.args.get('format')
+    if requested == 'ndjson':
+        return 'ndjson'
+    if requested == 'stream':
+        return 'json'
+    if requested not in (None, 'json'):
+        raise ValueError(f"Unknown format: {requested} (expected json, stream or ndjson)")
+    if requested is None and request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        return 'ndjson'
+    return None
+
+
+def iter_batches(cursor, batch_size=STREAM_BATCH_SIZE):
+    """Yield lists of rows from cursor.fetchmany until it is exhausted"""
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def stream_json_array(cursor, dumps, batch_size=STREAM_BATCH_SIZE):
+    """Yield a JSON array of a tuple cursor's rows, one batch encoded at a time"""
+    columns = [column[0] for column in cursor.description]
+    yield '['
+    separator = ''
+    for rows in iter_batches(cursor, batch_size):
+        # Drop the brackets of each batch's array
+        yield separator + dumps(RowSet(columns, rows))[1:-1]
+        separator = ','
+    yield ']'
+
+
+def stream_ndjson(cursor, dumps, batch_size=STREAM_BATCH_SIZE):
+    """Yield one JSON document per line from a tuple cursor, one batch of rows at a time"""
+    columns = [column[0] for column in cursor.description]
+    for rows in iter_batches(cursor, batch_size):
+        yield ''.join(dumps(dict(zip(columns, row))) + '\n' for row in rows)
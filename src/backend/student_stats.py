@@ -0,0 +1,178 @@
+import sqlite3
+import sys
+
+# Per-student participation counters served by the student reports.
+# Triggers keep them current on every write, and the leaderboard index lets
+# top-active-students read three index entries instead of sorting a college.
+STUDENT_STATS_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS student_stats (
+        student_id INTEGER PRIMARY KEY,
+        college_id INTEGER NOT NULL,
+        events_registered INTEGER NOT NULL DEFAULT 0,
+        events_attended INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (student_id) REFERENCES students(student_id),
+        FOREIGN KEY (college_id) REFERENCES colleges(college_id)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_student_stats_leaderboard
+    ON student_stats (college_id, events_attended DESC, events_registered DESC)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_student_insert
+    AFTER INSERT ON students
+    BEGIN
+        INSERT OR IGNORE INTO student_stats (student_id, college_id) VALUES (NEW.student_id, NEW.college_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_student_update
+    AFTER UPDATE OF college_id ON students
+    BEGIN
+        UPDATE student_stats SET college_id = NEW.college_id WHERE student_id = NEW.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_student_delete
+    AFTER DELETE ON students
+    BEGIN
+        DELETE FROM student_stats WHERE student_id = OLD.student_id;
+    END
+    """,
+    # Registrations: only status = 'registered' is counted
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_registration_insert
+    AFTER INSERT ON event_registrations
+    WHEN NEW.status = 'registered'
+    BEGIN
+        UPDATE student_stats SET events_registered = events_registered + 1 WHERE student_id = NEW.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_registration_update
+    AFTER UPDATE OF student_id, status ON event_registrations
+    BEGIN
+        UPDATE student_stats SET events_registered = events_registered - 1
+        WHERE student_id = OLD.student_id AND OLD.status = 'registered';
+        UPDATE student_stats SET events_registered = events_registered + 1
+        WHERE student_id = NEW.student_id AND NEW.status = 'registered';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_registration_delete
+    AFTER DELETE ON event_registrations
+    WHEN OLD.status = 'registered'
+    BEGIN
+        UPDATE student_stats SET events_registered = events_registered - 1 WHERE student_id = OLD.student_id;
+    END
+    """,
+    # Attendance: only status = 'present' is counted
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_attendance_insert
+    AFTER INSERT ON attendance
+    WHEN NEW.status = 'present'
+    BEGIN
+        UPDATE student_stats SET events_attended = events_attended + 1 WHERE student_id = NEW.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_attendance_update
+    AFTER UPDATE OF student_id, status ON attendance
+    BEGIN
+        UPDATE student_stats SET events_attended = events_attended - 1
+        WHERE student_id = OLD.student_id AND OLD.status = 'present';
+        UPDATE student_stats SET events_attended = events_attended + 1
+        WHERE student_id = NEW.student_id AND NEW.status = 'present';
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_student_stats_attendance_delete
+    AFTER DELETE ON attendance
+    WHEN OLD.status = 'present'
+    BEGIN
+        UPDATE student_stats SET events_attended = events_attended - 1 WHERE student_id = OLD.student_id;
+    END
+    """,
+]
+
+# Counters recomputed from the source tables, one row per student
+SOURCE_STATS_QUERY = """
+SELECT s.student_id, s.college_id,
+       (SELECT COUNT(*) FROM event_registrations er
+        WHERE er.student_id = s.student_id AND er.status = 'registered') as events_registered,
+       (SELECT COUNT(*) FROM attendance a
+        WHERE a.student_id = s.student_id AND a.status = 'present') as events_attended
+FROM students s
+"""
+
+STAT_COLUMNS = ('college_id', 'events_registered', 'events_attended')
+
+BACKFILL_STATEMENTS = [
+    "DELETE FROM student_stats",
+    "INSERT INTO student_stats (student_id, college_id, events_registered, events_attended) " + SOURCE_STATS_QUERY,
+]
+
+
+def backfill_student_stats(connection):
+    """Recompute student_stats from the source tables (run inside a transaction)
+
+    Returns the number of students backfilled.
+    """
+    for statement in BACKFILL_STATEMENTS:
+        cursor = connection.execute(statement)
+    return cursor.rowcount
+
+
+def verify_student_stats(connection):
+    """Compare student_stats against the source tables
+
+    Returns a list of (student_id, column, stored, expected) tuples, one per
+    drifted counter. A missing student_stats row is reported with stored None.
+    """
+    query = f"""
+    SELECT src.*, ss.college_id as stored_college_id,
+           ss.events_registered as stored_events_registered,
+           ss.events_attended as stored_events_attended
+    FROM ({SOURCE_STATS_QUERY}) src
+    LEFT JOIN student_stats ss ON ss.student_id = src.student_id
+    """
+    drift = []
+    for row in connection.execute(query):
+        student_id = row[0]
+        for position, column in enumerate(STAT_COLUMNS, start=1):
+            expected = row[position]
+            stored = row[position + len(STAT_COLUMNS)]
+            if stored != expected:
+                drift.append((student_id, column, stored, expected))
+
+    # Stats rows left behind for students that no longer exist
+    for (student_id,) in connection.execute(
+            "SELECT student_id FROM student_stats WHERE student_id NOT IN (SELECT student_id FROM students)"):
+        drift.append((student_id, 'student_id', student_id, None))
+    return drift
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('verify', 'backfill'):
+        print("Usage: python student_stats.py verify|backfill [db_path]")
+        sys.exit(2)
+
+    command = sys.argv[1]
+    db_path = sys.argv[2] if len(sys.argv) > 2 else 'src/backend/campus_events.db'
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        drift = verify_student_stats(connection)
+        for student_id, column, stored, expected in drift:
+            print(f"Student {student_id}: {column} is {stored}, expected {expected}")
+
+        if command == 'verify':
+            print(f"{len(drift)} drifted counters" if drift else "student_stats is consistent")
+            sys.exit(1 if drift else 0)
+
+        connection.execute("BEGIN IMMEDIATE")
+        backfilled = backfill_student_stats(connection)
+        connection.execute("COMMIT")
+        print(f"Backfilled student_stats for {backfilled} students")
+    finally:
+        connection.close()
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'backend'))
+
+# Settings read when app.py is imported: no response cache or rollup worker,
+# and a short pool timeout so a leaked connection fails fast
+os.environ.setdefault('REPORT_CACHE_TTL', '0')
+os.environ.setdefault('ROLLUP_INTERVAL', '0')
+os.environ.setdefault('DB_POOL_TIMEOUT', '1')
+
+from db_pool import ConnectionPool  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from query_plans import SCHEMA_PATH  # noqa: E402
+
+TEST_COLLEGE_ID = 999
+
+
+def build_database(path, students=20, capacity=None):
+    """Create the schema plus one college, one event and its students; return (event_id, student_ids)"""
+    connection = sqlite3.connect(path, isolation_level=None)
+    with open(SCHEMA_PATH, 'r') as f:
+        connection.executescript(f.read())
+    apply_migrations(connection, verbose=False)
+    connection.execute("BEGIN")
+    connection.execute("INSERT INTO colleges (college_id, college_name, college_code) "
+                       "VALUES (?, 'Test University', 'TEST')", (TEST_COLLEGE_ID,))
+    connection.executemany(
+        "INSERT INTO students (college_id, student_name, email, student_id_number) VALUES (?, ?, ?, ?)",
+        [(TEST_COLLEGE_ID, f"Student {i}", f"student{i}@test.edu", f"TEST{i:06d}") for i in range(students)]
+    )
+    event_id = connection.execute(
+        "INSERT INTO events (college_id, event_name, event_type_id, event_date, event_time, max_capacity, created_by) "
+        "VALUES (?, 'Test Event', 1, '2024-03-01', '10:00:00', ?, 'Admin')",
+        (TEST_COLLEGE_ID, capacity)
+    ).lastrowid
+    connection.execute("COMMIT")
+    student_ids = [row[0] for row in connection.execute(
+        "SELECT student_id FROM students WHERE college_id = ? ORDER BY student_id", (TEST_COLLEGE_ID,))]
+    connection.close()
+    return event_id, student_ids
+
+
+@pytest.fixture
+def backend():
+    """The app module; tests point its db_pool at their own database"""
+    import app
+    original_pool = app.db_pool
+    yield app
+    if app.db_pool is not original_pool:
+        app.db_pool.close_all()
+        app.db_pool = original_pool
+
+
+def use_database(backend, path, pool_size=5):
+    """Serve the app from path through a fresh pool"""
+    backend.db_pool = ConnectionPool(path, pool_size=pool_size, timeout=1,
+                                     on_connect=lambda c: backend.apply_pragmas(c, backend.db_settings))
+    return backend.db_pool
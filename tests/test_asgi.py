@@ -0,0 +1,17 @@
+import pytest
+
+import asgi
+
+
+@pytest.mark.parametrize('path', [
+    '/api/reports/event-popularity',
+    '/api/export/event_registrations',
+    '/api/analytics/event-popularity',
+])
+def test_long_reads_run_on_the_reports_executor(path):
+    assert asgi.pick_executor(path) is asgi.executors['reports']
+
+
+@pytest.mark.parametrize('path', ['/api/register', '/api/attendance', '/api/events'])
+def test_writes_run_on_the_default_executor(path):
+    assert asgi.pick_executor(path) is asgi.executors['default']
@@ -0,0 +1,42 @@
+import importlib.util
+import os
+
+import pytest
+
+from conftest import build_database, use_database
+
+CHECK_DB_APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'database', 'check_db', 'app.py')
+
+
+@pytest.fixture
+def check_db(tmp_path):
+    """database/check_db/app.py, loaded under its own name next to the backend's app module"""
+    spec = importlib.util.spec_from_file_location('check_db_app', CHECK_DB_APP)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_register_responses_match_the_backend(backend, check_db, tmp_path):
+    responses = {}
+    for name, module in (('backend', backend), ('check_db', check_db)):
+        path = str(tmp_path / f'{name}.db')
+        event_id, student_ids = build_database(path, students=3, capacity=1)
+        if module is backend:
+            use_database(backend, path)
+        else:
+            module.DB_PATH = path
+        client = module.app.test_client()
+        responses[name] = []
+        # registered, waitlisted, already registered, already waitlisted, unknown event
+        for payload in ({'event_id': event_id, 'student_id': student_ids[0]},
+                        {'event_id': event_id, 'student_id': student_ids[1]},
+                        {'event_id': event_id, 'student_id': student_ids[0]},
+                        {'event_id': event_id, 'student_id': student_ids[1]},
+                        {'event_id': event_id + 1, 'student_id': student_ids[2]}):
+            response = client.post('/api/register', json=payload)
+            responses[name].append((response.status_code, response.get_json()))
+
+    assert responses['check_db'] == responses['backend']
+    assert responses['backend'][3] == (400, {'error': 'Student is already on the waitlist for this event',
+                                             'waitlist_position': 1})
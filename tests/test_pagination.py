@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import TEST_COLLEGE_ID, build_database, use_database
+from pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(['2024-03-01', 7]), (str, int)) == ['2024-03-01', 7]
+
+
+@pytest.mark.parametrize('values', [
+    [{'a': 1}, 2],
+    ['2024-03-01', '7'],
+    ['2024-03-01', True],
+    [None, 7],
+    ['2024-03-01'],
+])
+def test_cursor_with_wrong_values_is_rejected(values):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(encode_cursor(values), (str, int))
+
+
+@pytest.mark.parametrize('path', ['/api/events', '/api/students'])
+def test_list_routes_reject_mistyped_cursor(backend, tmp_path, path):
+    database = str(tmp_path / 'pages.db')
+    build_database(database)
+    use_database(backend, database)
+    client = backend.app.test_client()
+    response = client.get(f"{path}?college_id={TEST_COLLEGE_ID}&cursor={encode_cursor([{'a': 1}, 2])}")
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor'}
+
+    first = client.get(f"{path}?college_id={TEST_COLLEGE_ID}&limit=1").get_json()
+    if first['next_cursor'] is not None:
+        assert client.get(f"{path}?college_id={TEST_COLLEGE_ID}&cursor={first['next_cursor']}").status_code == 200
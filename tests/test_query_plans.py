@@ -0,0 +1,14 @@
+from query_plans import check_query_plans, create_reference_database
+
+
+def test_registered_queries_use_their_indexes():
+    connection = create_reference_database()
+    try:
+        assert check_query_plans(connection) == []
+    finally:
+        connection.close()
+
+
+def test_registry_outgrowing_the_statement_cache_is_reported():
+    problems = check_query_plans(create_reference_database(), cached_statements=1)
+    assert any('statement cache' in problem for problem in problems)
@@ -0,0 +1,68 @@
+import os
+import sys
+from collections import Counter
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from conftest import use_database  # noqa: E402
+from seats import verify_event_seats  # noqa: E402
+from stress_seat_allocation import build_database, post_all  # noqa: E402
+
+THREADS = 8
+STUDENTS = 60
+CAPACITY = 10
+CANCELLATIONS = 5
+
+
+@pytest.fixture
+def event(backend, tmp_path):
+    path = str(tmp_path / 'seats.db')
+    event_id, student_ids = build_database(path, STUDENTS, CAPACITY)
+    use_database(backend, path, pool_size=THREADS)
+    return event_id, student_ids
+
+
+def seat_counts(backend, event_id):
+    """(seats_taken, registered rows) of an event"""
+    with backend.db_pool.connection() as connection:
+        seats_taken, = connection.execute(
+            "SELECT seats_taken FROM event_seats WHERE event_id = ?", (event_id,)).fetchone()
+        held, = connection.execute(
+            "SELECT COUNT(*) FROM event_registrations WHERE event_id = ? AND status = 'registered'",
+            (event_id,)).fetchone()
+        assert verify_event_seats(connection) == []
+    return seats_taken, held
+
+
+def test_concurrent_registrations_and_cancellations(backend, event):
+    event_id, student_ids = event
+
+    responses, _ = post_all('/api/register', event_id, student_ids, THREADS)
+    codes = Counter(code for code, _ in responses.values())
+    assert codes == {200: CAPACITY, 202: STUDENTS - CAPACITY}
+    positions = sorted(body['waitlist_position'] for code, body in responses.values() if code == 202)
+    assert positions == list(range(1, STUDENTS - CAPACITY + 1))
+
+    seats_taken, held = seat_counts(backend, event_id)
+    assert seats_taken == held == CAPACITY
+
+    with backend.db_pool.connection() as connection:
+        waitlist_order = [row[0] for row in connection.execute(
+            "SELECT student_id FROM event_waitlist WHERE event_id = ? ORDER BY waitlist_id", (event_id,))]
+
+    registered = [student_id for student_id, (code, _) in responses.items() if code == 200]
+    cancelled, _ = post_all('/api/register/cancel', event_id, registered[:CANCELLATIONS], THREADS)
+    assert all(code == 200 for code, _ in cancelled.values())
+    promoted = [student_id for _, body in cancelled.values() for student_id in body['promoted_student_ids']]
+    # Each cancellation frees one seat for the oldest waitlisted student
+    assert sorted(promoted) == sorted(waitlist_order[:CANCELLATIONS])
+    with backend.db_pool.connection() as connection:
+        remaining = [row[0] for row in connection.execute(
+            "SELECT student_id FROM event_waitlist WHERE event_id = ? ORDER BY waitlist_id", (event_id,))]
+    assert remaining == waitlist_order[CANCELLATIONS:]
+
+    seats_taken, held = seat_counts(backend, event_id)
+    assert seats_taken == held <= CAPACITY
+    assert held == CAPACITY
@@ -0,0 +1,64 @@
+import os
+import sqlite3
+
+import pytest
+
+from conftest import TEST_COLLEGE_ID, build_database, use_database
+from snapshots import SnapshotManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    path = str(tmp_path / 'primary.db')
+    build_database(path)
+    manager = SnapshotManager(path, str(tmp_path / 'snapshot.db'), max_age=3600, pool_size=2, timeout=1)
+    yield manager
+    manager.close_all()
+
+
+def new_generation(manager):
+    """Write a newer snapshot file, as another worker's refresh would"""
+    manager.refresh(force=True, wait=True)
+    stat = os.stat(manager.snapshot_path)
+    os.utime(manager.snapshot_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+
+def test_replaced_snapshot_serves_its_holders_until_released(manager):
+    old = manager.current()
+    new_generation(manager)
+    new = manager.current()
+    assert new.generation != old.generation
+
+    # A request that took the old snapshot before the swap still gets a connection
+    connection = old.pool.acquire()
+    assert connection.execute("SELECT COUNT(*) FROM students").fetchone()[0] > 0
+    old.pool.release(connection)
+
+    old.release()
+    with pytest.raises(sqlite3.ProgrammingError):
+        old.pool.acquire()
+
+    connection = new.pool.acquire()
+    new.pool.release(connection)
+    new.release()
+
+
+def test_requests_release_the_snapshot(backend, manager, monkeypatch):
+    use_database(backend, manager.primary_path)
+    monkeypatch.setattr(backend, 'report_snapshots', manager)
+    client = backend.app.test_client()
+    for url in (f'/api/reports/event-popularity?college_id={TEST_COLLEGE_ID}',
+                f'/api/reports/event-popularity?college_id={TEST_COLLEGE_ID}&format=ndjson'):
+        response = client.get(url)
+        assert response.status_code == 200
+        response.close()
+        response = client.head(url)
+        response.close()
+
+    snapshot = manager.current()
+    snapshot.release()
+    # With no request left holding it, retiring the snapshot closes its pool right away
+    new_generation(manager)
+    manager.current().release()
+    with pytest.raises(sqlite3.ProgrammingError):
+        snapshot.pool.acquire()
@@ -0,0 +1,49 @@
+import pytest
+
+from conftest import TEST_COLLEGE_ID, build_database, use_database
+
+STREAMED_URLS = [
+    f'/api/reports/event-popularity?college_id={TEST_COLLEGE_ID}&format=ndjson',
+    f'/api/reports/student-participation?college_id={TEST_COLLEGE_ID}&format=stream',
+    f'/api/export/event-popularity?college_id={TEST_COLLEGE_ID}',
+    f'/api/export/event_registrations?college_id={TEST_COLLEGE_ID}&format=csv',
+]
+
+
+@pytest.fixture
+def pool(backend, tmp_path):
+    path = str(tmp_path / 'stream.db')
+    build_database(path)
+    return use_database(backend, path, pool_size=2)
+
+
+@pytest.mark.parametrize('url', STREAMED_URLS)
+def test_head_releases_connection(backend, pool, url):
+    client = backend.app.test_client()
+    # More requests than pooled connections: a leak would time out the checkout
+    for _ in range(pool.pool_size + 1):
+        response = client.head(url)
+        assert response.status_code == 200
+        response.close()
+    assert pool.stats()['in_use_connections'] == 0
+    assert client.get('/api/events').status_code == 200
+
+
+@pytest.mark.parametrize('url', STREAMED_URLS)
+def test_unread_body_releases_connection(backend, pool, url):
+    client = backend.app.test_client()
+    for _ in range(pool.pool_size + 1):
+        response = client.get(url, buffered=False)
+        assert response.status_code == 200
+        # The client went away before the first chunk
+        response.close()
+    assert pool.stats()['in_use_connections'] == 0
+
+
+@pytest.mark.parametrize('url', STREAMED_URLS)
+def test_read_body_releases_connection(backend, pool, url):
+    client = backend.app.test_client()
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.data
+    assert pool.stats()['in_use_connections'] == 0
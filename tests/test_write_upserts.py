@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'benchmarks'))
+
+from conftest import use_database  # noqa: E402
+from event_stats import verify_event_stats  # noqa: E402
+from stress_write_upserts import ENDPOINTS, STRESS_COLLEGE_ID, build_database, hammer  # noqa: E402
+from student_stats import verify_student_stats  # noqa: E402
+
+THREADS = 6
+
+
+@pytest.fixture
+def pairs(backend, tmp_path):
+    path = str(tmp_path / 'upserts.db')
+    pairs = build_database(path, events=3, students=10)
+    use_database(backend, path, pool_size=THREADS)
+    return pairs
+
+
+@pytest.mark.parametrize('endpoint', list(ENDPOINTS))
+def test_concurrent_duplicates_are_accepted_once(backend, pairs, endpoint):
+    table, extra = ENDPOINTS[endpoint]
+    statuses, _ = hammer(endpoint, extra, pairs, THREADS)
+
+    assert statuses[200] == len(pairs)
+    assert statuses[400] == len(pairs) * (THREADS - 1)
+    assert sum(statuses.values()) == len(pairs) * THREADS
+
+    with backend.db_pool.connection() as connection:
+        rows = connection.execute(
+            f"SELECT event_id, student_id, COUNT(*) FROM {table} "
+            f"WHERE event_id IN (SELECT event_id FROM events WHERE college_id = ?) "
+            f"GROUP BY event_id, student_id",
+            (STRESS_COLLEGE_ID,)
+        ).fetchall()
+        assert sorted((event_id, student_id) for event_id, student_id, _ in rows) == sorted(pairs)
+        assert all(count == 1 for _, _, count in rows)
+        assert verify_event_stats(connection) == []
+        assert verify_student_stats(connection) == []